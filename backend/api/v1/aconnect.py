@@ -0,0 +1,513 @@
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+from werkzeug.exceptions import NotFound, BadRequest, Forbidden
+from typing import Optional, List, Dict, Any
+from .server import *
+from .cache import MISSING, permission_cache, resolution_cache
+from .listener import event_payload
+from .statements import BOARD_COLUMNS, CARD_COLUMNS, NOTIFICATION_COLUMNS, STATEMENTS, columns
+from .connect import encode_cursor, decode_cursor, page_limit, build_project_data, file_url
+import logging
+
+# Асинхронный вариант функций доступа к данным из connect.py на asyncpg.
+# Имена, аргументы и формат результатов совпадают с синхронными версиями.
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+async def get_pool() -> asyncpg.Pool:
+    """Ленивое создание пула asyncpg для текущего цикла событий."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=HOST,
+                    user=USER,
+                    port=int(PORT),
+                    password=PASSWORD,
+                    database=DATABASE,
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE + POOL_MAX_OVERFLOW,
+                    max_inactive_connection_lifetime=POOL_RECYCLE
+                )
+                logger.info(f"Async connection pool created: min={POOL_MIN_SIZE}, max={POOL_MAX_SIZE + POOL_MAX_OVERFLOW}")
+    return _pool
+
+async def close_pool() -> None:
+    """Закрытие пула asyncpg."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+@asynccontextmanager
+async def dbinit():
+    """Асинхронный контекстный менеджер для получения соединения из пула."""
+    try:
+        pool = await get_pool()
+        async with pool.acquire(timeout=POOL_TIMEOUT) as connect:
+            yield connect
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, asyncio.TimeoutError) as e:
+        logger.error(f"Database connection failed: {str(e)}")
+        raise
+
+def isoformat_fields(row: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Преобразование полей даты в строки ISO 8601."""
+    for field in fields:
+        if row.get(field):
+            row[field] = row[field].isoformat()
+    return row
+
+async def user_getinfo(uid: Optional[int] = None, email: Optional[str] = None, guest: bool = True) -> Dict[str, Any]:
+    """Получение информации о пользователе."""
+    if uid is None and email is None:
+        raise BadRequest("Either uid or email must be provided")
+
+    sql = "SELECT id, email, role, created_at" + (", version" if not guest else "") + " FROM users WHERE "
+    if uid is not None:
+        sql += "id = $1 AND deleted = FALSE"
+        param = int(uid)
+    else:
+        sql += "email = $1 AND deleted = FALSE"
+        param = email
+
+    async with dbinit() as connect:
+        user_data = await connect.fetchrow(sql, param)
+    if not user_data:
+        raise NotFound("User not found")
+    user_dict = isoformat_fields(dict(user_data), ["created_at"])
+    logger.debug("Retrieved user info: id=%s", user_dict['id'])
+    return user_dict
+
+async def user_role(uid: int) -> int:
+    """Получение роли пользователя."""
+    async with dbinit() as connect:
+        role = await connect.fetchval("SELECT role FROM users WHERE id = $1 AND deleted = FALSE", int(uid))
+    return role if role is not None else 0
+
+async def project_info(project_id: Optional[int] = None, title: Optional[str] = None, author: Optional[int] = None) -> Dict[str, Any]:
+    """Получение информации о проектах."""
+    if project_id is None and title is None:
+        if not author:
+            raise BadRequest("No search criteria provided")
+        return await project_list(author)
+
+    conditions = []
+    parameters = []
+    if project_id is not None:
+        parameters.append(int(project_id))
+        conditions.append(f"projects.id = ${len(parameters)}")
+    if title is not None:
+        parameters.append(title)
+        conditions.append(f"LOWER(projects.title) = LOWER(${len(parameters)})")
+
+    async with dbinit() as connect:
+        project_data = await connect.fetchrow(
+            """
+            SELECT projects.id, projects.title, projects.description, projects.created_at, projects.updated_at
+            FROM projects
+            """ + ("JOIN collaborators ON projects.id = collaborators.project_id " if author else "") +
+            "WHERE " + " AND ".join(conditions) + " LIMIT 1",
+            *parameters
+        )
+        if not project_data:
+            raise NotFound("Project not found")
+        users_data = await connect.fetch("""
+            SELECT c.user_id, c.role, c.added_at, u.email, u.nickname
+            FROM collaborators c
+            JOIN users u ON c.user_id = u.id
+            WHERE c.project_id = $1
+            """, project_data["id"])
+        boards_data = await connect.fetch("SELECT id, title FROM boards WHERE project_id = $1 ORDER BY id", project_data["id"])
+    logger.debug("Formatted project data: id=%s", project_data['id'])
+    return build_project_data(tuple(project_data), [tuple(user) for user in users_data], [tuple(board) for board in boards_data])
+
+async def project_list(author: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Получение проектов пользователя с участниками и досками за три запроса."""
+    async with dbinit() as connect:
+        projects_data = await connect.fetch("""
+            SELECT p.id, p.title, p.description, p.created_at, p.updated_at, c.role
+            FROM projects p
+            JOIN collaborators c ON p.id = c.project_id
+            WHERE c.user_id = $1
+            ORDER BY p.created_at DESC
+            """, int(author))
+        project_ids = [project["id"] for project in projects_data]
+
+        users_by_project = {project_id: [] for project_id in project_ids}
+        boards_by_project = {project_id: [] for project_id in project_ids}
+        if project_ids:
+            for project_id, *user in await connect.fetch("""
+                SELECT c.project_id, c.user_id, c.role, c.added_at, u.email, u.nickname
+                FROM collaborators c
+                JOIN users u ON c.user_id = u.id
+                WHERE c.project_id = ANY($1::int[])
+                """, project_ids):
+                users_by_project[project_id].append(user)
+            for project_id, *board in await connect.fetch(
+                "SELECT project_id, id, title FROM boards WHERE project_id = ANY($1::int[]) ORDER BY id", project_ids
+            ):
+                boards_by_project[project_id].append(board)
+
+    owner_projects = []
+    member_projects = []
+    for *project, role in projects_data:
+        project_dict = build_project_data(project, users_by_project[project[0]], boards_by_project[project[0]])
+        (owner_projects if role == 3 else member_projects).append(project_dict)
+    logger.debug("Retrieved projects for user_id=%s, count=%s", author, len(projects_data))
+    return {"owner_projects": owner_projects, "member_projects": member_projects}
+
+async def card_attachments(connect, card_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Завершённые вложения карточек для списков: ссылки на миниатюры и веб-версии вместо оригиналов."""
+    attachments = {card_id: [] for card_id in card_ids}
+    if not card_ids:
+        return attachments
+    for row in await connect.fetch(STATEMENTS["files_by_cards"], list(attachments)):
+        file = dict(row)
+        ready = file["preview_status"] == "ready"
+        file["thumbnail_url"] = file_url(file["id"], "thumbnail") if ready else None
+        file["preview_url"] = file_url(file["id"], "preview") if ready else None
+        attachments[file["card_id"]].append(file)
+    return attachments
+
+async def project_snapshot(project_id: int) -> Dict[str, Any]:
+    """Снимок проекта: доски с карточками, тегами, ответственными и вложениями и курсор ленты изменений."""
+    async with dbinit() as connect:
+        version = await connect.fetchval("SELECT version FROM projects WHERE id = $1", int(project_id))
+        if version is None:
+            raise NotFound("Project not found")
+        boards = [dict(row) for row in await connect.fetch(f"SELECT {columns(BOARD_COLUMNS)} FROM boards WHERE project_id = $1 ORDER BY id", int(project_id))]
+        cards = [dict(row) for row in await connect.fetch(f"""
+            SELECT {columns(CARD_COLUMNS, "cards")}
+            FROM cards
+            JOIN boards b ON cards.board_id = b.id
+            WHERE b.project_id = $1
+            ORDER BY cards.id
+            """, int(project_id))]
+        card_ids = [card["id"] for card in cards]
+
+        tags_by_card = {card_id: [] for card_id in card_ids}
+        responsible_by_card = {card_id: [] for card_id in card_ids}
+        attachments = await card_attachments(connect, card_ids)
+        if card_ids:
+            for row in await connect.fetch("SELECT card_id, tag FROM cards_tags WHERE card_id = ANY($1::int[]) ORDER BY id", card_ids):
+                tags_by_card[row["card_id"]].append(row["tag"])
+            for row in await connect.fetch("""
+                SELECT r.*, u.email, u.nickname
+                FROM responsible r
+                JOIN users u ON r.user_id = u.id
+                WHERE r.card_id = ANY($1::int[])
+                """, card_ids):
+                resp = dict(row)
+                resp["appointed_at"] = resp["appointed_at"].isoformat() if resp.get("appointed_at") else None
+                responsible_by_card[resp["card_id"]].append(resp)
+
+    cards_by_board = {board["id"]: [] for board in boards}
+    for card in cards:
+        isoformat_fields(card, ['created_at', 'updated_at', 'sell_by'])
+        card["tags"] = tags_by_card[card["id"]]
+        card["responsible"] = responsible_by_card[card["id"]]
+        card["attachments"] = attachments[card["id"]]
+        cards_by_board[card["board_id"]].append(card)
+    for board in boards:
+        board["cards"] = cards_by_board[board["id"]]
+
+    logger.debug("Built project snapshot: project_id=%s, boards=%s, cards=%s", project_id, len(boards), len(cards))
+    return {"project_id": project_id, "boards": boards, "cursor": encode_cursor([version])}
+
+async def collaborator_role(project_id: int, user_id: int) -> Optional[int]:
+    """Роль пользователя в проекте через кэш прав; None, если он не участник."""
+    key = (int(project_id), int(user_id))
+    role = permission_cache.get(key)
+    if role is not MISSING:
+        return role
+    async with dbinit() as connect:
+        role = await connect.fetchval("SELECT role FROM collaborators WHERE project_id = $1 AND user_id = $2", *key)
+    permission_cache.set(key, role)
+    return role
+
+async def collaborators_exist(project_id: int, user_id: int) -> bool:
+    """Проверка, является ли пользователь коллаборатором проекта."""
+    return await collaborator_role(project_id, user_id) is not None
+
+async def collaborators_getrole(project_id: int, user_id: int, error: bool = True) -> int:
+    """Получение роли коллаборатора."""
+    role = await collaborator_role(project_id, user_id)
+    if role is None and error:
+        raise NotFound(f"User {user_id} not found in project {project_id}")
+    return role if role is not None else 0
+
+async def boards_info(project_id: int, board_id: Optional[int] = None) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """Получение информации о досках."""
+    async with dbinit() as connect:
+        if board_id is not None:
+            board_data = await connect.fetch(f"SELECT {columns(BOARD_COLUMNS)} FROM boards WHERE project_id = $1 AND id = $2", int(project_id), int(board_id))
+        else:
+            board_data = await connect.fetch(f"SELECT {columns(BOARD_COLUMNS)} FROM boards WHERE project_id = $1", int(project_id))
+    if not board_data:
+        raise NotFound("Board not found")
+    result = [dict(row) for row in board_data]
+    logger.debug("Retrieved boards: project_id=%s, count=%s", project_id, len(result))
+    return result[0] if board_id is not None else result
+
+async def cards_info(
+    board_id: Optional[int] = None,
+    card_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """Получение информации о карточках."""
+    paged = after_id is not None or limit is not None
+    where = []
+    params = []
+    if board_id is not None:
+        params.append(int(board_id))
+        where.append(f"board_id = ${len(params)}")
+    if card_id is not None:
+        params.append(int(card_id))
+        where.append(f"id = ${len(params)}")
+    if not where:
+        raise BadRequest("Either board_id or card_id must be provided")
+    if after_id is not None:
+        params.append(int(after_id))
+        where.append(f"id > ${len(params)}")
+
+    query = f"SELECT {columns(CARD_COLUMNS)} FROM cards WHERE " + " AND ".join(where)
+    if paged:
+        params.append(limit if limit is not None else PAGE_SIZE)
+        query += f" ORDER BY id LIMIT ${len(params)}"
+    async with dbinit() as connect:
+        cards_data = await connect.fetch(query, *params)
+        if not cards_data and not paged:
+            raise NotFound("No cards found")
+        attachments = await card_attachments(connect, [row["id"] for row in cards_data])
+
+    result = [isoformat_fields(dict(row), ['created_at', 'updated_at', 'sell_by']) for row in cards_data]
+    for card in result:
+        card["attachments"] = attachments[card["id"]]
+    logger.debug("Retrieved cards: count=%s", len(result))
+    return result[0] if card_id is not None else result
+
+async def cards_page(board_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Страница карточек доски по ключу (id) с курсором на следующую страницу."""
+    limit = page_limit(limit)
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    items = await cards_info(board_id, after_id=after_id, limit=limit + 1)
+    next_cursor = encode_cursor([items[limit - 1]["id"]]) if len(items) > limit else None
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
+async def responsible_get(card_id: int) -> List[Dict[str, Any]]:
+    """Получение списка ответственных за карточку."""
+    async with dbinit() as connect:
+        resp_data = await connect.fetch("""
+            SELECT r.*, u.email, u.nickname
+            FROM responsible r
+            JOIN users u ON r.user_id = u.id
+            WHERE r.card_id = $1
+            """, int(card_id))
+    result = [dict(row) for row in resp_data]
+    for resp in result:
+        resp["appointed_at"] = resp["appointed_at"].isoformat() if resp.get("appointed_at") else None
+    logger.debug("Retrieved responsible for card_id=%s, count=%s", card_id, len(result))
+    return result
+
+async def notification_create(to_whom: int, text: str, priority: int = 0) -> Dict[str, Any]:
+    """Создание уведомления."""
+    async with dbinit() as connect:
+        async with connect.transaction():
+            notif_data = await connect.fetchrow(
+                "INSERT INTO notifications (to_whom, text, priority) VALUES ($1, $2, $3) RETURNING *",
+                int(to_whom), text, priority
+            )
+            if not notif_data:
+                raise Exception("Failed to create notification")
+            notif_dict = dict(notif_data)
+            await connect.execute("SELECT pg_notify($1, $2)", NOTIFICATION_CHANNEL, event_payload(to_whom, notif_dict))
+    logger.info(f"Created notification: to_whom={to_whom}, id={notif_dict['id']}")
+    return notif_dict
+
+async def notifications_get(
+    user_id: int,
+    notification_id: Optional[int] = None,
+    limit: int = 10,
+    after: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """Получение уведомлений пользователя по убыванию (priority, id)."""
+    where = "to_whom = $1"
+    params: List[Any] = [int(user_id)]
+    if notification_id is not None:
+        params.append(int(notification_id))
+        where += f" AND id = ${len(params)}"
+    if after is not None:
+        params.extend(int(value) for value in after)
+        where += f" AND (priority, id) < (${len(params) - 1}, ${len(params)})"
+    params.append(limit)
+
+    async with dbinit() as connect:
+        notif_data = await connect.fetch(
+            f"SELECT {columns(NOTIFICATION_COLUMNS)} FROM notifications WHERE {where} ORDER BY priority DESC, id DESC LIMIT ${len(params)}",
+            *params
+        )
+    result = [isoformat_fields(dict(row), ['created_at']) for row in notif_data]
+    logger.debug("Retrieved notifications for user_id=%s, count=%s", user_id, len(result))
+    return result
+
+async def notifications_page(user_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Страница уведомлений по ключу (priority, id) с курсором на следующую страницу."""
+    limit = page_limit(limit)
+    after = decode_cursor(cursor, 2) if cursor else None
+    items = await notifications_get(user_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = encode_cursor([last["priority"], last["id"]])
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
+async def notifications_since(user_id: int, after_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Уведомления, созданные после after_id, по возрастанию id — догрузка пропущенного потоком событий."""
+    async with dbinit() as connect:
+        rows = await connect.fetch(
+            f"SELECT {columns(NOTIFICATION_COLUMNS)} FROM notifications WHERE to_whom = $1 AND id > $2 ORDER BY id LIMIT $3",
+            int(user_id), int(after_id), page_limit(limit)
+        )
+    return [isoformat_fields(dict(row), ["created_at"]) for row in rows]
+
+async def chat_member(user_id: int, chat_id: int) -> bool:
+    """Участники чата — незаблокированные коллабораторы его проекта (роль от 1)."""
+    chat_id = int(chat_id)
+    project_id = resolution_cache.get(("chat", chat_id))
+    if project_id is MISSING:
+        async with dbinit() as connect:
+            project_id = await connect.fetchval(STATEMENTS["chat_resolve"], chat_id)
+        if project_id is None:
+            raise NotFound("Chat not found")
+        resolution_cache.set(("chat", chat_id), project_id)
+    role = await collaborator_role(project_id, user_id)
+    return role is not None and role >= 1
+
+async def messages_since(chat_id: int, after_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Сообщения чата после after_id по возрастанию id — догрузка пропущенного потоком событий."""
+    async with dbinit() as connect:
+        rows = await connect.fetch(STATEMENTS["messages_after"], int(chat_id), int(after_id), page_limit(limit))
+    return [isoformat_fields(dict(row), ["created_at"]) for row in rows]
+
+async def notification_check(notification_id: int, user_id: int) -> None:
+    """Пометка уведомления как прочитанного."""
+    async with dbinit() as connect:
+        status = await connect.execute(
+            "UPDATE notifications SET checked = TRUE WHERE id = $1 AND to_whom = $2",
+            int(notification_id), int(user_id)
+        )
+    if status.endswith(" 0"):
+        raise Forbidden("Notification not found or not authorized")
+    logger.info(f"Checked notification: id={notification_id}, user_id={user_id}")
+
+async def entity_version(project_id: Optional[int] = None, board_id: Optional[int] = None, card_id: Optional[int] = None) -> Optional[int]:
+    """Текущая версия проекта, доски или карточки для ETag; None, если строки нет."""
+    if card_id is not None:
+        table, key = "cards", card_id
+    elif board_id is not None:
+        table, key = "boards", board_id
+    elif project_id is not None:
+        table, key = "projects", project_id
+    else:
+        raise BadRequest("Must specify project_id, board_id, or card_id")
+    async with dbinit() as connect:
+        return await connect.fetchval(f"SELECT version FROM {table} WHERE id = $1", int(key))
+
+async def resolve_project(board_id: Optional[int] = None, card_id: Optional[int] = None) -> Optional[int]:
+    """Определение проекта доски или карточки через кэш принадлежности."""
+    if board_id is None and card_id is not None:
+        board_id = resolution_cache.get(("card", int(card_id)))
+        if board_id is MISSING:
+            async with dbinit() as connect:
+                row = await connect.fetchrow(
+                    "SELECT c.board_id, b.project_id FROM cards c JOIN boards b ON c.board_id = b.id WHERE c.id = $1",
+                    int(card_id)
+                )
+            if not row:
+                return None
+            resolution_cache.set(("card", int(card_id)), row["board_id"])
+            resolution_cache.set(("board", row["board_id"]), row["project_id"])
+            return row["project_id"]
+    if board_id is None:
+        return None
+
+    project_id = resolution_cache.get(("board", int(board_id)))
+    if project_id is MISSING:
+        async with dbinit() as connect:
+            project_id = await connect.fetchval("SELECT project_id FROM boards WHERE id = $1", int(board_id))
+        if project_id is None:
+            return None
+        resolution_cache.set(("board", int(board_id)), project_id)
+    return project_id
+
+async def notifications_unread_count(user_id: int) -> int:
+    """Количество непрочитанных уведомлений по частичному индексу idx_notifications_unread."""
+    async with dbinit() as connect:
+        return await connect.fetchval(
+            "SELECT count(*) FROM notifications WHERE to_whom = $1 AND checked = false",
+            int(user_id)
+        )
+
+async def notifications_check_all(user_id: int, up_to_id: Optional[int] = None) -> int:
+    """Пометка всех (или с id не больше up_to_id) непрочитанных уведомлений одним UPDATE."""
+    async with dbinit() as connect:
+        if up_to_id is None:
+            status = await connect.execute(
+                "UPDATE notifications SET checked = TRUE WHERE to_whom = $1 AND checked = false",
+                int(user_id)
+            )
+        else:
+            status = await connect.execute(
+                "UPDATE notifications SET checked = TRUE WHERE to_whom = $1 AND checked = false AND id <= $2",
+                int(user_id), int(up_to_id)
+            )
+    checked = int(status.split()[-1])
+    logger.info(f"Checked notifications: user_id={user_id}, up_to_id={up_to_id}, count={checked}")
+    return checked
+
+async def can_edit(user_id: int, project_id: Optional[int] = None, board_id: Optional[int] = None, card_id: Optional[int] = None) -> bool:
+    """Проверка прав редактирования."""
+    if not any([project_id, board_id, card_id]):
+        raise BadRequest("Must specify project_id, board_id, or card_id")
+
+    if project_id is None:
+        project_id = await resolve_project(board_id=board_id, card_id=card_id)
+    role = (await collaborator_role(project_id, user_id) if project_id is not None else None) or 0
+    logger.debug("Checked edit permissions: user_id=%s, role=%s", user_id, role)
+    return role >= 2
+
+async def project_tags_get(project_id: int) -> List[str]:
+    """Получение тегов проекта."""
+    async with dbinit() as connect:
+        tags_data = await connect.fetch("SELECT tag FROM projects_tags WHERE project_id = $1", int(project_id))
+    tags = [row["tag"] for row in tags_data]
+    logger.debug("Retrieved tags for project_id=%s, count=%s", project_id, len(tags))
+    return tags
+
+async def card_tags_get(card_id: int) -> List[str]:
+    """Получение тегов карточки."""
+    async with dbinit() as connect:
+        tags_data = await connect.fetch("SELECT tag FROM cards_tags WHERE card_id = $1", int(card_id))
+    tags = [row["tag"] for row in tags_data]
+    logger.debug("Retrieved tags for card_id=%s, count=%s", card_id, len(tags))
+    return tags
+
+__all__ = [
+    "dbinit", "get_pool", "close_pool",
+    "user_getinfo", "user_role",
+    "project_info", "project_list", "project_snapshot",
+    "collaborators_exist", "collaborators_getrole", "collaborator_role",
+    "boards_info",
+    "card_attachments", "cards_info", "cards_page",
+    "responsible_get",
+    "notification_create", "notifications_get", "notifications_page", "notifications_since", "notification_check",
+    "notifications_unread_count", "notifications_check_all",
+    "chat_member", "messages_since",
+    "can_edit", "resolve_project", "entity_version",
+    "project_tags_get", "card_tags_get"
+]
@@ -0,0 +1,349 @@
+import asyncio
+import time
+import logging
+from urllib.parse import parse_qs
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from flask import Flask
+from flask_jwt_extended import decode_token
+from werkzeug.exceptions import BadRequest, NotFound, Forbidden, Unauthorized
+from werkzeug.http import parse_etags
+from .classes import ApiResponse, make_etag
+from .connect import encode_cursor
+from .server import NOTIFICATION_CHANNEL, CHAT_CHANNEL, STREAM_QUEUE_SIZE, STREAM_HEARTBEAT
+from .serializer import dumps
+from .listener import get_listener
+from .hub import OVERFLOW, get_hub
+from .stream import SSE_HEADERS, RecentIds, sse_event, sse_comment
+from . import aconnect
+
+# Нативные асинхронные обработчики для ASGI-режима.
+# Остальные маршруты обслуживаются WSGI-приложением Flask через мост.
+logger = logging.getLogger(__name__)
+
+LONG_POLL_MAX_WAIT = 30.0
+
+class AsyncRequest:
+    """Разобранный HTTP-запрос ASGI."""
+    def __init__(self, scope: Dict[str, Any], app: Flask):
+        self.scope = scope
+        self.app = app
+        self.method = scope.get("method", "GET")
+        self.path = scope["path"]
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        self.query = {key: values[-1] for key, values in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+    @staticmethod
+    def convert(value: Optional[str], type: Callable = str, default: Any = None) -> Any:
+        """Приведение строкового значения к типу; при ошибке — значение по умолчанию."""
+        if value is None:
+            return default
+        try:
+            return type(value)
+        except (TypeError, ValueError):
+            return default
+
+    def arg(self, name: str, type: Callable = str, default: Any = None) -> Any:
+        """Параметр строки запроса с приведением типа, как request.args.get во Flask."""
+        return self.convert(self.query.get(name), type, default)
+
+    def matches_etag(self, etag: str) -> bool:
+        """Совпадение If-None-Match с ETag, как request.if_none_match.contains_weak во Flask."""
+        return parse_etags(self.headers.get("if-none-match")).contains_weak(etag)
+
+    def identity(self) -> str:
+        """Проверка access-токена из заголовка Authorization.
+
+        Для веб-сокетов, где браузер не может передать заголовок, токен берётся из параметра token.
+        """
+        header = self.headers.get("authorization", "")
+        if header.startswith("Bearer "):
+            token = header[len("Bearer "):]
+        elif self.scope["type"] == "websocket" and self.query.get("token"):
+            token = self.query["token"]
+        else:
+            raise Unauthorized("Missing Authorization Header")
+        try:
+            with self.app.app_context():
+                claims = decode_token(token)
+        except Exception as e:
+            raise Unauthorized(str(e))
+        if claims.get("type") != "access":
+            raise Unauthorized("Only access tokens are allowed")
+        return claims["sub"]
+
+async def notification_get(request: AsyncRequest) -> Tuple[dict, int]:
+    """Получение уведомлений с поддержкой долгого опроса.
+
+    since — id последнего известного уведомления, wait — сколько секунд ждать новых.
+    Ожидание идёт по подписке на NOTIFICATION_CHANNEL: база запрашивается заново только
+    после события для этого пользователя, а не по таймеру.
+    """
+    user_id = request.identity()
+    notification_id = request.arg("notification_id", int)
+    if notification_id is None and ("cursor" in request.query or "limit" in request.query):
+        notifications = await aconnect.notifications_page(user_id, request.arg("cursor"), request.arg("limit", int))
+        return ApiResponse.success(notifications, request.method)
+
+    since = request.arg("since", int)
+    wait = min(max(request.arg("wait", float, 0.0), 0.0), LONG_POLL_MAX_WAIT)
+    if since is None or wait <= 0:
+        return ApiResponse.success(await aconnect.notifications_get(user_id, notification_id), request.method)
+
+    loop = asyncio.get_running_loop()
+    arrived = asyncio.Event()
+    # Подписка до первого запроса: уведомление между запросом и ожиданием не потеряется
+    subscription = get_listener().subscribe(NOTIFICATION_CHANNEL, user_id, lambda data: loop.call_soon_threadsafe(arrived.set))
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            arrived.clear()
+            notifications = await aconnect.notifications_get(user_id, notification_id)
+            remaining = deadline - time.monotonic()
+            if any(notification["id"] > since for notification in notifications) or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+    finally:
+        subscription.close()
+    return ApiResponse.success(notifications, request.method)
+
+async def notification_unread_get(request: AsyncRequest) -> Tuple[dict, int]:
+    """Получение количества непрочитанных уведомлений."""
+    user_id = request.identity()
+    return ApiResponse.success({"unread": await aconnect.notifications_unread_count(user_id)}, request.method)
+
+async def project_snapshot_get(request: AsyncRequest) -> tuple:
+    """Получение снимка досок, карточек, тегов и ответственных проекта."""
+    user_id = request.identity()
+    project_id = request.arg("project_id", int)
+    if not project_id:
+        raise BadRequest("Missing required query parameter: project_id")
+    if not await aconnect.can_edit(user_id, project_id=project_id):
+        raise Forbidden("You are not authorized to view boards")
+    version = await aconnect.entity_version(project_id=project_id)
+    if version is None:
+        return ApiResponse.success(await aconnect.project_snapshot(project_id), request.method)
+    etag = make_etag("snapshot", project_id, version)
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache"}
+    if request.matches_etag(etag):
+        return None, 304, headers
+    return (*ApiResponse.success(await aconnect.project_snapshot(project_id), request.method), headers)
+
+# Обработчик возвращает (тело, код) или (тело, код, заголовки)
+ROUTES: Dict[Tuple[str, str], Callable[[AsyncRequest], Awaitable[tuple]]] = {
+    ("GET", "/api/v1/notification"): notification_get,
+    ("GET", "/api/v1/notification/unread"): notification_unread_get,
+    ("GET", "/api/v1/projects/snapshot"): project_snapshot_get,
+}
+
+async def id_stream(
+    request: AsyncRequest,
+    receive: Callable,
+    send: Callable,
+    headers: Dict[str, str],
+    channel: str,
+    key: Any,
+    event: str,
+    since: Callable[[int], Awaitable[List[Dict[str, Any]]]],
+    fetch: Callable[[int], Awaitable[Optional[Dict[str, Any]]]]
+) -> None:
+    """Поток Server-Sent Events без занятия потока WSGI; события отдаются в порядке фиксации, повторы id отсеиваются.
+
+    События приходят из общего слушателя процесса и передаются в цикл событий через call_soon_threadsafe.
+    since(id) — пропущенные события после id, fetch(id) — полное событие для усечённого (partial).
+    """
+    last_id = request.arg("since", int)
+    if "last-event-id" in request.headers:
+        last_id = AsyncRequest.convert(request.headers["last-event-id"], int, last_id)
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    def offer(data: Dict[str, Any]) -> None:
+        if events.full():
+            events.get_nowait()
+        events.put_nowait(data)
+
+    subscription = get_listener().subscribe(channel, key, lambda data: loop.call_soon_threadsafe(offer, data))
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        backlog = await since(last_id) if last_id is not None else []
+        raw_headers = [(b"content-type", b"text/event-stream; charset=utf-8")]
+        raw_headers += [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in {**SSE_HEADERS, **headers}.items()]
+        await send({"type": "http.response.start", "status": 200, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+        sent = RecentIds()
+        for item in backlog:
+            sent.add(item["id"])
+            await send({"type": "http.response.body", "body": sse_event(item, item["id"], event).encode(), "more_body": True})
+        while not disconnected.is_set():
+            try:
+                item = await asyncio.wait_for(events.get(), STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await send({"type": "http.response.body", "body": sse_comment().encode(), "more_body": True})
+                continue
+            if not sent.add(item["id"]):
+                continue
+            if item.get("partial"):
+                item = await fetch(item["id"])
+                if item is None:
+                    continue
+            await send({"type": "http.response.body", "body": sse_event(item, item["id"], event).encode(), "more_body": True})
+    except OSError:
+        pass
+    finally:
+        subscription.close()
+        watcher.cancel()
+        logger.debug("Stream closed: event=%s, key=%s", event, key)
+
+async def notification_stream(request: AsyncRequest, receive: Callable, send: Callable, headers: Dict[str, str]) -> None:
+    """Поток уведомлений пользователя."""
+    try:
+        user_id = request.identity()
+    except Unauthorized as e:
+        await send_json(send, *ApiResponse.error(401, e.description, request.method), headers)
+        return
+
+    async def fetch(notification_id: int) -> Optional[Dict[str, Any]]:
+        found = await aconnect.notifications_get(user_id, notification_id, limit=1)
+        return found[0] if found else None
+
+    await id_stream(
+        request, receive, send, headers, NOTIFICATION_CHANNEL, user_id, "notification",
+        lambda after_id: aconnect.notifications_since(user_id, after_id), fetch
+    )
+
+async def chat_stream(request: AsyncRequest, receive: Callable, send: Callable, headers: Dict[str, str]) -> None:
+    """Поток сообщений чата; доступен коллабораторам проекта чата."""
+    try:
+        user_id = request.identity()
+        chat_id = request.arg("chat_id", int)
+        if not chat_id:
+            raise BadRequest("Missing required query parameter: chat_id")
+        if not await aconnect.chat_member(user_id, chat_id):
+            raise Forbidden("You are not a member of this chat")
+    except (BadRequest, Unauthorized, Forbidden, NotFound) as e:
+        logger.error(f"GET error: {str(e)}")
+        await send_json(send, *ApiResponse.error(e.code, e.description, request.method), headers)
+        return
+
+    async def fetch(message_id: int) -> Optional[Dict[str, Any]]:
+        found = await aconnect.messages_since(chat_id, message_id - 1, limit=1)
+        return found[0] if found and found[0]["id"] == message_id else None
+
+    await id_stream(
+        request, receive, send, headers, CHAT_CHANNEL, chat_id, "message",
+        lambda after_id: aconnect.messages_since(chat_id, after_id), fetch
+    )
+
+async def project_socket(request: AsyncRequest, receive: Callable, send: Callable) -> None:
+    """WebSocket проекта: изменения карточек и досок, записанные в ленту проекта.
+
+    Права проверяются один раз при подключении. Первое сообщение — hello с курсором ленты;
+    далее приходят события changes. Если клиент не успевает читать, сокет закрывается
+    с кодом 1013 и клиент догоняет состояние через /api/v1/projects/sync.
+    """
+    if (await receive())["type"] != "websocket.connect":
+        return
+    try:
+        user_id = request.identity()
+        project_id = request.arg("project_id", int)
+        if not project_id:
+            raise BadRequest("Missing required query parameter: project_id")
+        if not await aconnect.can_edit(user_id, project_id=project_id):
+            raise Forbidden("You are not authorized to view boards")
+        version = await aconnect.entity_version(project_id=project_id)
+        if version is None:
+            raise NotFound("Project not found")
+    except (BadRequest, Unauthorized, Forbidden, NotFound) as e:
+        logger.error(f"WebSocket error: {str(e)}")
+        await send({"type": "websocket.close", "code": 4000 + e.code, "reason": e.description})
+        return
+
+    hub = get_hub()
+    queue = hub.join(project_id)
+    reader = None
+    try:
+        await send({"type": "websocket.accept"})
+        hello = {"type": "hello", "project_id": project_id, "cursor": encode_cursor([version])}
+        await send({"type": "websocket.send", "text": dumps(hello).decode()})
+
+        async def read() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") == "ping" and not queue.full():
+                    queue.put_nowait("pong")
+
+        reader = asyncio.create_task(read())
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            message = getter.result()
+            if message is OVERFLOW:
+                await send({"type": "websocket.close", "code": 1013, "reason": "Client is too slow, resync required"})
+                break
+            await send({"type": "websocket.send", "text": message})
+    except OSError:
+        pass
+    finally:
+        hub.leave(project_id, queue)
+        if reader is not None:
+            reader.cancel()
+        logger.debug("Project socket closed: project_id=%s, user_id=%s", project_id, user_id)
+
+SOCKETS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "/api/v1/projects/ws": project_socket,
+}
+
+STREAMS: Dict[Tuple[str, str], Callable[..., Awaitable[None]]] = {
+    ("GET", "/api/v1/notification/stream"): notification_stream,
+    ("GET", "/api/v1/chats/stream"): chat_stream,
+}
+
+async def dispatch(handler: Callable, request: AsyncRequest) -> tuple:
+    """Вызов обработчика с преобразованием ошибок в ответы API."""
+    try:
+        return await handler(request)
+    except BadRequest as e:
+        logger.error(f"{request.method} error: {str(e)}")
+        return ApiResponse.error(400, e.description, request.method)
+    except Unauthorized as e:
+        logger.error(f"{request.method} error: {str(e)}")
+        return ApiResponse.error(401, e.description, request.method)
+    except Forbidden as e:
+        logger.error(f"{request.method} error: {str(e)}")
+        return ApiResponse.error(403, e.description, request.method)
+    except NotFound as e:
+        logger.error(f"{request.method} error: {str(e)}")
+        return ApiResponse.error(404, e.description, request.method)
+    except Exception as e:
+        logger.error(f"{request.method} error: {str(e)}")
+        return ApiResponse.error(500, str(e), request.method)
+
+async def send_json(send: Callable, body: Optional[dict], status: int, headers: Optional[Dict[str, str]] = None) -> None:
+    """Отправка JSON-ответа по протоколу ASGI; body None — ответ без тела (304)."""
+    if body is None:
+        payload = b""
+        raw_headers = []
+    else:
+        payload = dumps(body)
+        raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    raw_headers += [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": payload})
+
+__all__ = ["AsyncRequest", "ROUTES", "STREAMS", "SOCKETS", "dispatch", "send_json"]
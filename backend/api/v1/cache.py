@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+from .server import *
+
+MISSING = object()
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с ограничением времени жизни записей."""
+    def __init__(self, maxsize: int, ttl: float):
+        if maxsize < 1 or ttl <= 0:
+            raise ValueError("Cache maxsize and ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Получение значения; просроченная запись считается промахом."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохранение значения с вытеснением самой давней записи."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаление записи по ключу."""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Удаление всех записей, ключи которых удовлетворяют условию."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Полная очистка кэша."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий и промахов."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+# Роль пользователя в проекте: (project_id, user_id) -> role или None
+permission_cache = TTLCache(PERMISSION_CACHE_SIZE, PERMISSION_CACHE_TTL)
+# Принадлежность: ("card", id) -> board_id, ("board", id) -> project_id
+resolution_cache = TTLCache(RESOLUTION_CACHE_SIZE, RESOLUTION_CACHE_TTL)
+# Пользователь: user_id -> (version, role, email) или None для удалённого
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+def cache_stats() -> Dict[str, Any]:
+    """Статистика всех кэшей процесса."""
+    return {
+        "permissions": permission_cache.stats(),
+        "resolution": resolution_cache.stats(),
+        "users": user_cache.stats()
+    }
+
+__all__ = ["MISSING", "TTLCache", "permission_cache", "resolution_cache", "user_cache", "cache_stats"]
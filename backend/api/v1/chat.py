@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+from werkzeug.exceptions import ServiceUnavailable
+from .server import *
+from .connect import messages_insert
+
+logger = logging.getLogger(__name__)
+
+class MessageBatcher:
+    """Групповая запись сообщений чатов.
+
+    Запросы ставят сообщения в очередь и ждут результата; поток записи забирает всё
+    накопившееся (до batch_size), при неполном пакете ждёт ещё не дольше interval и
+    записывает пакет одним INSERT и одной фиксацией. Под нагрузкой стоимость фиксации
+    делится между всеми сообщениями пакета. Если пакет отклонён, сообщения записываются
+    по одному, и ошибку получает только запрос с отклонённым сообщением.
+    """
+    def __init__(self, batch_size: int = CHAT_BATCH_SIZE, interval: float = CHAT_BATCH_INTERVAL, queue_size: int = CHAT_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._counters = {"messages": 0, "batches": 0, "errors": 0, "retried": 0, "rejected": 0, "max_batch": 0}
+
+    def submit(self, chat_id: int, user_id: int, text: str, timeout: float = CHAT_SUBMIT_TIMEOUT) -> Dict[str, Any]:
+        """Запись сообщения в составе ближайшего пакета; возвращает сохранённое сообщение."""
+        self._start()
+        future: Future = Future()
+        try:
+            self.pending.put_nowait((int(chat_id), int(user_id), text, future))
+        except queue.Full:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise ServiceUnavailable("Chat is overloaded, retry later")
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise ServiceUnavailable("Message was not confirmed in time")
+
+    def close(self) -> None:
+        """Остановка потока записи после уже поставленных в очередь сообщений."""
+        if self._thread is not None and self._thread.is_alive():
+            self.pending.put(None)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = self._counters["batches"]
+            return {
+                "queued": self.pending.qsize(),
+                "avg_batch": round(self._counters["messages"] / batches, 2) if batches else 0,
+                **self._counters
+            }
+
+    def _start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[int, int, str, Future]]:
+        """Следующий пакет: первое сообщение ждём без ограничения, остальные — до interval."""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                item = self.pending.get() if not batch else self.pending.get_nowait()
+            except queue.Empty:
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopping:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                saved = messages_insert([(chat_id, user_id, text) for chat_id, user_id, text, _ in batch])
+            except Exception as e:
+                logger.error(f"Chat batch error: size={len(batch)}: {str(e)}")
+                self._retry(batch, e)
+                continue
+            with self._lock:
+                self._counters["messages"] += len(batch)
+                self._counters["batches"] += 1
+                self._counters["max_batch"] = max(self._counters["max_batch"], len(batch))
+            for (*_, future), message in zip(batch, saved):
+                future.set_result(message)
+
+    def _retry(self, batch: List[Tuple[int, int, str, Future]], error: Exception) -> None:
+        """Запись отклонённого пакета по одному сообщению."""
+        if len(batch) == 1:
+            with self._lock:
+                self._counters["errors"] += 1
+            batch[0][3].set_exception(error)
+            return
+        with self._lock:
+            self._counters["retried"] += 1
+        for chat_id, user_id, text, future in batch:
+            try:
+                saved = messages_insert([(chat_id, user_id, text)])
+            except Exception as e:
+                logger.error(f"Chat message error: chat_id={chat_id}, user_id={user_id}: {str(e)}")
+                with self._lock:
+                    self._counters["errors"] += 1
+                future.set_exception(e)
+                continue
+            with self._lock:
+                self._counters["messages"] += 1
+                self._counters["batches"] += 1
+            future.set_result(saved[0])
+
+_batcher: Optional[MessageBatcher] = None
+_batcher_pid: Optional[int] = None
+_batcher_lock = threading.Lock()
+_batcher_options: Dict[str, Any] = {}
+
+def get_batcher() -> MessageBatcher:
+    """Пакетная запись сообщений процесса; после fork создаётся заново."""
+    global _batcher, _batcher_pid
+    if _batcher is None or _batcher_pid != os.getpid():
+        with _batcher_lock:
+            if _batcher is None or _batcher_pid != os.getpid():
+                _batcher = MessageBatcher(**_batcher_options)
+                _batcher_pid = os.getpid()
+    return _batcher
+
+def configure_batcher(**options) -> None:
+    """Переопределение параметров пакетной записи; текущая останавливается и создаётся заново при следующем сообщении."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is not None and _batcher_pid == os.getpid():
+            _batcher.close()
+        _batcher = None
+        _batcher_options.clear()
+        _batcher_options.update(options)
+
+def chat_stats() -> Dict[str, Any]:
+    """Статистика пакетной записи, если она уже создана в этом процессе."""
+    return _batcher.stats() if _batcher is not None and _batcher_pid == os.getpid() else {}
+
+__all__ = ["MessageBatcher", "get_batcher", "configure_batcher", "chat_stats"]
@@ -1,9 +1,10 @@
+import hashlib
 from flask_restful import Resource
-from flask import request
+from flask import request, make_response
 from werkzeug.exceptions import BadRequest
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, Any
-from werkzeug.security import generate_password_hash
+from typing import Optional, Any, Callable
+from .hashing import hash_password
 
 class ApiResponse:
     """Класс для формирования стандартизированных HTTP-ответов API."""
@@ -137,6 +138,24 @@ class AuthResponse(ApiResponse):
         }
         return response, 200
 
+def make_etag(*parts: Any) -> str:
+    """ETag представления по версии сущности и параметрам запроса."""
+    return hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()[:24]
+
+def conditional(etag: Optional[str], build: Callable[[], tuple]) -> Any:
+    """Условный GET: 304 без тела при совпадении If-None-Match, иначе ответ build() с заголовком ETag."""
+    if etag is None:
+        return build()
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    body, code = build()
+    if code != 200:
+        return body, code
+    return body, code, {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache"}
+
 class NoneResource(Resource):
     """Базовый класс для ресурсов API с валидацией запросов."""
     def validate(self, required: list[str], optional: list[str] = None) -> dict:
@@ -163,10 +182,10 @@ class uValidate(BaseModel):
 
     @field_validator("password")
     def valid_password(cls, password: str) -> str:
-        """Проверяет длину пароля и хеширует его."""
+        """Проверяет длину пароля и хеширует его в пуле хеширования."""
         if len(password) < 8 or len(password) > 64:
             raise BadRequest("Password must be between 8 and 64 characters")
-        return generate_password_hash(password)
+        return hash_password(password)
 
 class pValidate(BaseModel):
     """Валидация данных проекта."""
@@ -223,12 +242,40 @@ class cValidate(BaseModel):
             raise BadRequest("About text must not exceed 2048 characters")
         return about
 
+class cEditValidate(BaseModel):
+    """Валидация изменяемых полей карточки."""
+    title: Optional[str] = None
+    about: Optional[str] = None
+    brief_about: Optional[str] = None
+    sell_by: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[int] = None
+    external_resource: Optional[str] = None
+    board_id: Optional[int] = None
+
+    @field_validator("title")
+    def valid_title(cls, title: Optional[str]) -> Optional[str]:
+        """Проверяет длину заголовка карточки."""
+        if title is not None and (len(title) < 3 or len(title) > 16):
+            raise BadRequest("Title must be between 3 and 16 characters")
+        return title
+
+    @field_validator("about")
+    def valid_about(cls, about: Optional[str]) -> Optional[str]:
+        """Проверяет длину описания карточки."""
+        if about is not None and len(about) > 2048:
+            raise BadRequest("About text must not exceed 2048 characters")
+        return about
+
 __all__ = [
+    "make_etag",
+    "conditional",
     "NoneResource", 
     "ApiResponse", 
     "AuthResponse",
     "uValidate",
     "pValidate",
     "bValidate",
-    "cValidate"
+    "cValidate",
+    "cEditValidate"
 ]
\ No newline at end of file
@@ -1,34 +1,239 @@
 import psycopg2
+import psycopg2.extras
+import base64
+import json
 from contextlib import contextmanager
 from werkzeug.exceptions import NotFound, BadRequest, Forbidden, Conflict
-from werkzeug.security import check_password_hash
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from .server import *
+from .pool import get_pool, pool_stats
+from .unit import current_unit
+from .statements import CARD_COLUMNS, PROJECT_COLUMNS, BOARD_COLUMNS, NOTIFICATION_COLUMNS, COMMENT_COLUMNS, FILE_COLUMNS, FILE_PATHS, columns, execute_prepared
+from .listener import event_payload, publish
+from .serializer import default
+from .cache import MISSING, permission_cache, resolution_cache, user_cache, cache_stats
+from .hashing import get_hasher
 import logging
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 @contextmanager
 def dbinit():
-    """Контекстный менеджер для подключения к базе данных."""
+    """Контекстный менеджер для получения соединения с базой данных.
+
+    Внутри HTTP-запроса все вызовы разделяют одно соединение и одну транзакцию
+    единицы работы, вне запроса соединение берётся из пула на время вызова.
+    """
+    unit = current_unit()
+    if unit is not None:
+        try:
+            yield unit.acquire()
+        except psycopg2.Error as e:
+            logger.error(f"Database error in unit of work: {str(e)}")
+            unit.rollback()
+            raise
+        return
+
+    pool = None
     connect = None
     try:
-        connect = psycopg2.connect(
-            host="localhost",
-            user="postgres",
-            port=PORT,
-            password=PASSWORD,
-            database="nonefolio"
-        )
+        pool = get_pool()
+        connect = pool.getconn()
         yield connect
     except psycopg2.Error as e:
         logger.error(f"Database connection failed: {str(e)}")
         raise
     finally:
         if connect is not None:
-            connect.close()
+            pool.putconn(connect)
+
+def invalidate_cache(cache, key) -> None:
+    """Сброс записи кэша сейчас и повторно после завершения транзакции запроса."""
+    cache.invalidate(key)
+    unit = current_unit()
+    if unit is not None:
+        unit.after_finish(lambda: cache.invalidate(key))
+
+def encode_cursor(values: List[Any]) -> str:
+    """Кодирование ключа последней строки страницы в непрозрачный курсор."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Разбор курсора, выданного encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise BadRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise BadRequest("Invalid cursor")
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        raise BadRequest("Invalid cursor")
+    return values
+
+def page_limit(limit: Optional[int]) -> int:
+    """Размер страницы с ограничением сверху."""
+    if limit is None:
+        return PAGE_SIZE
+    if limit < 1:
+        raise BadRequest("Limit must be a positive integer")
+    return min(limit, PAGE_SIZE_MAX)
+
+def bump_versions(cursor, board_ids: Optional[List[int]] = None, project_ids: Optional[List[int]] = None) -> None:
+    """Увеличение версий досок и их проектов в текущей транзакции.
+
+    Версия доски меняется вместе с её карточками, версия проекта — вместе с любыми
+    его досками, карточками и участниками; по версиям строятся ETag.
+    """
+    projects = {int(project_id) for project_id in project_ids or [] if project_id is not None}
+    boards = sorted({int(board_id) for board_id in board_ids or [] if board_id is not None})
+    if boards:
+        cursor.execute("UPDATE boards SET version = version + 1 WHERE id = ANY(%s) RETURNING project_id", (boards,))
+        projects.update(row[0] for row in cursor.fetchall())
+    if projects:
+        cursor.execute(
+            "UPDATE projects SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)",
+            (sorted(projects),)
+        )
+
+def bump_card_versions(cursor, card_ids: List[int]) -> List[int]:
+    """Увеличение версий карточек, их досок и проектов после изменения связанных данных; возвращает доски карточек."""
+    cursor.execute("UPDATE cards SET version = version + 1 WHERE id = ANY(%s) RETURNING board_id", (sorted({int(card_id) for card_id in card_ids}),))
+    board_ids = [row[0] for row in cursor.fetchall()]
+    bump_versions(cursor, board_ids=board_ids)
+    return board_ids
+
+def record_changes(cursor, changes: List[Dict[str, Any]]) -> None:
+    """Запись изменений в ленту проекта в текущей транзакции.
+
+    Каждое изменение — словарь с ключами entity, entity_id, action, data и board_id или project_id.
+    Вызывается после bump_versions: изменение получает новую версию проекта, и поскольку
+    строка проекта заблокирована до конца транзакции, версии в ленте растут в порядке фиксации.
+    Изменения каждого проекта публикуются одним событием в канал PROJECT_CHANNEL.
+    """
+    if not changes:
+        return
+    recorded = psycopg2.extras.execute_values(
+        cursor,
+        """
+        INSERT INTO project_changes (project_id, version, entity, entity_id, action, data)
+        SELECT p.id, p.version, v.entity, v.entity_id, v.action, v.data
+        FROM (VALUES %s) AS v(ord, board_id, project_id, entity, entity_id, action, data)
+        LEFT JOIN boards b ON b.id = v.board_id
+        JOIN projects p ON p.id = COALESCE(v.project_id, b.project_id)
+        ORDER BY v.ord
+        RETURNING project_id, version, id, entity, entity_id, action, data
+        """,
+        [(
+            number, change.get("board_id"), change.get("project_id"), change["entity"], change["entity_id"],
+            change["action"], json.dumps(change.get("data"), default=default) if change.get("data") is not None else None
+        ) for number, change in enumerate(changes)],
+        template="(%s::integer, %s::integer, %s::integer, %s::varchar, %s::integer, %s::varchar, %s::jsonb)",
+        page_size=len(changes),
+        fetch=True
+    )
+    events: Dict[int, Dict[str, Any]] = {}
+    for project_id, version, change_id, entity, entity_id, action, data in sorted(recorded, key=lambda row: row[2]):
+        event = events.setdefault(project_id, {"version": version, "changes": []})
+        event["changes"].append({"id": change_id, "version": version, "entity": entity, "entity_id": entity_id, "action": action, "data": data})
+    for project_id, event in events.items():
+        publish(cursor, PROJECT_CHANNEL, project_id, event)
+
+def card_change_data(card: Dict[str, Any]) -> Dict[str, Any]:
+    """Карточка в ленте изменений: только столбцы CARD_COLUMNS."""
+    return {name: card[name] for name in CARD_COLUMNS if name in card}
+
+def project_tags_changed(cursor, project_id: int) -> List[Dict[str, Any]]:
+    """Версия проекта и запись в ленту после изменения его тегов; возвращает текущие теги."""
+    cursor.execute("SELECT id, tag, project_id FROM projects_tags WHERE project_id = %s ORDER BY tag", (project_id,))
+    column_names = [desc[0] for desc in cursor.description]
+    tags_list = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    bump_versions(cursor, project_ids=[project_id])
+    record_changes(cursor, [{
+        "project_id": project_id, "entity": "project_tags", "entity_id": project_id, "action": "update",
+        "data": {"tags": [tag["tag"] for tag in tags_list]}
+    }])
+    return tags_list
+
+def card_tags_changed(cursor, card_id: int) -> List[Dict[str, Any]]:
+    """Версии карточки, доски и проекта и запись в ленту после изменения тегов карточки; возвращает текущие теги."""
+    cursor.execute("SELECT id, tag, card_id FROM cards_tags WHERE card_id = %s ORDER BY tag", (card_id,))
+    column_names = [desc[0] for desc in cursor.description]
+    tags_list = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    for board_id in bump_card_versions(cursor, [card_id]):
+        record_changes(cursor, [{
+            "board_id": board_id, "entity": "card_tags", "entity_id": card_id, "action": "update",
+            "data": {"tags": [tag["tag"] for tag in tags_list]}
+        }])
+    return tags_list
+
+def project_changes(project_id: int, cursor: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Изменения проекта после курсора синхронизации.
+
+    Страница заканчивается на границе версии, поэтому изменения одной транзакции
+    никогда не делятся между страницами. Изменения идемпотентны: полученные повторно
+    (например, уже попавшие в снимок) можно применить ещё раз.
+    """
+    after = int(decode_cursor(cursor, 1)[0])
+    limit = min(limit, SYNC_PAGE_SIZE) if limit is not None and limit > 0 else SYNC_PAGE_SIZE
+    with dbinit() as connect:
+        db_cursor = connect.cursor()
+        db_cursor.execute("""
+            WITH bound AS (
+                SELECT version FROM project_changes
+                WHERE project_id = %(project_id)s AND version > %(after)s
+                ORDER BY version, id
+                OFFSET %(offset)s LIMIT 1
+            )
+            SELECT id, version, entity, entity_id, action, data, created_at
+            FROM project_changes
+            WHERE project_id = %(project_id)s AND version > %(after)s
+              AND (NOT EXISTS (SELECT 1 FROM bound) OR version < (SELECT version FROM bound))
+            ORDER BY version, id
+            """, {"project_id": project_id, "after": after, "offset": limit})
+        column_names = [desc[0] for desc in db_cursor.description]
+        changes = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+        has_more = False
+        if not changes:
+            db_cursor.execute("""
+                SELECT id, version, entity, entity_id, action, data, created_at
+                FROM project_changes
+                WHERE project_id = %s AND version = (
+                    SELECT min(version) FROM project_changes WHERE project_id = %s AND version > %s
+                )
+                ORDER BY id
+                """, (project_id, project_id, after))
+            changes = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+        if changes:
+            db_cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM project_changes WHERE project_id = %s AND version > %s)",
+                (project_id, changes[-1]["version"])
+            )
+            has_more = db_cursor.fetchone()[0]
+
+    for change in changes:
+        if change.get("created_at"):
+            change["created_at"] = change["created_at"].isoformat()
+    next_version = changes[-1]["version"] if changes else after
+    logger.debug("Project changes: project_id=%s, after=%s, count=%s", project_id, after, len(changes))
+    return {"changes": changes, "cursor": encode_cursor([next_version]), "has_more": has_more}
+
+def entity_version(project_id: Optional[int] = None, board_id: Optional[int] = None, card_id: Optional[int] = None) -> Optional[int]:
+    """Текущая версия проекта, доски или карточки для ETag; None, если строки нет."""
+    if card_id is not None:
+        name, key = "card_version", card_id
+    elif board_id is not None:
+        name, key = "board_version", board_id
+    elif project_id is not None:
+        name, key = "project_version", project_id
+    else:
+        raise BadRequest("Must specify project_id, board_id, or card_id")
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        execute_prepared(cursor, name, (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
 def user_registration(email: str, password: str) -> int:
     """Регистрация нового пользователя."""
@@ -47,7 +252,11 @@ def user_registration(email: str, password: str) -> int:
             raise Conflict("User with this email already exists")
 
 def user_login(email: str, password: str) -> Dict[str, Any]:
-    """Аутентификация пользователя."""
+    """Аутентификация пользователя.
+
+    Пароль проверяется в пуле хеширования после возврата соединения; хеш, полученный
+    прежним методом или стоимостью, пересчитывается в фоне.
+    """
     with dbinit() as connect:
         cursor = connect.cursor()
         cursor.execute("SELECT id, email, password, role, created_at, version FROM users WHERE email = %s AND deleted = FALSE", (email,))
@@ -57,13 +266,34 @@ def user_login(email: str, password: str) -> Dict[str, Any]:
         
         column_names = [desc[0] for desc in cursor.description]
         user_dict = dict(zip(column_names, user_data))
-        if not check_password_hash(user_dict["password"], password):
-            raise Forbidden("Incorrect password")
 
-        user_dict["created_at"] = user_dict["created_at"].isoformat() if user_dict.get("created_at") else None
-        del user_dict["password"]
-        logger.info(f"User logged in: email={email}")
-        return user_dict
+    hasher = get_hasher()
+    hashed = user_dict.pop("password")
+    if not hasher.verify(hashed, password):
+        raise Forbidden("Incorrect password")
+    if hasher.needs_rehash(hashed):
+        uid = user_dict["id"]
+        hasher.rehash(password, lambda new_hash: user_rehash(uid, hashed, new_hash))
+
+    user_dict["created_at"] = user_dict["created_at"].isoformat() if user_dict.get("created_at") else None
+    logger.info(f"User logged in: email={email}")
+    return user_dict
+
+def user_rehash(uid: int, old_hash: str, new_hash: str) -> bool:
+    """Замена хеша пароля пересчитанным без смены версии пользователя.
+
+    Хеш заменяется, только если пароль не сменили с момента проверки.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            "UPDATE users SET password = %s WHERE id = %s AND password = %s AND deleted = FALSE",
+            (new_hash, uid, old_hash)
+        )
+        connect.commit()
+        if cursor.rowcount:
+            logger.info(f"Rehashed password: id={uid}")
+        return bool(cursor.rowcount)
     
 def user_getinfo(uid: Optional[int] = None, email: Optional[str] = None, guest: bool = True) -> Dict[str, Any]:
     """Получение информации о пользователе."""
@@ -89,7 +319,7 @@ def user_getinfo(uid: Optional[int] = None, email: Optional[str] = None, guest:
         column_names = [desc[0] for desc in cursor.description]
         user_dict = dict(zip(column_names, user_data))
         user_dict["created_at"] = user_dict["created_at"].isoformat() if user_dict.get("created_at") else None
-        logger.info(f"Retrieved user info: id={user_dict['id']}")
+        logger.debug("Retrieved user info: id=%s", user_dict['id'])
         return user_dict
 
 def user_edit(
@@ -98,7 +328,11 @@ def user_edit(
     role: Optional[int] = None,
     nickname: Optional[str] = None
 ) -> Dict[str, Any]:
-    """Редактирование данных пользователя."""
+    """Редактирование данных пользователя.
+
+    Версия пользователя растёт только при смене пароля или роли: выданные ранее токены
+    обновления отзываются, а смена никнейма сессий не затрагивает.
+    """
     updates = []
     params = []
     
@@ -115,7 +349,8 @@ def user_edit(
     if not updates:
         raise BadRequest("No fields to update provided")
     
-    updates.append("version = version + 1")
+    if password is not None or role is not None:
+        updates.append("version = version + 1")
     query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s AND deleted = FALSE RETURNING id, email, role, nickname, created_at, version"
     params.append(uid)
     
@@ -125,8 +360,12 @@ def user_edit(
         user_data = cursor.fetchone()
         if not user_data:
             raise NotFound("User not found")
+        if nickname is not None:
+            cursor.execute("SELECT project_id FROM collaborators WHERE user_id = %s", (uid,))
+            bump_versions(cursor, project_ids=[row[0] for row in cursor.fetchall()])
         
         connect.commit()
+        invalidate_cache(user_cache, int(uid))
         column_names = [desc[0] for desc in cursor.description]
         user_dict = dict(zip(column_names, user_data))
         user_dict["created_at"] = user_dict["created_at"].isoformat() if user_dict.get("created_at") else None
@@ -149,8 +388,22 @@ def user_delete(uid: int) -> None:
         if cursor.rowcount == 0:
             raise NotFound("User not found")
         connect.commit()
+        invalidate_cache(user_cache, int(uid))
         logger.info(f"Deleted user: id={uid}")
 
+def user_claims(uid: int) -> Optional[Tuple[int, int, str]]:
+    """Версия, роль и email пользователя через кэш; None, если пользователь удалён."""
+    claims = user_cache.get(int(uid))
+    if claims is not MISSING:
+        return claims
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        execute_prepared(cursor, "user_claims", (int(uid),))
+        row = cursor.fetchone()
+        claims = tuple(row) if row else None
+        user_cache.set(int(uid), claims)
+        return claims
+
 def project_create(title: str, description: str, author: int) -> Dict[str, Any]:
     """Создание нового проекта с дефолтными досками."""
     default_boards = ["Идея", "Проработка", "Реализация", "Готово"]
@@ -178,7 +431,7 @@ def project_create(title: str, description: str, author: int) -> Dict[str, Any]:
                 column_names = [desc[0] for desc in cursor.description]
                 boards_array.append(dict(zip(column_names, board)))
             
-            cursor.execute("SELECT * FROM projects WHERE id = %s", (project_id,))
+            cursor.execute(f"SELECT {columns(PROJECT_COLUMNS)} FROM projects WHERE id = %s", (project_id,))
             project_data = cursor.fetchone()
             column_names = [desc[0] for desc in cursor.description]
             project_dict = dict(zip(column_names, project_data))
@@ -188,6 +441,7 @@ def project_create(title: str, description: str, author: int) -> Dict[str, Any]:
             project_dict["boards"] = boards_array
             
             connect.commit()
+            invalidate_cache(permission_cache, (int(project_id), int(author)))
             logger.info(f"Created project: id={project_id}, title={title}")
             return project_dict
         except Exception as e:
@@ -220,39 +474,79 @@ def project_info(project_id: Optional[int] = None, title: Optional[str] = None,
                 raise NotFound("Project not found")
             return format_project_data(connect, project_data)
     else:
-        with dbinit() as connect:
-            cursor = connect.cursor()
-            if not author:
-                raise BadRequest("No search criteria provided")
-            
+        if not author:
+            raise BadRequest("No search criteria provided")
+        return project_list(author)
+
+def project_list(author: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Получение проектов пользователя с участниками и досками за три запроса."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute("""
+            SELECT p.id, p.title, p.description, p.created_at, p.updated_at, c.role
+            FROM projects p
+            JOIN collaborators c ON p.id = c.project_id
+            WHERE c.user_id = %s
+            ORDER BY p.created_at DESC
+            """, (author,))
+        projects_data = cursor.fetchall()
+        project_ids = [project[0] for project in projects_data]
+
+        users_by_project = {project_id: [] for project_id in project_ids}
+        boards_by_project = {project_id: [] for project_id in project_ids}
+        if project_ids:
             cursor.execute("""
-                SELECT p.id, p.title, p.description, p.created_at, p.updated_at
-                FROM projects p
-                JOIN collaborators c ON p.id = c.project_id
-                WHERE c.user_id = %s AND c.role = 3
-                ORDER BY p.created_at DESC
-                """, (author,))
-            owner_projects = [format_project_data(connect, project) for project in cursor.fetchall()]
-            
+                SELECT c.project_id, c.user_id, c.role, c.added_at, u.email, u.nickname
+                FROM collaborators c
+                JOIN users u ON c.user_id = u.id
+                WHERE c.project_id = ANY(%s)
+                """, (project_ids,))
+            for project_id, *user in cursor.fetchall():
+                users_by_project[project_id].append(user)
+
             cursor.execute("""
-                SELECT p.id, p.title, p.description, p.created_at, p.updated_at
-                FROM projects p
-                JOIN collaborators c ON p.id = c.project_id
-                WHERE c.user_id = %s AND c.role < 3
-                ORDER BY p.created_at DESC
-                """, (author,))
-            member_projects = [format_project_data(connect, project) for project in cursor.fetchall()]
-            
-            logger.info(f"Retrieved projects for user_id={author}")
-            return {"owner_projects": owner_projects, "member_projects": member_projects}
+                SELECT project_id, id, title
+                FROM boards
+                WHERE project_id = ANY(%s)
+                ORDER BY id
+                """, (project_ids,))
+            for project_id, *board in cursor.fetchall():
+                boards_by_project[project_id].append(board)
+
+        owner_projects = []
+        member_projects = []
+        for *project, role in projects_data:
+            project_dict = build_project_data(project, users_by_project[project[0]], boards_by_project[project[0]])
+            (owner_projects if role == 3 else member_projects).append(project_dict)
+
+        logger.debug("Retrieved projects for user_id=%s, count=%s", author, len(projects_data))
+        return {"owner_projects": owner_projects, "member_projects": member_projects}
+
+def build_project_data(project_data: tuple | list, users_data: list, boards_data: list) -> Dict[str, Any]:
+    """Сборка словаря проекта из строк проекта, участников и досок."""
+    project_columns = ['id', 'title', 'description', 'created_at', 'updated_at']
+    project_dict = dict(zip(project_columns, project_data))
+    users_columns = ['user_id', 'role', 'added_at', 'email', 'nickname']
+    users_list = [dict(zip(users_columns, user)) for user in users_data]
+    boards_columns = ['id', 'title']
+    boards_list = [dict(zip(boards_columns, board)) for board in boards_data]
+
+    for field in ['created_at', 'updated_at']:
+        if project_dict.get(field):
+            project_dict[field] = project_dict[field].isoformat()
+    for user in users_list:
+        if user.get('added_at'):
+            user['added_at'] = user['added_at'].isoformat()
+
+    project_dict['users'] = users_list
+    project_dict['boards'] = boards_list
+    return project_dict
 
 def format_project_data(connection, project_data: tuple) -> Dict[str, Any]:
     """Форматирование данных проекта."""
     cursor = connection.cursor()
     project_id = project_data[0]
-    project_columns = ['id', 'title', 'description', 'created_at', 'updated_at']
-    project_dict = dict(zip(project_columns, project_data))
-    
+
     cursor.execute("""
         SELECT c.user_id, c.role, c.added_at, u.email, u.nickname
         FROM collaborators c
@@ -260,9 +554,7 @@ def format_project_data(connection, project_data: tuple) -> Dict[str, Any]:
         WHERE c.project_id = %s
         """, (project_id,))
     users_data = cursor.fetchall()
-    users_columns = ['user_id', 'role', 'added_at', 'email', 'nickname']
-    users_list = [dict(zip(users_columns, user)) for user in users_data]
-    
+
     cursor.execute("""
         SELECT id, title
         FROM boards
@@ -270,20 +562,72 @@ def format_project_data(connection, project_data: tuple) -> Dict[str, Any]:
         ORDER BY id
         """, (project_id,))
     boards_data = cursor.fetchall()
-    boards_columns = ['id', 'title']
-    boards_list = [dict(zip(boards_columns, board)) for board in boards_data]
-    
-    for field in ['created_at', 'updated_at']:
-        if project_dict.get(field):
-            project_dict[field] = project_dict[field].isoformat()
-    for user in users_list:
-        if user.get('added_at'):
-            user['added_at'] = user['added_at'].isoformat()
-    
-    project_dict['users'] = users_list
-    project_dict['boards'] = boards_list
-    logger.info(f"Formatted project data: id={project_id}")
-    return project_dict
+
+    logger.debug("Formatted project data: id=%s", project_id)
+    return build_project_data(project_data, users_data, boards_data)
+
+def project_snapshot(project_id: int) -> Dict[str, Any]:
+    """Снимок проекта: доски с карточками, тегами, ответственными и вложениями.
+
+    cursor — курсор ленты изменений; версия читается до данных, так что изменения,
+    успевшие попасть в снимок, придут через project_changes повторно.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute("SELECT version FROM projects WHERE id = %s", (project_id,))
+        version = cursor.fetchone()
+        if not version:
+            raise NotFound("Project not found")
+
+        cursor.execute(f"SELECT {columns(BOARD_COLUMNS)} FROM boards WHERE project_id = %s ORDER BY id", (project_id,))
+        column_names = [desc[0] for desc in cursor.description]
+        boards = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+        cursor.execute(f"""
+            SELECT {columns(CARD_COLUMNS, "cards")}
+            FROM cards
+            JOIN boards b ON cards.board_id = b.id
+            WHERE b.project_id = %s
+            ORDER BY cards.id
+            """, (project_id,))
+        column_names = [desc[0] for desc in cursor.description]
+        cards = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+        card_ids = [card["id"] for card in cards]
+
+        tags_by_card = {card_id: [] for card_id in card_ids}
+        responsible_by_card = {card_id: [] for card_id in card_ids}
+        attachments = card_attachments(cursor, card_ids)
+        if card_ids:
+            cursor.execute("SELECT card_id, tag FROM cards_tags WHERE card_id = ANY(%s) ORDER BY id", (card_ids,))
+            for card_id, tag in cursor.fetchall():
+                tags_by_card[card_id].append(tag)
+
+            cursor.execute("""
+                SELECT r.*, u.email, u.nickname
+                FROM responsible r
+                JOIN users u ON r.user_id = u.id
+                WHERE r.card_id = ANY(%s)
+                """, (card_ids,))
+            column_names = [desc[0] for desc in cursor.description]
+            for row in cursor.fetchall():
+                resp = dict(zip(column_names, row))
+                resp["appointed_at"] = resp["appointed_at"].isoformat() if resp.get("appointed_at") else None
+                responsible_by_card[resp["card_id"]].append(resp)
+
+        cards_by_board = {board["id"]: [] for board in boards}
+        for card in cards:
+            for date_field in ['created_at', 'updated_at', 'sell_by']:
+                if card.get(date_field):
+                    card[date_field] = card[date_field].isoformat()
+            card["tags"] = tags_by_card[card["id"]]
+            card["responsible"] = responsible_by_card[card["id"]]
+            card["attachments"] = attachments[card["id"]]
+            cards_by_board[card["board_id"]].append(card)
+        for board in boards:
+            board["cards"] = cards_by_board[board["id"]]
+
+        logger.debug("Built project snapshot: project_id=%s, boards=%s, cards=%s", project_id, len(boards), len(cards))
+        return {"project_id": project_id, "boards": boards, "cursor": encode_cursor([version[0]])}
 
 def collaborators_add(project_id: int, user_id: int, role: int) -> Dict[str, Any]:
     """Добавление коллаборатора в проект."""
@@ -309,7 +653,9 @@ def collaborators_add(project_id: int, user_id: int, role: int) -> Dict[str, Any
             column_names = [desc[0] for desc in cursor.description]
             collaborator_dict = dict(zip(column_names, new_collaborator))
             collaborator_dict["added_at"] = collaborator_dict["added_at"].isoformat() if collaborator_dict.get("added_at") else None
+            bump_versions(cursor, project_ids=[project_id])
             connect.commit()
+            invalidate_cache(permission_cache, (int(project_id), int(user_id)))
             logger.info(f"Added collaborator: user_id={user_id}, project_id={project_id}, role={role}")
             return collaborator_dict
         except Exception as e:
@@ -324,25 +670,35 @@ def collaborators_delete(project_id: int, user_id: int) -> None:
         cursor.execute("DELETE FROM collaborators WHERE project_id = %s AND user_id = %s", (project_id, user_id))
         if cursor.rowcount == 0:
             raise NotFound("Collaborator not found")
+        bump_versions(cursor, project_ids=[project_id])
         connect.commit()
+        invalidate_cache(permission_cache, (int(project_id), int(user_id)))
         logger.info(f"Deleted collaborator: user_id={user_id}, project_id={project_id}")
 
 def collaborators_exist(project_id: int, user_id: int) -> bool:
     """Проверка, является ли пользователь коллаборатором проекта."""
-    with dbinit() as connect:
-        cursor = connect.cursor()
-        cursor.execute("SELECT 1 FROM collaborators WHERE project_id = %s AND user_id = %s", (project_id, user_id))
-        return bool(cursor.fetchone())
+    return collaborator_role(project_id, user_id) is not None
 
 def collaborators_getrole(project_id: int, user_id: int, error: bool = True) -> int:
     """Получение роли коллаборатора."""
+    role = collaborator_role(project_id, user_id)
+    if role is None and error:
+        raise NotFound(f"User {user_id} not found in project {project_id}")
+    return role if role is not None else 0
+
+def collaborator_role(project_id: int, user_id: int) -> Optional[int]:
+    """Роль пользователя в проекте через кэш прав; None, если он не участник."""
+    key = (int(project_id), int(user_id))
+    role = permission_cache.get(key)
+    if role is not MISSING:
+        return role
     with dbinit() as connect:
         cursor = connect.cursor()
-        cursor.execute("SELECT role FROM collaborators WHERE project_id = %s AND user_id = %s", (project_id, user_id))
-        role = cursor.fetchone()
-        if not role and error:
-            raise NotFound(f"User {user_id} not found in project {project_id}")
-        return role[0] if role else 0
+        execute_prepared(cursor, "collaborator_role", key)
+        role_data = cursor.fetchone()
+        role = role_data[0] if role_data else None
+        permission_cache.set(key, role)
+        return role
 
 def collaborators_change(project_id: int, user_id: int, role: int) -> Dict[str, Any]:
     """Изменение роли коллаборатора."""
@@ -359,7 +715,9 @@ def collaborators_change(project_id: int, user_id: int, role: int) -> Dict[str,
             column_names = [desc[0] for desc in cursor.description]
             changed_dict = dict(zip(column_names, changed))
             changed_dict["added_at"] = changed_dict["added_at"].isoformat() if changed_dict.get("added_at") else None
+            bump_versions(cursor, project_ids=[project_id])
             connect.commit()
+            invalidate_cache(permission_cache, (int(project_id), int(user_id)))
             logger.info(f"Changed collaborator role: user_id={user_id}, project_id={project_id}, new_role={role}")
             return changed_dict
         except Exception as e:
@@ -381,6 +739,8 @@ def boards_create(project_id: int, name: str) -> Dict[str, Any]:
                 raise Exception("Failed to create board")
             column_names = [desc[0] for desc in cursor.description]
             board_dict = dict(zip(column_names, board))
+            bump_versions(cursor, project_ids=[project_id])
+            record_changes(cursor, [{"project_id": project_id, "entity": "board", "entity_id": board_dict["id"], "action": "create", "data": board_dict}])
             connect.commit()
             logger.info(f"Created board: title={name}, project_id={project_id}")
             return board_dict
@@ -395,20 +755,17 @@ def boards_info(project_id: int, board_id: Optional[int] = None) -> List[Dict[st
     """Получение информации о досках."""
     with dbinit() as connect:
         cursor = connect.cursor()
-        where = "project_id = %s"
-        params = [project_id]
         if board_id is not None:
-            where += " AND id = %s"
-            params.append(board_id)
-        
-        cursor.execute(f"SELECT * FROM boards WHERE {where}", params)
+            execute_prepared(cursor, "board_by_id", (project_id, board_id))
+        else:
+            execute_prepared(cursor, "boards_by_project", (project_id,))
         board_data = cursor.fetchall()
         if not board_data:
             raise NotFound("Board not found")
         
         column_names = [desc[0] for desc in cursor.description]
         result = [dict(zip(column_names, row)) for row in board_data]
-        logger.info(f"Retrieved boards: project_id={project_id}, count={len(result)}")
+        logger.debug("Retrieved boards: project_id=%s, count=%s", project_id, len(result))
         return result[0] if board_id is not None else result
     
 def boards_edit(board_id: int, title: Optional[str] = None) -> Dict[str, Any]:
@@ -422,6 +779,7 @@ def boards_edit(board_id: int, title: Optional[str] = None) -> Dict[str, Any]:
     if not updates:
         raise BadRequest("No fields to update provided")
     
+    updates.append("version = version + 1")
     with dbinit() as connect:
         cursor = connect.cursor()
         try:
@@ -434,6 +792,8 @@ def boards_edit(board_id: int, title: Optional[str] = None) -> Dict[str, Any]:
             
             column_names = [desc[0] for desc in cursor.description]
             board_dict = dict(zip(column_names, updated_board))
+            bump_versions(cursor, project_ids=[board_dict["project_id"]])
+            record_changes(cursor, [{"project_id": board_dict["project_id"], "entity": "board", "entity_id": board_id, "action": "update", "data": board_dict}])
             connect.commit()
             logger.info(f"Edited board: id={board_id}")
             return board_dict
@@ -457,9 +817,9 @@ def cards_create(
         cursor = connect.cursor()
         try:
             cursor.execute(
-                """
+                f"""
                 INSERT INTO cards (board_id, title, about, brief_about, sell_by, status, priority, external_resource)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING *
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING {columns(CARD_COLUMNS)}
                 """,
                 (board_id, title, about, brief_about, sell_by, status, priority, external_resource)
             )
@@ -468,6 +828,8 @@ def cards_create(
                 raise Exception("Failed to create card")
             column_names = [desc[0] for desc in cursor.description]
             card_dict = dict(zip(column_names, card_data))
+            bump_versions(cursor, board_ids=[board_id])
+            record_changes(cursor, [{"board_id": board_id, "entity": "card", "entity_id": card_dict["id"], "action": "create", "data": card_dict}])
             connect.commit()
             logger.info(f"Created card: id={card_dict['id']}, board_id={board_id}")
             return card_dict
@@ -478,37 +840,59 @@ def cards_create(
             logger.error(f"Error creating card: {str(e)}")
             raise
 
-def cards_info(board_id: Optional[int] = None, card_id: Optional[int] = None) -> List[Dict[str, Any]] | Dict[str, Any]:
-    """Получение информации о карточках."""
+def cards_info(
+    board_id: Optional[int] = None,
+    card_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """Получение информации о карточках.
+
+    При заданных after_id или limit карточки доски выбираются страницей по возрастанию id,
+    пустая страница не считается ошибкой.
+    """
+    paged = after_id is not None or limit is not None
+    if board_id is None and card_id is None:
+        raise BadRequest("Either board_id or card_id must be provided")
+
     with dbinit() as connect:
         cursor = connect.cursor()
-        where = []
-        params = []
-        if board_id is not None:
-            where.append("board_id = %s")
-            params.append(board_id)
         if card_id is not None:
-            where.append("id = %s")
-            params.append(card_id)
-        
-        if not where:
-            raise BadRequest("Either board_id or card_id must be provided")
-        
-        query = "SELECT * FROM cards WHERE " + " AND ".join(where)
-        cursor.execute(query, params)
+            if board_id is not None:
+                execute_prepared(cursor, "card_in_board", (board_id, card_id))
+            else:
+                execute_prepared(cursor, "card_by_id", (card_id,))
+        elif paged:
+            page_size = limit if limit is not None else PAGE_SIZE
+            if after_id is not None:
+                execute_prepared(cursor, "cards_page_after", (board_id, after_id, page_size))
+            else:
+                execute_prepared(cursor, "cards_page", (board_id, page_size))
+        else:
+            execute_prepared(cursor, "cards_by_board", (board_id,))
         cards_data = cursor.fetchall()
-        if not cards_data:
+        if not cards_data and not paged:
             raise NotFound("No cards found")
         
         column_names = [desc[0] for desc in cursor.description]
         result = [dict(zip(column_names, row)) for row in cards_data]
+        attachments = card_attachments(cursor, [card["id"] for card in result])
         for card in result:
             for date_field in ['created_at', 'updated_at', 'sell_by']:
                 if card.get(date_field):
                     card[date_field] = card[date_field].isoformat()
-        logger.info(f"Retrieved cards: count={len(result)}")
+            card["attachments"] = attachments[card["id"]]
+        logger.debug("Retrieved cards: count=%s", len(result))
         return result[0] if card_id is not None else result
 
+def cards_page(board_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Страница карточек доски по ключу (id) с курсором на следующую страницу; карточки — с вложениями."""
+    limit = page_limit(limit)
+    after_id = decode_cursor(cursor, 1)[0] if cursor else None
+    items = cards_info(board_id, after_id=after_id, limit=limit + 1)
+    next_cursor = encode_cursor([items[limit - 1]["id"]]) if len(items) > limit else None
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
 def cards_edit(
     card_id: int,
     title: Optional[str] = None,
@@ -521,55 +905,20 @@ def cards_edit(
     board_id: Optional[int] = None
 ) -> Dict[str, Any]:
     """Редактирование карточки."""
-    updates = []
-    params = []
-    if title is not None:
-        updates.append("title = %s")
-        params.append(title)
-    if about is not None:
-        updates.append("about = %s")
-        params.append(about)
-    if brief_about is not None:
-        updates.append("brief_about = %s")
-        params.append(brief_about)
-    if sell_by is not None:
-        updates.append("sell_by = %s")
-        params.append(sell_by)
-    if status is not None:
-        updates.append("status = %s")
-        params.append(status)
-    if priority is not None:
-        updates.append("priority = %s")
-        params.append(priority)
-    if external_resource is not None:
-        updates.append("external_resource = %s")
-        params.append(external_resource)
-    if board_id is not None:
-        updates.append("board_id = %s")
-        params.append(board_id)
-    
-    if not updates:
+    fields = (title, about, brief_about, sell_by, status, priority, external_resource, board_id)
+    if all(field is None for field in fields):
         raise BadRequest("No fields to update provided")
     
     with dbinit() as connect:
         cursor = connect.cursor()
         try:
-            update_sql = f"UPDATE cards SET {', '.join(updates)} WHERE id = %s RETURNING *"
-            params.append(card_id)
-            cursor.execute(update_sql, params)
+            execute_prepared(cursor, "card_update", (*fields, card_id))
             updated_card = cursor.fetchone()
             if not updated_card:
                 raise NotFound("Card not found")
+            bump_versions(cursor, board_ids=list(updated_card))
             
-            cursor.execute(
-                """
-                SELECT cards.*, b.title as board_title, p.title as project_title
-                FROM cards
-                JOIN boards b ON cards.board_id = b.id
-                JOIN projects p ON b.project_id = p.id
-                WHERE cards.id = %s
-                """, (card_id,)
-            )
+            execute_prepared(cursor, "card_with_titles", (card_id,))
             card_data = cursor.fetchone()
             if not card_data:
                 raise NotFound("Card not found")
@@ -579,8 +928,14 @@ def cards_edit(
             for date_field in ['created_at', 'updated_at', 'sell_by']:
                 if card_dict.get(date_field):
                     card_dict[date_field] = card_dict[date_field].isoformat()
+            changes = [{"board_id": card_dict["board_id"], "entity": "card", "entity_id": card_dict["id"], "action": "update", "data": card_change_data(card_dict)}]
+            if updated_card[1] != updated_card[0]:
+                changes.append({"board_id": updated_card[1], "entity": "card", "entity_id": card_dict["id"], "action": "move", "data": {"from_board_id": updated_card[1], "board_id": updated_card[0]}})
+            record_changes(cursor, changes)
             
             connect.commit()
+            if board_id is not None:
+                invalidate_cache(resolution_cache, ("card", int(card_id)))
             logger.info(f"Edited card: id={card_id}")
             return card_dict
         except psycopg2.errors.ForeignKeyViolation:
@@ -594,12 +949,168 @@ def cards_delete(card_id: int) -> None:
     """Удаление карточки."""
     with dbinit() as connect:
         cursor = connect.cursor()
-        cursor.execute("DELETE FROM cards WHERE id = %s", (card_id,))
-        if cursor.rowcount == 0:
+        cursor.execute("DELETE FROM cards WHERE id = %s RETURNING board_id", (card_id,))
+        deleted = cursor.fetchone()
+        if not deleted:
             raise NotFound("Card not found")
+        bump_versions(cursor, board_ids=[deleted[0]])
+        record_changes(cursor, [{"board_id": deleted[0], "entity": "card", "entity_id": card_id, "action": "delete"}])
         connect.commit()
+        invalidate_cache(resolution_cache, ("card", int(card_id)))
         logger.info(f"Deleted card: id={card_id}")
 
+def cards_bulk(user_id: int, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Пакетное создание, изменение и перемещение карточек в одной транзакции.
+
+    Каждая операция — словарь с ключом op ("create", "update" или "move") и полями карточки.
+    Права проверяются один раз на каждую затронутую доску; операции без прав или с
+    несуществующими карточками и досками не применяются и возвращаются с ошибкой.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+
+    def fail(index: int, status: int, message: str) -> None:
+        results[index] = {"index": index, "op": operations[index]["op"], "status": status, "error": message}
+
+    card_ids = list({op["card_id"] for op in operations if op["op"] != "create"})
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            card_boards = {}
+            if card_ids:
+                # Блокировка строк: карточку нельзя удалить или перенести между проверкой прав и UPDATE
+                cursor.execute("SELECT id, board_id FROM cards WHERE id = ANY(%s) ORDER BY id FOR UPDATE", (card_ids,))
+                card_boards = dict(cursor.fetchall())
+
+            board_ids = {op["board_id"] for op in operations if op.get("board_id") is not None}
+            board_ids.update(card_boards.values())
+            editable = {}
+            if board_ids:
+                cursor.execute("""
+                    SELECT b.id, COALESCE(c.role, 0) >= 2
+                    FROM boards b
+                    LEFT JOIN collaborators c ON c.project_id = b.project_id AND c.user_id = %s
+                    WHERE b.id = ANY(%s)
+                    """, (user_id, list(board_ids)))
+                editable = dict(cursor.fetchall())
+
+            inserts = []
+            updates = []
+            seen_cards = set()
+            for index, op in enumerate(operations):
+                target = op.get("board_id")
+                if op["op"] != "create":
+                    current = card_boards.get(op["card_id"])
+                    if current is None:
+                        fail(index, 404, "Card not found")
+                        continue
+                    if op["card_id"] in seen_cards:
+                        fail(index, 409, "Card is already changed by another operation in this batch")
+                        continue
+                    if not editable.get(current):
+                        fail(index, 403, "Insufficient permissions")
+                        continue
+                if target is not None:
+                    if target not in editable:
+                        fail(index, 404, "Board not found")
+                        continue
+                    if not editable[target]:
+                        fail(index, 403, "Insufficient permissions")
+                        continue
+
+                if op["op"] == "create":
+                    inserts.append((index, (
+                        target, op["title"], op["about"], op.get("brief_about"), op.get("sell_by"),
+                        op.get("status") or "todo", op.get("priority") or 0, op.get("external_resource")
+                    )))
+                else:
+                    seen_cards.add(op["card_id"])
+                    updates.append((index, (
+                        op["card_id"], op.get("title"), op.get("about"), op.get("brief_about"), op.get("sell_by"),
+                        op.get("status"), op.get("priority"), op.get("external_resource"), target
+                    )))
+
+            changed_cards = []
+            if inserts:
+                created = psycopg2.extras.execute_values(
+                    cursor,
+                    f"""
+                    INSERT INTO cards (board_id, title, about, brief_about, sell_by, status, priority, external_resource)
+                    VALUES %s RETURNING {columns(CARD_COLUMNS)}
+                    """,
+                    [values for _, values in inserts],
+                    page_size=len(inserts),
+                    fetch=True
+                )
+                column_names = [desc[0] for desc in cursor.description]
+                for (index, _), row in zip(inserts, created):
+                    card = dict(zip(column_names, row))
+                    changed_cards.append(card)
+                    results[index] = {"index": index, "op": "create", "status": 201, "card": card}
+
+            if updates:
+                updated = psycopg2.extras.execute_values(
+                    cursor,
+                    f"""
+                    UPDATE cards SET
+                        title = COALESCE(v.title, cards.title),
+                        about = COALESCE(v.about, cards.about),
+                        brief_about = COALESCE(v.brief_about, cards.brief_about),
+                        sell_by = COALESCE(v.sell_by, cards.sell_by),
+                        status = COALESCE(v.status, cards.status),
+                        priority = COALESCE(v.priority, cards.priority),
+                        external_resource = COALESCE(v.external_resource, cards.external_resource),
+                        board_id = COALESCE(v.board_id, cards.board_id),
+                        version = cards.version + 1
+                    FROM (VALUES %s) AS v(id, title, about, brief_about, sell_by, status, priority, external_resource, board_id)
+                    WHERE cards.id = v.id
+                    RETURNING {columns(CARD_COLUMNS, "cards")}
+                    """,
+                    [values for _, values in updates],
+                    template="(%s::integer, %s::varchar, %s::text, %s::text, %s::timestamp, %s::varchar, %s::integer, %s::varchar, %s::integer)",
+                    page_size=len(updates),
+                    fetch=True
+                )
+                column_names = [desc[0] for desc in cursor.description]
+                updated_cards = {row[column_names.index("id")]: dict(zip(column_names, row)) for row in updated}
+                for index, values in updates:
+                    card = updated_cards.get(values[0])
+                    if card is None:
+                        fail(index, 404, "Card not found")
+                        continue
+                    changed_cards.append(card)
+                    results[index] = {"index": index, "op": operations[index]["op"], "status": 200, "card": card}
+                updates = [(index, values) for index, values in updates if values[0] in updated_cards]
+
+            touched = [card_boards[values[0]] for _, values in updates]
+            touched += [card["board_id"] for card in changed_cards]
+            bump_versions(cursor, board_ids=touched)
+            for card in changed_cards:
+                for date_field in ['created_at', 'updated_at', 'sell_by']:
+                    if card.get(date_field):
+                        card[date_field] = card[date_field].isoformat()
+            changes = []
+            for index, values in inserts:
+                card = results[index]["card"]
+                changes.append({"board_id": card["board_id"], "entity": "card", "entity_id": card["id"], "action": "create", "data": card})
+            for index, values in updates:
+                card = results[index]["card"]
+                changes.append({"board_id": card["board_id"], "entity": "card", "entity_id": card["id"], "action": "update", "data": card})
+                if card_boards[card["id"]] != card["board_id"]:
+                    changes.append({"board_id": card_boards[card["id"]], "entity": "card", "entity_id": card["id"], "action": "move",
+                                    "data": {"from_board_id": card_boards[card["id"]], "board_id": card["board_id"]}})
+            record_changes(cursor, changes)
+
+            connect.commit()
+            for _, values in updates:
+                if values[-1] is not None:
+                    invalidate_cache(resolution_cache, ("card", int(values[0])))
+            logger.info(f"Bulk cards: created={len(inserts)}, updated={len(updates)}, failed={len(operations) - len(inserts) - len(updates)}")
+            return results
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error in bulk cards operation: {str(e)}")
+            raise
+
 def responsible_add(card_id: int, user_id: int, appointed_by: int) -> Dict[str, Any]:
     """Добавление ответственного за карточку."""
     with dbinit() as connect:
@@ -618,6 +1129,7 @@ def responsible_add(card_id: int, user_id: int, appointed_by: int) -> Dict[str,
             column_names = [desc[0] for desc in cursor.description]
             resp_dict = dict(zip(column_names, resp_data))
             resp_dict["appointed_at"] = resp_dict["appointed_at"].isoformat() if resp_dict.get("appointed_at") else None
+            bump_card_versions(cursor, [card_id])
             connect.commit()
             logger.info(f"Added responsible: user_id={user_id}, card_id={card_id}")
             return resp_dict
@@ -646,9 +1158,331 @@ def responsible_get(card_id: int) -> List[Dict[str, Any]]:
         result = [dict(zip(column_names, row)) for row in resp_data]
         for resp in result:
             resp["appointed_at"] = resp["appointed_at"].isoformat() if resp.get("appointed_at") else None
-        logger.info(f"Retrieved responsible for card_id={card_id}, count={len(result)}")
+        logger.debug("Retrieved responsible for card_id=%s, count=%s", card_id, len(result))
+        return result
+
+def file_record(cursor, row) -> Dict[str, Any]:
+    """Строка files: столбцы FILE_COLUMNS и относительные пути на диске в ключе paths (в ответы API не попадает)."""
+    file = dict(zip([desc[0] for desc in cursor.description], row))
+    if "path" in file:
+        file["paths"] = {"original": file.pop("path"), "thumbnail": file.pop("thumbnail"), "preview": file.pop("preview")}
+    return file
+
+def file_url(file_id: int, rendition: Optional[str] = None) -> str:
+    """Ссылка на скачивание вложения или его миниатюры/веб-версии."""
+    url = f"/api/v1/projects/cards/files?file_id={file_id}"
+    return f"{url}&rendition={rendition}" if rendition else url
+
+def card_attachments(cursor, card_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Завершённые вложения карточек для списков: ссылки на миниатюры и веб-версии вместо оригиналов."""
+    attachments = {card_id: [] for card_id in card_ids}
+    if not card_ids:
+        return attachments
+    execute_prepared(cursor, "files_by_cards", (list(attachments),))
+    column_names = [desc[0] for desc in cursor.description]
+    for row in cursor.fetchall():
+        file = dict(zip(column_names, row))
+        ready = file["preview_status"] == "ready"
+        file["thumbnail_url"] = file_url(file["id"], "thumbnail") if ready else None
+        file["preview_url"] = file_url(file["id"], "preview") if ready else None
+        attachments[file["card_id"]].append(file)
+    return attachments
+
+def files_info(card_id: int) -> List[Dict[str, Any]]:
+    """Вложения карточки, включая незавершённые загрузки."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(f"SELECT {columns(FILE_COLUMNS)} FROM files WHERE card_id = %s ORDER BY id", (card_id,))
+        return [file_record(cursor, row) for row in cursor.fetchall()]
+
+def file_get(file_id: int) -> Dict[str, Any]:
+    """Вложение по id вместе с путями на диске."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(f"SELECT {columns(FILE_COLUMNS)}, {FILE_PATHS} FROM files WHERE id = %s", (file_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise NotFound("File not found")
+        return file_record(cursor, row)
+
+def file_create(card_id: int, name: str, size: int, content_type: str) -> Dict[str, Any]:
+    """Создание записи загрузки; файл хранится в UPLOAD_FOLDER по пути <card_id>/<id>."""
+    if size < 0 or size > UPLOAD_MAX_SIZE:
+        raise BadRequest(f"File size must be between 0 and {UPLOAD_MAX_SIZE} bytes")
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute("SELECT nextval(pg_get_serial_sequence('files', 'id'))")
+            file_id = cursor.fetchone()[0]
+            cursor.execute(
+                f"""
+                INSERT INTO files (id, path, card_id, name, size, content_type, complete)
+                VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING {columns(FILE_COLUMNS)}, {FILE_PATHS}
+                """,
+                (file_id, f"{card_id}/{file_id}", card_id, name, size, content_type, size == 0)
+            )
+            file = file_record(cursor, cursor.fetchone())
+            if file["complete"]:
+                file_changed(cursor, file, "create")
+            connect.commit()
+            logger.info(f"Created file upload: id={file_id}, card_id={card_id}, size={size}")
+            return file
+        except psycopg2.errors.ForeignKeyViolation:
+            raise NotFound("Card not found")
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error creating file: {str(e)}")
+            raise
+
+def file_advance(file_id: int, offset: int, length: int) -> Optional[Dict[str, Any]]:
+    """Учёт записанного фрагмента загрузки.
+
+    Смещение принимается, только если совпадает с уже полученным объёмом, поэтому из двух
+    параллельных фрагментов с одним смещением засчитывается один. None — смещение устарело.
+    Завершённая загрузка типа из PREVIEW_TYPES получает preview_status = 'pending'.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute(
+                f"""
+                UPDATE files SET
+                    received = received + %s,
+                    complete = received + %s = size,
+                    preview_status = CASE
+                        WHEN received + %s = size AND content_type = ANY(%s) THEN 'pending'
+                        ELSE preview_status
+                    END
+                WHERE id = %s AND received = %s AND NOT complete
+                RETURNING {columns(FILE_COLUMNS)}
+                """,
+                (length, length, length, list(PREVIEW_TYPES), file_id, offset)
+            )
+            row = cursor.fetchone()
+            if not row:
+                connect.rollback()
+                return None
+            file = file_record(cursor, row)
+            if file["complete"]:
+                file_changed(cursor, file, "create")
+            connect.commit()
+            return file
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error advancing file upload: {str(e)}")
+            raise
+
+def file_preview_set(
+    file_id: int,
+    status: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    thumbnail: Optional[str] = None,
+    preview: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Запись результата генерации превью; None, если вложение уже удалено."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute(
+                f"""
+                UPDATE files SET preview_status = %s, width = %s, height = %s, thumbnail = %s, preview = %s
+                WHERE id = %s RETURNING {columns(FILE_COLUMNS)}
+                """,
+                (status, width, height, thumbnail, preview, file_id)
+            )
+            row = cursor.fetchone()
+            if not row:
+                connect.rollback()
+                return None
+            file = file_record(cursor, row)
+            file_changed(cursor, file, "update")
+            connect.commit()
+            logger.debug("Recorded preview: file_id=%s, status=%s", file_id, status)
+            return file
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error recording preview: {str(e)}")
+            raise
+
+def file_preview_claim(file_id: int) -> Optional[str]:
+    """Захват вложения для генерации превью; путь оригинала или None, если его уже захватили."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            """
+            UPDATE files SET preview_status = 'rendering', preview_claimed_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND complete AND preview_status = 'pending'
+            RETURNING path
+            """,
+            (file_id,)
+        )
+        row = cursor.fetchone()
+        connect.commit()
+        return row[0] if row else None
+
+def files_preview_claim(limit: int) -> List[Tuple[int, str]]:
+    """Захват вложений, ожидающих превью или брошенных другим процессом: (id, путь оригинала).
+
+    SKIP LOCKED не даёт процессам, сканирующим одновременно, захватить одни и те же строки.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            """
+            UPDATE files SET preview_status = 'rendering', preview_claimed_at = CURRENT_TIMESTAMP
+            WHERE id IN (
+                SELECT id FROM files
+                WHERE complete AND (
+                    preview_status = 'pending'
+                    OR (preview_status = 'rendering' AND preview_claimed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second')
+                )
+                ORDER BY id LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, path
+            """,
+            (PREVIEW_CLAIM_TIMEOUT, limit)
+        )
+        claimed = sorted(cursor.fetchall())
+        connect.commit()
+        return claimed
+
+def file_delete(file_id: int) -> Dict[str, Any]:
+    """Удаление записи вложения; возвращает удалённую запись с путями для очистки диска."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(f"DELETE FROM files WHERE id = %s RETURNING {columns(FILE_COLUMNS)}, {FILE_PATHS}", (file_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise NotFound("File not found")
+        file = file_record(cursor, row)
+        if file["complete"]:
+            file_changed(cursor, file, "delete")
+        connect.commit()
+        logger.info(f"Deleted file: id={file_id}")
+        return file
+
+def file_changed(cursor, file: Dict[str, Any], action: str) -> None:
+    """Версия карточки и запись в ленту проекта для завершённой загрузки, превью или удаления вложения."""
+    board_ids = bump_card_versions(cursor, [file["card_id"]])
+    record_changes(cursor, [{
+        "board_id": board_id, "entity": "file", "entity_id": file["id"], "action": action,
+        "data": {name: file[name] for name in FILE_COLUMNS}
+    } for board_id in board_ids])
+
+def comment_create(card_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    """Добавление комментария к карточке."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute(
+                f"INSERT INTO comments (card_id, user_id, text) VALUES (%s, %s, %s) RETURNING {columns(COMMENT_COLUMNS)}",
+                (card_id, user_id, text)
+            )
+            column_names = [desc[0] for desc in cursor.description]
+            comment = dict(zip(column_names, cursor.fetchone()))
+            connect.commit()
+            logger.info(f"Created comment: id={comment['id']}, card_id={card_id}")
+            return comment
+        except psycopg2.errors.ForeignKeyViolation:
+            raise NotFound("Card or user not found")
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error creating comment: {str(e)}")
+            raise
+
+def comments_info(card_id: int, cursor: Optional[str] = None, limit: Optional[int] = None, top: int = COMMENTS_TOP) -> Dict[str, Any]:
+    """Комментарии карточки: страница от новых к старым по ключу (card_id, id).
+
+    На первой странице дополнительно возвращаются top лучших по продвижению; оба запроса
+    читают строки в порядке индекса и останавливаются после LIMIT.
+    """
+    limit = page_limit(limit)
+    with dbinit() as connect:
+        db_cursor = connect.cursor()
+        result: Dict[str, Any] = {}
+        if not cursor and top > 0:
+            execute_prepared(db_cursor, "comments_top", (card_id, top))
+            column_names = [desc[0] for desc in db_cursor.description]
+            top_comments = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+            result["top"] = [comment for comment in top_comments if comment["promotion"] > 0]
+        if cursor:
+            before_id, = decode_cursor(cursor, 1)
+            execute_prepared(db_cursor, "comments_before", (card_id, int(before_id), limit + 1))
+        else:
+            execute_prepared(db_cursor, "comments_page", (card_id, limit + 1))
+        column_names = [desc[0] for desc in db_cursor.description]
+        comments = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+    result.update({
+        "comments": comments,
+        "cursor": encode_cursor([comments[-1]["id"]]) if has_more else None,
+        "has_more": has_more
+    })
+    return result
+
+def comments_board(board_id: int, top: int = COMMENTS_TOP) -> Dict[int, List[Dict[str, Any]]]:
+    """Лучшие комментарии всех карточек доски одним запросом: top-N на карточку из индекса (card_id, promotion, id).
+
+    При равном продвижении (в том числе без голосов) первыми идут новые.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            f"""
+            SELECT {columns(COMMENT_COLUMNS, "t")}
+            FROM cards c
+            CROSS JOIN LATERAL (
+                SELECT {columns(COMMENT_COLUMNS)} FROM comments
+                WHERE card_id = c.id
+                ORDER BY promotion DESC, id DESC
+                LIMIT %s
+            ) AS t
+            WHERE c.board_id = %s
+            ORDER BY t.card_id, t.promotion DESC, t.id DESC
+            """,
+            (top, board_id)
+        )
+        column_names = [desc[0] for desc in cursor.description]
+        result: Dict[int, List[Dict[str, Any]]] = {}
+        for row in cursor.fetchall():
+            comment = dict(zip(column_names, row))
+            result.setdefault(comment["card_id"], []).append(comment)
         return result
 
+def comment_author(comment_id: int) -> Dict[str, Any]:
+    """Карточка и автор комментария для проверки прав."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute("SELECT card_id, user_id FROM comments WHERE id = %s", (comment_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise NotFound("Comment not found")
+        return {"card_id": row[0], "user_id": row[1]}
+
+def comment_promote(comment_id: int) -> Dict[str, Any]:
+    """Голос за комментарий: атомарное увеличение promotion без чтения текущего значения."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        execute_prepared(cursor, "comment_promote", (comment_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise NotFound("Comment not found")
+        connect.commit()
+        return {"id": row[0], "card_id": row[1], "promotion": row[2]}
+
+def comment_delete(comment_id: int) -> None:
+    """Удаление комментария."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute("DELETE FROM comments WHERE id = %s", (comment_id,))
+        if cursor.rowcount == 0:
+            raise NotFound("Comment not found")
+        connect.commit()
+        logger.info(f"Deleted comment: id={comment_id}")
+
 def notification_create(to_whom: int, text: str, priority: int = 0) -> Dict[str, Any]:
     """Создание уведомления."""
     with dbinit() as connect:
@@ -666,6 +1500,7 @@ def notification_create(to_whom: int, text: str, priority: int = 0) -> Dict[str,
                 raise Exception("Failed to create notification")
             column_names = [desc[0] for desc in cursor.description]
             notif_dict = dict(zip(column_names, notif_data))
+            publish(cursor, NOTIFICATION_CHANNEL, to_whom, notif_dict)
             connect.commit()
             logger.info(f"Created notification: to_whom={to_whom}, id={notif_dict['id']}")
             return notif_dict
@@ -674,26 +1509,34 @@ def notification_create(to_whom: int, text: str, priority: int = 0) -> Dict[str,
             logger.error(f"Error creating notification: {str(e)}")
             raise
 
-def notifications_get(user_id: int, notification_id: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
-    """Получение уведомлений пользователя."""
+def notifications_get(
+    user_id: int,
+    notification_id: Optional[int] = None,
+    limit: int = 10,
+    after: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """Получение уведомлений пользователя по убыванию (priority, id).
+
+    after — ключ (priority, id) последнего уведомления предыдущей страницы.
+    """
     with dbinit() as connect:
         cursor = connect.cursor()
-        where = "to_whom = %s"
-        params = [user_id]
-        if notification_id is not None:
-            where += " AND id = %s"
-            params.append(notification_id)
-        
-        params.append(limit)
-        cursor.execute(
-            f"""
-            SELECT * FROM notifications 
-            WHERE {where}
-            ORDER BY id DESC
-            LIMIT %s
-            """,
-            params
-        )
+        if notification_id is not None and after is not None:
+            cursor.execute(
+                f"""
+                SELECT {columns(NOTIFICATION_COLUMNS)} FROM notifications
+                WHERE to_whom = %s AND id = %s AND (priority, id) < (%s, %s)
+                ORDER BY priority DESC, id DESC
+                LIMIT %s
+                """,
+                (user_id, notification_id, *after, limit)
+            )
+        elif notification_id is not None:
+            execute_prepared(cursor, "notification_by_id", (user_id, notification_id, limit))
+        elif after is not None:
+            execute_prepared(cursor, "notifications_after", (user_id, *after, limit))
+        else:
+            execute_prepared(cursor, "notifications", (user_id, limit))
         notif_data = cursor.fetchall()
         column_names = [desc[0] for desc in cursor.description]
         result = [dict(zip(column_names, row)) for row in notif_data]
@@ -701,7 +1544,33 @@ def notifications_get(user_id: int, notification_id: Optional[int] = None, limit
             for date_field in ['created_at']:
                 if notification.get(date_field):
                     notification[date_field] = notification[date_field].isoformat()
-        logger.info(f"Retrieved notifications for user_id={user_id}, count={len(result)}")
+        logger.debug("Retrieved notifications for user_id=%s, count=%s", user_id, len(result))
+        return result
+
+def notifications_page(user_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Страница уведомлений по ключу (priority, id) с курсором на следующую страницу."""
+    limit = page_limit(limit)
+    after = decode_cursor(cursor, 2) if cursor else None
+    items = notifications_get(user_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = encode_cursor([last["priority"], last["id"]])
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
+def notifications_since(user_id: int, after_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Уведомления, созданные после after_id, по возрастанию id — догрузка пропущенного потоком событий."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            f"SELECT {columns(NOTIFICATION_COLUMNS)} FROM notifications WHERE to_whom = %s AND id > %s ORDER BY id LIMIT %s",
+            (user_id, after_id, page_limit(limit))
+        )
+        column_names = [desc[0] for desc in cursor.description]
+        result = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+        for notification in result:
+            if notification.get("created_at"):
+                notification["created_at"] = notification["created_at"].isoformat()
         return result
 
 def notification_check(notification_id: int, user_id: int) -> None:
@@ -717,37 +1586,280 @@ def notification_check(notification_id: int, user_id: int) -> None:
         connect.commit()
         logger.info(f"Checked notification: id={notification_id}, user_id={user_id}")
 
+def notifications_unread_count(user_id: int) -> int:
+    """Количество непрочитанных уведомлений по частичному индексу idx_notifications_unread."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        execute_prepared(cursor, "notifications_unread", (user_id,))
+        return cursor.fetchone()[0]
+
+def notifications_check_all(user_id: int, up_to_id: Optional[int] = None) -> int:
+    """Пометка всех (или с id не больше up_to_id) непрочитанных уведомлений одним UPDATE."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        if up_to_id is None:
+            execute_prepared(cursor, "notifications_check_all", (user_id,))
+        else:
+            execute_prepared(cursor, "notifications_check_up_to", (user_id, up_to_id))
+        checked = cursor.rowcount
+        connect.commit()
+        logger.info(f"Checked notifications: user_id={user_id}, up_to_id={up_to_id}, count={checked}")
+        return checked
+
+def chat_create(project_id: int, title: str) -> Dict[str, Any]:
+    """Создание чата проекта."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO chats (project_id, title) VALUES (%s, %s) RETURNING id, project_id, title, created_at",
+                (project_id, title)
+            )
+            column_names = [desc[0] for desc in cursor.description]
+            chat = dict(zip(column_names, cursor.fetchone()))
+            connect.commit()
+            logger.info(f"Created chat: id={chat['id']}, project_id={project_id}")
+            return chat
+        except psycopg2.errors.ForeignKeyViolation:
+            raise NotFound("Project not found")
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error creating chat: {str(e)}")
+            raise
+
+def chats_info(project_id: int) -> List[Dict[str, Any]]:
+    """Чаты проекта с id последнего сообщения каждого."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        cursor.execute(
+            """
+            SELECT c.id, c.project_id, c.title, c.created_at,
+                   (SELECT max(m.id) FROM messages m WHERE m.chat_id = c.id) AS last_message_id
+            FROM chats c WHERE c.project_id = %s ORDER BY c.id
+            """,
+            (project_id,)
+        )
+        column_names = [desc[0] for desc in cursor.description]
+        return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+def chat_project(chat_id: int) -> Optional[int]:
+    """Проект чата через кэш принадлежности; None, если чата нет."""
+    chat_id = int(chat_id)
+    project_id = resolution_cache.get(("chat", chat_id))
+    if project_id is MISSING:
+        with dbinit() as connect:
+            cursor = connect.cursor()
+            execute_prepared(cursor, "chat_resolve", (chat_id,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        project_id = row[0]
+        resolution_cache.set(("chat", chat_id), project_id)
+    return project_id
+
+def chat_member(user_id: int, chat_id: int) -> bool:
+    """Участники чата — незаблокированные коллабораторы его проекта (роль от 1)."""
+    project_id = chat_project(chat_id)
+    if project_id is None:
+        raise NotFound("Chat not found")
+    role = collaborator_role(project_id, user_id)
+    return role is not None and role >= 1
+
+def messages_insert(messages: List[Tuple[int, int, str]]) -> List[Dict[str, Any]]:
+    """Запись пакета сообщений (chat_id, user_id, text) одним INSERT и одной фиксацией.
+
+    Каждое сообщение публикуется в канал CHAT_CHANNEL с ключом чата; все уведомления
+    пакета отправляются одним запросом и доставляются после фиксации.
+    """
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            rows = psycopg2.extras.execute_values(
+                cursor,
+                """
+                INSERT INTO messages (chat_id, user_id, text)
+                SELECT v.chat_id, v.user_id, v.text FROM (VALUES %s) AS v(ord, chat_id, user_id, text) ORDER BY v.ord
+                RETURNING id, chat_id, user_id, text, created_at
+                """,
+                [(number, *message) for number, message in enumerate(messages)],
+                template="(%s::integer, %s::integer, %s::integer, %s::text)",
+                page_size=len(messages),
+                fetch=True
+            )
+            column_names = [desc[0] for desc in cursor.description]
+            result = sorted((dict(zip(column_names, row)) for row in rows), key=lambda message: message["id"])
+            cursor.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                (CHAT_CHANNEL, [event_payload(message["chat_id"], message) for message in result])
+            )
+            connect.commit()
+            return result
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error inserting messages: {str(e)}")
+            raise
+
+def messages_page(chat_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Страница истории чата от новых к старым по ключу (chat_id, id)."""
+    limit = page_limit(limit)
+    with dbinit() as connect:
+        db_cursor = connect.cursor()
+        if cursor:
+            before_id, = decode_cursor(cursor, 1)
+            execute_prepared(db_cursor, "messages_before", (chat_id, int(before_id), limit + 1))
+        else:
+            execute_prepared(db_cursor, "messages_page", (chat_id, limit + 1))
+        column_names = [desc[0] for desc in db_cursor.description]
+        messages = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    next_cursor = encode_cursor([messages[-1]["id"]]) if has_more else None
+    return {"messages": messages, "cursor": next_cursor, "has_more": has_more}
+
+def messages_since(chat_id: int, after_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Сообщения чата после after_id по возрастанию id — догрузка пропущенного потоком событий."""
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        execute_prepared(cursor, "messages_after", (chat_id, after_id, page_limit(limit)))
+        column_names = [desc[0] for desc in cursor.description]
+        return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
 def can_edit(user_id: int, project_id: Optional[int] = None, board_id: Optional[int] = None, card_id: Optional[int] = None) -> bool:
     """Проверка прав редактирования."""
     if not any([project_id, board_id, card_id]):
         raise BadRequest("Must specify project_id, board_id, or card_id")
-    
+
+    if project_id is None:
+        project_id = resolve_project(board_id=board_id, card_id=card_id)
+    role = (collaborator_role(project_id, user_id) if project_id is not None else None) or 0
+    logger.debug("Checked edit permissions: user_id=%s, role=%s", user_id, role)
+    return role >= 2
+
+def can_view(user_id: int, project_id: Optional[int] = None, board_id: Optional[int] = None, card_id: Optional[int] = None) -> bool:
+    """Проверка участия в проекте незаблокированным участником (чтение и комментирование).
+
+    Проект определяется по самому узкому из переданных идентификаторов: карточке, затем доске.
+    """
+    if not any([project_id, board_id, card_id]):
+        raise BadRequest("Must specify project_id, board_id, or card_id")
+
+    if card_id is not None:
+        project_id = resolve_project(card_id=card_id)
+    elif board_id is not None:
+        project_id = resolve_project(board_id=board_id)
+    if project_id is None:
+        return False
+    role = collaborator_role(project_id, user_id)
+    return role is not None and role >= 1
+
+def resolve_project(board_id: Optional[int] = None, card_id: Optional[int] = None) -> Optional[int]:
+    """Определение проекта доски или карточки через кэш принадлежности."""
+    if board_id is None and card_id is not None:
+        board_id = resolution_cache.get(("card", int(card_id)))
+        if board_id is MISSING:
+            with dbinit() as connect:
+                cursor = connect.cursor()
+                execute_prepared(cursor, "card_resolve", (card_id,))
+                row = cursor.fetchone()
+            if not row:
+                return None
+            board_id, project_id = row
+            resolution_cache.set(("card", int(card_id)), board_id)
+            resolution_cache.set(("board", board_id), project_id)
+            return project_id
+    if board_id is None:
+        return None
+
+    project_id = resolution_cache.get(("board", int(board_id)))
+    if project_id is MISSING:
+        with dbinit() as connect:
+            cursor = connect.cursor()
+            execute_prepared(cursor, "board_resolve", (board_id,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        project_id = row[0]
+        resolution_cache.set(("board", int(board_id)), project_id)
+    return project_id
+
+# Права поиска совпадают с правами чтения: проекты видны незаблокированным участникам,
+# содержимое карточек — участникам с правом редактирования, как в Cards.get и снимке проекта
+SEARCH_SCOPES = {
+    "projects": {
+        "hits": """
+            SELECT p.id, p.title, p.description, ts_rank_cd(p.search, q.query) AS rank
+            FROM projects p
+            JOIN collaborators col ON col.project_id = p.id AND col.user_id = %(user_id)s AND col.role >= 1,
+                 q
+            WHERE p.search @@ q.query
+        """,
+        "highlight": ["title", "description"]
+    },
+    "cards": {
+        "hits": """
+            SELECT c.id, c.title, c.brief_about, c.about, c.status, c.board_id, b.project_id,
+                   ts_rank_cd(c.search, q.query) AS rank
+            FROM cards c
+            JOIN boards b ON b.id = c.board_id
+            JOIN collaborators col ON col.project_id = b.project_id AND col.user_id = %(user_id)s AND col.role >= 2,
+                 q
+            WHERE c.search @@ q.query
+        """,
+        "highlight": ["title", "brief_about", "about"]
+    }
+}
+
+def search(user_id: int, query: str, scope: str = "projects", cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Ранжированный полнотекстовый поиск по проектам или карточкам, доступным пользователю.
+
+    Страницы идут по ключу (rank, id) по убыванию; ts_headline вычисляется только для строк страницы.
+    """
+    if scope not in SEARCH_SCOPES:
+        raise BadRequest(f"Unknown search scope: {scope}")
+    query = (query or "").strip()
+    if not query:
+        raise BadRequest("Search query must not be empty")
+    limit = page_limit(limit)
+    after = decode_cursor(cursor, 2) if cursor else None
+    options = SEARCH_SCOPES[scope]
+
+    headlines = ", ".join(
+        f"ts_headline(%(config)s::regconfig, coalesce(page.{field}, ''), q.query, %(options)s) AS {field}_highlight"
+        for field in options["highlight"]
+    )
+    sql = f"""
+        WITH q AS (SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS query),
+        hits AS ({options["hits"]}),
+        page AS (
+            SELECT * FROM hits
+            {"WHERE (rank, id) < (%(after_rank)s::real, %(after_id)s)" if after else ""}
+            ORDER BY rank DESC, id DESC
+            LIMIT %(limit)s
+        )
+        SELECT page.*, {headlines}
+        FROM page, q
+        ORDER BY page.rank DESC, page.id DESC
+    """
+    params = {
+        "config": SEARCH_CONFIG, "query": query, "user_id": user_id,
+        "options": SEARCH_HEADLINE_OPTIONS, "limit": limit + 1
+    }
+    if after:
+        params["after_rank"], params["after_id"] = after
+
     with dbinit() as connect:
-        cursor = connect.cursor()
-        if project_id is not None:
-            sql = "SELECT role FROM collaborators WHERE project_id = %s AND user_id = %s"
-            params = (project_id, user_id)
-        elif board_id is not None:
-            sql = """
-                SELECT c.role FROM collaborators c
-                JOIN boards b ON c.project_id = b.project_id
-                WHERE b.id = %s AND c.user_id = %s
-                """
-            params = (board_id, user_id)
-        else:
-            sql = """
-                SELECT c.role FROM collaborators c
-                JOIN boards b ON c.project_id = b.project_id
-                JOIN cards ON cards.board_id = b.id
-                WHERE cards.id = %s AND c.user_id = %s
-                """
-            params = (card_id, user_id)
-        
-        cursor.execute(sql, params)
-        role_data = cursor.fetchone()
-        role = role_data[0] if role_data else 0
-        logger.info(f"Checked edit permissions: user_id={user_id}, role={role}")
-        return role >= 2
+        db_cursor = connect.cursor()
+        db_cursor.execute(sql, params)
+        column_names = [desc[0] for desc in db_cursor.description]
+        rows = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+
+    items = []
+    for row in rows[:limit]:
+        row["highlight"] = {field: row.pop(f"{field}_highlight") for field in options["highlight"]}
+        items.append(row)
+    next_cursor = encode_cursor([items[-1]["rank"], items[-1]["id"]]) if len(rows) > limit else None
+    logger.debug("Search: user_id=%s, scope=%s, count=%s", user_id, scope, len(items))
+    return {"items": items, "next_cursor": next_cursor}
 
 def project_tags_insert(tags: List[str] | str, project_id: int) -> List[Dict[str, Any]]:
     """Добавление тегов к проекту."""
@@ -764,14 +1876,8 @@ def project_tags_insert(tags: List[str] | str, project_id: int) -> List[Dict[str
                 "INSERT INTO projects_tags (tag, project_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
                 [(tag, project_id) for tag in tags]
             )
+            tags_list = project_tags_changed(cursor, project_id)
             connect.commit()
-            cursor.execute(
-                "SELECT id, tag, project_id FROM projects_tags WHERE project_id = %s",
-                (project_id,)
-            )
-            tags_data = cursor.fetchall()
-            column_names = [desc[0] for desc in cursor.description]
-            tags_list = [dict(zip(column_names, row)) for row in tags_data]
             logger.info(f"Inserted tags for project_id={project_id}, count={len(tags_list)}")
             return tags_list
         except psycopg2.errors.ForeignKeyViolation:
@@ -788,7 +1894,7 @@ def project_tags_get(project_id: int) -> List[str]:
         cursor.execute("SELECT tag FROM projects_tags WHERE project_id = %s", (project_id,))
         tags_data = cursor.fetchall()
         tags = [row[0] for row in tags_data]
-        logger.info(f"Retrieved tags for project_id={project_id}, count={len(tags)}")
+        logger.debug("Retrieved tags for project_id=%s, count=%s", project_id, len(tags))
         return tags
 
 def project_tags_search(tag: str) -> List[int]:
@@ -798,9 +1904,87 @@ def project_tags_search(tag: str) -> List[int]:
         cursor.execute("SELECT project_id FROM projects_tags WHERE tag = %s", (tag,))
         tags_data = cursor.fetchall()
         project_ids = [row[0] for row in tags_data]
-        logger.info(f"Searched projects by tag={tag}, count={len(project_ids)}")
+        logger.debug("Searched projects by tag=%s, count=%s", tag, len(project_ids))
         return project_ids
 
+def projects_discover(tags: List[str], mode: str = "and", cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Поиск проектов по нескольким тегам (and — все теги, or — любой) со сводками проектов.
+
+    На первой странице дополнительно возвращаются общее число проектов и счётчики
+    тегов, встречающихся вместе с искомыми (facets). Страницы идут по ключу (matched, id).
+    """
+    tags = list(dict.fromkeys(tag.strip() for tag in tags if tag and tag.strip()))
+    if not tags:
+        raise BadRequest("No valid tags provided")
+    if len(tags) > DISCOVER_MAX_TAGS:
+        raise BadRequest(f"Too many tags: maximum is {DISCOVER_MAX_TAGS}")
+    if mode not in ("and", "or"):
+        raise BadRequest("Mode must be 'and' or 'or'")
+    limit = page_limit(limit)
+    after = decode_cursor(cursor, 2) if cursor else None
+
+    matches = """
+        SELECT project_id, count(*) AS matched
+        FROM projects_tags
+        WHERE tag = ANY(%(tags)s)
+        GROUP BY project_id
+    """ + ("HAVING count(*) = %(required)s" if mode == "and" else "")
+    params = {"tags": tags, "required": len(tags), "limit": limit + 1}
+    if after:
+        params["after_matched"], params["after_id"] = after
+
+    with dbinit() as connect:
+        db_cursor = connect.cursor()
+        db_cursor.execute(f"""
+            WITH matches AS ({matches})
+            SELECT p.id, p.title, p.description, p.created_at, p.updated_at, m.matched
+            FROM matches m
+            JOIN projects p ON p.id = m.project_id
+            {"WHERE (m.matched, p.id) < (%(after_matched)s, %(after_id)s)" if after else ""}
+            ORDER BY m.matched DESC, p.id DESC
+            LIMIT %(limit)s
+            """, params)
+        column_names = [desc[0] for desc in db_cursor.description]
+        rows = [dict(zip(column_names, row)) for row in db_cursor.fetchall()]
+        items = rows[:limit]
+
+        tags_by_project = {item["id"]: [] for item in items}
+        if items:
+            db_cursor.execute(
+                "SELECT project_id, tag FROM projects_tags WHERE project_id = ANY(%s) ORDER BY tag",
+                (list(tags_by_project),)
+            )
+            for project_id, tag in db_cursor.fetchall():
+                tags_by_project[project_id].append(tag)
+
+        result = {"items": items, "next_cursor": None}
+        if cursor is None:
+            db_cursor.execute(f"""
+                WITH matches AS ({matches})
+                SELECT NULL AS tag, count(*) FROM matches
+                UNION ALL
+                (SELECT t.tag, count(*)
+                 FROM projects_tags t
+                 JOIN matches m ON m.project_id = t.project_id
+                 WHERE t.tag <> ALL(%(tags)s)
+                 GROUP BY t.tag
+                 ORDER BY count(*) DESC, t.tag
+                 LIMIT %(facets)s)
+                """, {**params, "facets": DISCOVER_FACETS})
+            counts = db_cursor.fetchall()
+            result["total"] = next(count for tag, count in counts if tag is None)
+            result["facets"] = [{"tag": tag, "count": count} for tag, count in counts if tag is not None]
+
+    for item in items:
+        item["tags"] = tags_by_project[item["id"]]
+        for date_field in ["created_at", "updated_at"]:
+            if item.get(date_field):
+                item[date_field] = item[date_field].isoformat()
+    if len(rows) > limit:
+        result["next_cursor"] = encode_cursor([items[-1]["matched"], items[-1]["id"]])
+    logger.debug("Discovered projects: tags=%s, mode=%s, count=%s", tags, mode, len(items))
+    return result
+
 def project_tags_delete(project_id: int, tag: str) -> None:
     """Удаление тега из проекта."""
     with dbinit() as connect:
@@ -808,9 +1992,36 @@ def project_tags_delete(project_id: int, tag: str) -> None:
         cursor.execute("DELETE FROM projects_tags WHERE project_id = %s AND tag = %s", (project_id, tag))
         if cursor.rowcount == 0:
             raise NotFound("Tag not found for this project")
+        project_tags_changed(cursor, project_id)
         connect.commit()
         logger.info(f"Deleted tag={tag} from project_id={project_id}")
 
+def project_tags_replace(tags: List[str] | str, project_id: int) -> List[Dict[str, Any]]:
+    """Замена всех тегов проекта."""
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    if not tags:
+        raise BadRequest("No valid tags provided")
+
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute("DELETE FROM projects_tags WHERE project_id = %s", (project_id,))
+            cursor.executemany(
+                "INSERT INTO projects_tags (tag, project_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [(tag, project_id) for tag in tags]
+            )
+            tags_list = project_tags_changed(cursor, project_id)
+            connect.commit()
+            logger.info(f"Replaced tags for project_id={project_id}, new count={len(tags_list)}")
+            return tags_list
+        except psycopg2.errors.ForeignKeyViolation:
+            raise NotFound("Project not found")
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error replacing project tags: {str(e)}")
+            raise
+
 def card_tags_insert(tags: List[str] | str, card_id: int) -> List[Dict[str, Any]]:
     """Добавление тегов к карточке."""
     if isinstance(tags, str):
@@ -826,14 +2037,8 @@ def card_tags_insert(tags: List[str] | str, card_id: int) -> List[Dict[str, Any]
                 "INSERT INTO cards_tags (tag, card_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
                 [(tag, card_id) for tag in tags]
             )
+            tags_list = card_tags_changed(cursor, card_id)
             connect.commit()
-            cursor.execute(
-                "SELECT id, tag, card_id FROM cards_tags WHERE card_id = %s",
-                (card_id,)
-            )
-            tags_data = cursor.fetchall()
-            column_names = [desc[0] for desc in cursor.description]
-            tags_list = [dict(zip(column_names, row)) for row in tags_data]
             logger.info(f"Inserted tags for card_id={card_id}, count={len(tags_list)}")
             return tags_list
         except psycopg2.errors.ForeignKeyViolation:
@@ -850,7 +2055,7 @@ def card_tags_get(card_id: int) -> List[str]:
         cursor.execute("SELECT tag FROM cards_tags WHERE card_id = %s", (card_id,))
         tags_data = cursor.fetchall()
         tags = [row[0] for row in tags_data]
-        logger.info(f"Retrieved tags for card_id={card_id}, count={len(tags)}")
+        logger.debug("Retrieved tags for card_id=%s, count=%s", card_id, len(tags))
         return tags
 
 def card_tags_delete(card_id: int, tag: str) -> None:
@@ -860,19 +2065,54 @@ def card_tags_delete(card_id: int, tag: str) -> None:
         cursor.execute("DELETE FROM cards_tags WHERE card_id = %s AND tag = %s", (card_id, tag))
         if cursor.rowcount == 0:
             raise NotFound("Tag not found for this card")
+        card_tags_changed(cursor, card_id)
         connect.commit()
         logger.info(f"Deleted tag={tag} from card_id={card_id}")
 
+def card_tags_replace(tags: List[str] | str, card_id: int) -> List[Dict[str, Any]]:
+    """Замена всех тегов карточки."""
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    if not tags:
+        raise BadRequest("No valid tags provided")
+
+    with dbinit() as connect:
+        cursor = connect.cursor()
+        try:
+            cursor.execute("DELETE FROM cards_tags WHERE card_id = %s", (card_id,))
+            cursor.executemany(
+                "INSERT INTO cards_tags (tag, card_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [(tag, card_id) for tag in tags]
+            )
+            tags_list = card_tags_changed(cursor, card_id)
+            connect.commit()
+            logger.info(f"Replaced tags for card_id={card_id}, new count={len(tags_list)}")
+            return tags_list
+        except psycopg2.errors.ForeignKeyViolation:
+            raise NotFound("Card not found")
+        except Exception as e:
+            connect.rollback()
+            logger.error(f"Error replacing card tags: {str(e)}")
+            raise
+
 __all__ = [
-    "dbinit",
-    "user_registration", "user_login", "user_getinfo", "user_edit", "user_role", "user_delete",
-    "project_create", "project_info", "format_project_data",
-    "collaborators_add", "collaborators_delete", "collaborators_exist", "collaborators_getrole", "collaborators_change",
+    "dbinit", "pool_stats", "cache_stats", "invalidate_cache",
+    "encode_cursor", "decode_cursor", "page_limit",
+    "bump_versions", "bump_card_versions", "entity_version", "record_changes", "project_changes",
+    "user_registration", "user_login", "user_rehash", "user_getinfo", "user_edit", "user_role", "user_delete", "user_claims",
+    "project_create", "project_info", "project_list", "project_snapshot", "build_project_data", "format_project_data",
+    "collaborators_add", "collaborators_delete", "collaborators_exist", "collaborators_getrole", "collaborators_change", "collaborator_role",
     "boards_create", "boards_info", "boards_edit", 
-    "cards_create", "cards_info", "cards_edit", "cards_delete",
+    "cards_create", "cards_info", "cards_page", "cards_edit", "cards_delete", "cards_bulk",
     "responsible_add", "responsible_get",
-    "notification_create", "notifications_get", "notification_check",
-    "can_edit",
-    "project_tags_insert", "project_tags_get", "project_tags_search", "project_tags_delete",
-    "card_tags_insert", "card_tags_get", "card_tags_delete"
+    "file_url", "card_attachments", "files_info", "file_get", "file_create", "file_advance",
+    "file_preview_set", "file_preview_claim", "files_preview_claim", "file_delete",
+    "notification_create", "notifications_get", "notifications_page", "notifications_since", "notification_check",
+    "notifications_unread_count", "notifications_check_all",
+    "chat_create", "chats_info", "chat_project", "chat_member", "messages_insert", "messages_page", "messages_since",
+    "comment_create", "comments_info", "comments_board", "comment_author", "comment_promote", "comment_delete",
+    "can_edit", "can_view", "resolve_project",
+    "search",
+    "project_tags_insert", "project_tags_get", "project_tags_search", "project_tags_delete", "project_tags_replace", "projects_discover",
+    "card_tags_insert", "card_tags_get", "card_tags_delete", "card_tags_replace"
 ]
\ No newline at end of file
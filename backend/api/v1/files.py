@@ -0,0 +1,70 @@
+import os
+import re
+import logging
+from typing import BinaryIO, Optional, Tuple
+from werkzeug.exceptions import BadRequest
+from .server import *
+
+# Хранение вложений карточек на диске: потоковая запись фрагментов загрузки.
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE = re.compile(r"^bytes (?:(\d+)-(\d+)|\*)/(\d+)$")
+
+def file_location(path: str) -> str:
+    """Абсолютный путь вложения по относительному пути из таблицы files."""
+    root = os.path.abspath(UPLOAD_FOLDER)
+    location = os.path.abspath(os.path.join(root, path))
+    if os.path.commonpath([root, location]) != root:
+        raise BadRequest("Invalid file path")
+    return location
+
+def parse_content_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Разбор Content-Range фрагмента загрузки: (начало, длина) или None для запроса состояния "bytes */size"."""
+    match = CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise BadRequest("Content-Range header must be 'bytes start-end/size' or 'bytes */size'")
+    start, end, total = match.groups()
+    if int(total) != size:
+        raise BadRequest(f"Content-Range size must be {size}")
+    if start is None:
+        return None
+    start, end = int(start), int(end)
+    if end < start or end >= size:
+        raise BadRequest("Invalid Content-Range")
+    if end - start + 1 > UPLOAD_CHUNK_MAX:
+        raise BadRequest(f"Chunk exceeds {UPLOAD_CHUNK_MAX} bytes")
+    return start, end - start + 1
+
+def create_file(path: str) -> None:
+    """Создание пустого файла для новой загрузки."""
+    location = file_location(path)
+    os.makedirs(os.path.dirname(location), exist_ok=True)
+    open(location, "wb").close()
+
+def write_chunk(path: str, stream: BinaryIO, offset: int, length: int, buffer_size: int = UPLOAD_BUFFER_SIZE) -> int:
+    """Запись фрагмента из потока тела запроса по смещению без буферизации фрагмента в памяти.
+
+    Возвращает число записанных байт; меньше length, если клиент оборвал передачу.
+    """
+    location = file_location(path)
+    os.makedirs(os.path.dirname(location), exist_ok=True)
+    written = 0
+    with os.fdopen(os.open(location, os.O_WRONLY | os.O_CREAT, 0o644), "wb") as file:
+        file.seek(offset)
+        while written < length:
+            block = stream.read(min(buffer_size, length - written))
+            if not block:
+                break
+            file.write(block)
+            written += len(block)
+    logger.debug("Wrote chunk: path=%s, offset=%s, length=%s", path, offset, written)
+    return written
+
+def remove_file(path: str) -> None:
+    """Удаление файла вложения; отсутствующий файл не считается ошибкой."""
+    try:
+        os.remove(file_location(path))
+    except FileNotFoundError:
+        pass
+
+__all__ = ["file_location", "parse_content_range", "create_file", "write_chunk", "remove_file"]
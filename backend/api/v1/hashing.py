@@ -0,0 +1,175 @@
+import os
+import time
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+from .server import *
+
+logger = logging.getLogger(__name__)
+
+def _hash(password: str, method: str) -> Tuple[str, float]:
+    """Хеширование пароля; выполняется в процессе пула и возвращает время вычисления."""
+    started = time.perf_counter()
+    return generate_password_hash(password, method=method), time.perf_counter() - started
+
+def _verify(hashed: str, password: str) -> Tuple[bool, float]:
+    """Проверка пароля по хешу; выполняется в процессе пула и возвращает время вычисления."""
+    started = time.perf_counter()
+    return check_password_hash(hashed, password), time.perf_counter() - started
+
+def hash_method(hashed: str) -> str:
+    """Метод с параметрами стоимости, которым получен хеш."""
+    return hashed.split("$", 1)[0]
+
+class HashPool:
+    """Пул процессов для хеширования и проверки паролей.
+
+    Медленное хеширование выполняется вне потока запроса и вне GIL процесса сервера.
+    Число принятых, но не завершённых заданий ограничено queue_size: сверх него запрос
+    сразу получает 503, а не ждёт в очереди, задерживая остальные эндпоинты.
+    """
+    def __init__(self, workers: int = HASH_WORKERS, queue_size: int = HASH_QUEUE_SIZE, method: str = HASH_METHOD):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.method = method
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._counters = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0, "failed": 0}
+        self._latency = {"total_ms": 0.0, "compute_ms": 0.0, "max_ms": 0.0}
+
+    def hash(self, password: str, timeout: float = HASH_TIMEOUT) -> str:
+        """Хеш пароля текущим методом пула."""
+        hashed, _ = self._result(self.submit(_hash, password, self.method), timeout)
+        self._count("hashed")
+        return hashed
+
+    def verify(self, hashed: str, password: str, timeout: float = HASH_TIMEOUT) -> bool:
+        """Проверка пароля по сохранённому хешу."""
+        valid, _ = self._result(self.submit(_verify, hashed, password), timeout)
+        self._count("verified")
+        return valid
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Получен ли хеш другим методом или с другими параметрами стоимости."""
+        return hash_method(hashed) != self.method
+
+    def rehash(self, password: str, callback: Callable[[str], Any]) -> bool:
+        """Фоновый пересчёт хеша текущим методом; callback получает новый хеш.
+
+        При заполненной очереди пересчёт пропускается до следующего входа.
+        """
+        try:
+            future = self.submit(_hash, password, self.method)
+        except ServiceUnavailable:
+            return False
+
+        def done(future: Future) -> None:
+            try:
+                hashed, _ = future.result()
+                callback(hashed)
+                self._count("rehashed")
+            except Exception as e:
+                logger.error(f"Password rehash error: {str(e)}")
+
+        future.add_done_callback(done)
+        return True
+
+    def submit(self, function: Callable, *args) -> Future:
+        """Постановка задания в пул; при заполненной очереди — ServiceUnavailable."""
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ServiceUnavailable("Password hashing is overloaded, retry later")
+        started = time.perf_counter()
+        try:
+            future = self._pool().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(lambda future: self._done(future, started))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._counters["hashed"] + self._counters["verified"] + self._counters["rehashed"]
+            return {
+                "method": self.method,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "avg_ms": round(self._latency["total_ms"] / completed, 2) if completed else 0.0,
+                "avg_compute_ms": round(self._latency["compute_ms"] / completed, 2) if completed else 0.0,
+                "max_ms": round(self._latency["max_ms"], 2),
+                **self._counters
+            }
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Пул процессов; создаётся заново, если рабочий процесс аварийно завершился."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _result(self, future: Future, timeout: float) -> Any:
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise ServiceUnavailable("Password hashing timed out, retry later")
+        except BrokenProcessPool:
+            raise ServiceUnavailable("Password hashing is unavailable, retry later")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _done(self, future: Future, started: float) -> None:
+        """Учёт задержки задания; вызывается из потока завершения пула."""
+        elapsed = (time.perf_counter() - started) * 1000
+        self._slots.release()
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._counters["failed"] += 1
+                if isinstance(future.exception(), BrokenProcessPool):
+                    self._executor = None
+                return
+            self._latency["total_ms"] += elapsed
+            self._latency["compute_ms"] += future.result()[1] * 1000
+            self._latency["max_ms"] = max(self._latency["max_ms"], elapsed)
+
+_hasher: Optional[HashPool] = None
+_hasher_pid: Optional[int] = None
+_hasher_lock = threading.Lock()
+
+def get_hasher() -> HashPool:
+    """Пул хеширования паролей процесса; после fork создаётся заново."""
+    global _hasher, _hasher_pid
+    if _hasher is None or _hasher_pid != os.getpid():
+        with _hasher_lock:
+            if _hasher is None or _hasher_pid != os.getpid():
+                _hasher = HashPool()
+                _hasher_pid = os.getpid()
+    return _hasher
+
+def hash_password(password: str) -> str:
+    """Хеширование пароля в пуле процессов."""
+    return get_hasher().hash(password)
+
+def verify_password(hashed: str, password: str) -> bool:
+    """Проверка пароля в пуле процессов."""
+    return get_hasher().verify(hashed, password)
+
+def hash_stats() -> Dict[str, Any]:
+    """Статистика пула хеширования, если он уже создан в этом процессе."""
+    return _hasher.stats() if _hasher is not None and _hasher_pid == os.getpid() else {}
+
+__all__ = ["hash_method", "HashPool", "get_hasher", "hash_password", "verify_password", "hash_stats"]
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+from .server import *
+from .serializer import dumps
+from .listener import Subscription, get_listener
+
+logger = logging.getLogger(__name__)
+
+# Сообщение очереди сокета, после которого сокет закрывается: клиент не успевает читать
+OVERFLOW = None
+
+class ProjectHub:
+    """Раздача событий проектов веб-сокетам одного цикла событий.
+
+    На каждый проект с открытыми сокетами — одна подписка на общий слушатель процесса;
+    событие сериализуется один раз и кладётся в очереди всех сокетов проекта.
+    """
+    def __init__(self, channel: str = PROJECT_CHANNEL, queue_size: int = SOCKET_QUEUE_SIZE):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._sockets: Dict[int, Set[asyncio.Queue]] = {}
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._counters = {"events": 0, "sent": 0, "overflows": 0}
+
+    def join(self, project_id: int) -> asyncio.Queue:
+        """Регистрация сокета проекта; возвращает очередь готовых к отправке сообщений."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._sockets.setdefault(project_id, set()).add(queue)
+        if project_id not in self._subscriptions:
+            self._subscriptions[project_id] = get_listener().subscribe(
+                self.channel, project_id,
+                lambda data: loop.call_soon_threadsafe(self.broadcast, project_id, data)
+            )
+        return queue
+
+    def leave(self, project_id: int, queue: asyncio.Queue) -> None:
+        sockets = self._sockets.get(project_id)
+        if sockets is None:
+            return
+        sockets.discard(queue)
+        if not sockets:
+            del self._sockets[project_id]
+            self._subscriptions.pop(project_id).close()
+
+    def broadcast(self, project_id: int, data: Dict[str, Any]) -> None:
+        """Раздача события сокетам проекта; переполненная очередь заменяется сигналом OVERFLOW."""
+        sockets = self._sockets.get(project_id)
+        if not sockets:
+            return
+        message = dumps({"type": "changes", "project_id": project_id, **data}).decode()
+        self._counters["events"] += 1
+        for queue in sockets:
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(OVERFLOW)
+                self._counters["overflows"] += 1
+                continue
+            queue.put_nowait(message)
+            self._counters["sent"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "projects": len(self._sockets),
+            "sockets": sum(len(sockets) for sockets in self._sockets.values()),
+            **self._counters
+        }
+
+_hub: Optional[ProjectHub] = None
+
+def get_hub() -> ProjectHub:
+    """Хаб процесса; используется только из цикла событий ASGI-приложения."""
+    global _hub
+    if _hub is None:
+        _hub = ProjectHub()
+    return _hub
+
+def hub_stats() -> Dict[str, Any]:
+    """Статистика хаба, если в процессе уже открывались сокеты."""
+    return _hub.stats() if _hub is not None else {}
+
+__all__ = ["OVERFLOW", "ProjectHub", "get_hub", "hub_stats"]
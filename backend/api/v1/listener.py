@@ -0,0 +1,169 @@
+import os
+import json
+import select
+import threading
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+import psycopg2
+import psycopg2.extensions
+from .server import *
+from .serializer import default
+
+logger = logging.getLogger(__name__)
+
+# Предел полезной нагрузки NOTIFY в Postgres — 8000 байт
+PAYLOAD_MAX = 7900
+
+def event_payload(key: Any, data: Dict[str, Any]) -> str:
+    """Полезная нагрузка NOTIFY; слишком большое событие отправляется без тела, только с id/version и пометкой partial."""
+    payload = json.dumps({"key": str(key), "data": data}, default=default, ensure_ascii=False)
+    if len(payload.encode()) > PAYLOAD_MAX:
+        brief = {name: data[name] for name in ("id", "version") if name in data}
+        payload = json.dumps({"key": str(key), "data": {**brief, "partial": True}})
+    return payload
+
+def publish(cursor, channel: str, key: Any, data: Dict[str, Any]) -> None:
+    """Публикация события через pg_notify; подписчики получат его только после фиксации транзакции."""
+    cursor.execute("SELECT pg_notify(%s, %s)", (channel, event_payload(key, data)))
+
+class Subscription:
+    """Подписка на события канала с заданным ключом."""
+    def __init__(self, listener: "EventListener", channel: str, key: str, callback: Callable[[Dict[str, Any]], None]):
+        self.listener = listener
+        self.channel = channel
+        self.key = key
+        self.callback = callback
+
+    def close(self) -> None:
+        self.listener.unsubscribe(self)
+
+class EventListener:
+    """Одно LISTEN-соединение на процесс, раздающее события подписчикам по ключу."""
+    def __init__(self, dsn: Dict[str, Any], reconnect: float = LISTENER_RECONNECT):
+        self.dsn = dsn
+        self.reconnect = reconnect
+        self._subscribers: Dict[Tuple[str, str], Set[Subscription]] = defaultdict(set)
+        self._channels: Set[str] = set()
+        self._listening: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"events": 0, "delivered": 0, "errors": 0, "reconnects": 0}
+
+    def subscribe(self, channel: str, key: Any, callback: Callable[[Dict[str, Any]], None]) -> Subscription:
+        """Подписка на события канала; callback вызывается из потока слушателя и не должен блокировать."""
+        subscription = Subscription(self, channel, str(key), callback)
+        with self._lock:
+            self._subscribers[(channel, subscription.key)].add(subscription)
+            self._channels.add(channel)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="event-listener", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get((subscription.channel, subscription.key))
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[(subscription.channel, subscription.key)]
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reconnect + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "channels": sorted(self._listening),
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "keys": len(self._subscribers),
+                "running": self._thread is not None and self._thread.is_alive(),
+                **self._counters
+            }
+
+    def _connect(self):
+        connect = psycopg2.connect(**self.dsn)
+        connect.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return connect
+
+    def _listen(self, connect) -> None:
+        """LISTEN для каналов, появившихся после предыдущей проверки."""
+        with self._lock:
+            pending = self._channels - self._listening
+        if not pending:
+            return
+        cursor = connect.cursor()
+        for channel in pending:
+            cursor.execute(f'LISTEN "{channel}"')
+            logger.info(f"Listening on channel {channel}")
+        cursor.close()
+        with self._lock:
+            self._listening |= pending
+
+    def _dispatch(self, notify) -> None:
+        """Раздача одного уведомления подписчикам его ключа."""
+        try:
+            message = json.loads(notify.payload)
+        except ValueError:
+            logger.error(f"Malformed event on channel {notify.channel}")
+            return
+        with self._lock:
+            self._counters["events"] += 1
+            subscribers = list(self._subscribers.get((notify.channel, str(message.get("key"))), ()))
+        for subscription in subscribers:
+            try:
+                subscription.callback(message["data"])
+            except Exception as e:
+                logger.error(f"Event callback error: {str(e)}")
+        with self._lock:
+            self._counters["delivered"] += len(subscribers)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            connect = None
+            try:
+                connect = self._connect()
+                while not self._stop.is_set():
+                    self._listen(connect)
+                    if select.select([connect], [], [], 1.0) == ([], [], []):
+                        continue
+                    connect.poll()
+                    while connect.notifies:
+                        self._dispatch(connect.notifies.pop(0))
+            except Exception as e:
+                logger.error(f"Event listener error: {str(e)}")
+                with self._lock:
+                    self._counters["errors"] += 1
+                    self._counters["reconnects"] += 1
+                self._stop.wait(self.reconnect)
+            finally:
+                with self._lock:
+                    self._listening.clear()
+                if connect is not None and not connect.closed:
+                    connect.close()
+
+_listener: Optional[EventListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+def get_listener() -> EventListener:
+    """Общий слушатель процесса; после fork создаётся заново."""
+    global _listener, _listener_pid
+    if _listener is None or _listener_pid != os.getpid():
+        with _listener_lock:
+            if _listener is None or _listener_pid != os.getpid():
+                dsn = {"host": HOST, "user": USER, "port": PORT, "password": PASSWORD, "database": DATABASE}
+                _listener = EventListener(dsn)
+                _listener_pid = os.getpid()
+    return _listener
+
+def listener_stats() -> Dict[str, Any]:
+    """Статистика слушателя, если он уже создан в этом процессе."""
+    return _listener.stats() if _listener is not None and _listener_pid == os.getpid() else {}
+
+__all__ = ["event_payload", "publish", "Subscription", "EventListener", "get_listener", "listener_stats"]
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+import traceback
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO, Tuple
+from .server import *
+from .serializer import dumps
+
+# Атрибуты LogRecord, которые не считаются пользовательскими полями из extra=
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "sampled"}
+
+class JsonFormatter(logging.Formatter):
+    """Запись журнала одной строкой JSON; поля из extra= попадают в запись как есть."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName
+        }
+        if getattr(record, "sampled", 0):
+            entry["sampled"] = record.sampled
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        try:
+            return dumps(entry).decode().rstrip("\n")
+        except TypeError:
+            return dumps({key: value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+                          for key, value in entry.items()}).decode().rstrip("\n")
+
+class SamplingFilter(logging.Filter):
+    """Ограничение частоты записей низкого уровня с каждой строки кода.
+
+    С одной строки пропускается не больше rate записей в секунду; число отброшенных
+    за прошедшую секунду сообщается в поле sampled следующей пропущенной записи.
+    """
+    def __init__(self, level: int, rate: int):
+        super().__init__()
+        self.level = level
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno > self.level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != now:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                record.sampled = suppressed
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            self.dropped += 1
+            return False
+
+class DroppingQueueHandler(QueueHandler):
+    """Постановка записи в очередь без ожидания: при переполнении запись отбрасывается.
+
+    Сообщение и трассировка исключения готовятся в потоке вызова, форматирование
+    и вывод выполняет поток QueueListener.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip("\n")
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def parse_levels(levels: str) -> Dict[str, str]:
+    """Разбор уровней логгеров из строки "имя=УРОВЕНЬ,имя=УРОВЕНЬ"."""
+    result = {}
+    for item in levels.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            result[name.strip()] = level.strip().upper()
+    return result
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[SamplingFilter] = None
+_logging_pid: Optional[int] = None
+_logging_lock = threading.Lock()
+
+def init_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+    queue_size: int = LOG_QUEUE_SIZE,
+    sample_level: str = LOG_SAMPLE_LEVEL,
+    sample_rate: int = LOG_SAMPLE_RATE,
+    stream: Optional[TextIO] = None
+) -> None:
+    """Настройка журнала процесса: обработчик-очередь на корневом логгере и поток вывода в stream (stderr).
+
+    Повторный вызов перенастраивает журнал; после fork поток вывода запускается заново.
+    """
+    global _listener, _handler, _sampler, _logging_pid
+    with _logging_lock:
+        if _listener is not None and _logging_pid == os.getpid():
+            _listener.stop()
+        output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+        if fmt == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+        _sampler = SamplingFilter(logging.getLevelName(sample_level.upper()), sample_rate)
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _handler.addFilter(_sampler)
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(_handler)
+        root.setLevel(level.upper())
+        for name, logger_level in parse_levels(levels).items():
+            logging.getLogger(name).setLevel(logger_level)
+        _listener = QueueListener(_handler.queue, output)
+        _listener.start()
+        _logging_pid = os.getpid()
+
+def stop_logging() -> None:
+    """Вывод оставшихся в очереди записей и остановка потока вывода."""
+    global _listener
+    with _logging_lock:
+        if _listener is not None and _logging_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+def logging_stats() -> Dict[str, Any]:
+    """Состояние очереди журнала процесса."""
+    if _handler is None or _logging_pid != os.getpid():
+        return {}
+    return {
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "sampled": _sampler.dropped if _sampler is not None else 0
+    }
+
+def _restart_after_fork() -> None:
+    """Запуск потока вывода в дочернем процессе: поток родителя после fork не существует."""
+    global _listener, _logging_lock, _logging_pid
+    _logging_lock = threading.Lock()
+    if _listener is not None and _handler is not None:
+        _listener = QueueListener(_handler.queue, *_listener.handlers)
+        _listener.start()
+        _logging_pid = os.getpid()
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+__all__ = [
+    "JsonFormatter", "SamplingFilter", "DroppingQueueHandler", "parse_levels",
+    "init_logging", "stop_logging", "logging_stats"
+]
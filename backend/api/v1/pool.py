@@ -0,0 +1,208 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Optional, Dict, Any
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+from .server import *
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(PoolError):
+    """Не удалось получить соединение из пула за отведённое время."""
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Соединение пула с отметками времени и набором подготовленных на нём запросов."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.prepared = set()
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с переполнением, таймаутом ожидания и проверкой живости."""
+    def __init__(
+        self,
+        dsn: Dict[str, Any],
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        max_overflow: int = POOL_MAX_OVERFLOW,
+        timeout: float = POOL_TIMEOUT,
+        recycle: float = POOL_RECYCLE,
+        ping_after: float = POOL_PING_AFTER,
+        connection_factory: type = PooledConnection
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size or max_overflow < 0:
+            raise ValueError("Invalid pool size configuration")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.connection_factory = connection_factory
+
+        self._idle: deque = deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            "checkouts": 0, "waits": 0, "timeouts": 0,
+            "created": 0, "discarded": 0, "wait_time": 0.0
+        }
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+            self._size += 1
+
+    def _connect(self) -> PooledConnection:
+        """Открытие нового физического соединения."""
+        connect = psycopg2.connect(connection_factory=self.connection_factory, **self.dsn)
+        with self._cond:
+            self._counters["created"] += 1
+        return connect
+
+    def _healthy(self, connect: PooledConnection) -> bool:
+        """Проверка соединения перед выдачей: закрытие, возраст и ping после простоя."""
+        if connect.closed:
+            return False
+        now = time.monotonic()
+        if self.recycle and now - connect.created_at > self.recycle:
+            return False
+        if self.ping_after and now - connect.last_used > self.ping_after:
+            try:
+                cursor = connect.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                connect.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _close_quietly(self, connect: PooledConnection) -> None:
+        """Закрытие соединения без выброса ошибок."""
+        try:
+            connect.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._counters["discarded"] += 1
+
+    def getconn(self) -> PooledConnection:
+        """Выдача соединения из пула, ожидание не дольше timeout секунд."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    connect = self._idle.pop()
+                    break
+                if self._size < self.max_size + self.max_overflow:
+                    self._size += 1
+                    connect = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(f"No free connection within {self.timeout}s")
+                if not waited:
+                    self._counters["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self._counters["wait_time"] += time.monotonic() - started
+            self._counters["checkouts"] += 1
+
+        try:
+            if connect is not None and not self._healthy(connect):
+                self._close_quietly(connect)
+                connect = None
+            if connect is None:
+                connect = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        connect.last_used = time.monotonic()
+        return connect
+
+    def putconn(self, connect: PooledConnection, discard: bool = False) -> None:
+        """Возврат соединения в пул с откатом незавершённой транзакции."""
+        if not discard and not connect.closed:
+            try:
+                if connect.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connect.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            if discard or connect.closed or self._closed or self._size > self.max_size:
+                self._size -= 1
+                self._close_quietly(connect)
+            else:
+                connect.last_used = time.monotonic()
+                self._idle.append(connect)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Закрытие пула и всех свободных соединений."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._size -= 1
+                self._close_quietly(self._idle.pop())
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика пула."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "max_overflow": self.max_overflow,
+                **self._counters,
+                "wait_time": round(self._counters["wait_time"], 6)
+            }
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_pool_options: Dict[str, Any] = {}
+
+def get_pool() -> ConnectionPool:
+    """Ленивое создание общего пула процесса."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                dsn = {"host": HOST, "user": USER, "port": PORT, "password": PASSWORD, "database": DATABASE}
+                _pool = ConnectionPool(dsn, **_pool_options)
+                logger.info(f"Connection pool created: min={_pool.min_size}, max={_pool.max_size}, overflow={_pool.max_overflow}")
+    return _pool
+
+def configure_pool(**options) -> None:
+    """Переопределение параметров пула; текущий пул закрывается и создаётся заново при следующем запросе."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        _pool_options.clear()
+        _pool_options.update(options)
+
+def pool_stats() -> Dict[str, Any]:
+    """Статистика общего пула, если он уже создан."""
+    return _pool.stats() if _pool is not None else {}
+
+__all__ = ["ConnectionPool", "PooledConnection", "PoolTimeout", "get_pool", "configure_pool", "pool_stats"]
@@ -0,0 +1,220 @@
+import os
+import time
+import queue
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Set
+from .server import *
+from .files import file_location, remove_file
+from .connect import file_preview_set, file_preview_claim, files_preview_claim
+
+try:
+    import PIL
+except ImportError:
+    PIL = None
+
+logger = logging.getLogger(__name__)
+
+# Тег EXIF Orientation со значениями, при которых изображение повёрнуто на 90°
+EXIF_ORIENTATION = 0x0112
+EXIF_ROTATED = (5, 6, 7, 8)
+
+def render(source: str, thumbnail: str, preview: str, thumbnail_size: int, web_size: int, max_pixels: int) -> Dict[str, int]:
+    """Веб-версия и миниатюра изображения в JPEG; выполняется в процессе пула.
+
+    Возвращает размеры оригинала с учётом ориентации EXIF.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(source) as original:
+        width, height = original.size
+        if original.getexif().get(EXIF_ORIENTATION) in EXIF_ROTATED:
+            width, height = height, width
+        original.draft("RGB", (web_size, web_size))
+        image = ImageOps.exif_transpose(original)
+    if image.mode != "RGB":
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    for target, size in ((preview, web_size), (thumbnail, thumbnail_size)):
+        image.thumbnail((size, size), Image.LANCZOS)
+        temporary = f"{target}.tmp"
+        image.save(temporary, "JPEG", quality=85, optimize=True, progressive=True)
+        os.replace(temporary, target)
+    return {"width": width, "height": height}
+
+class PreviewPipeline:
+    """Очередь заданий превью и пул процессов, выполняющий рендер.
+
+    Поток-диспетчер захватывает вложение в базе (preview_status = 'rendering') и передаёт
+    задание в пул не больше чем по два на процесс; результат записывается в таблицу files
+    из потока завершения. Захват не даёт нескольким процессам сервера рендерить одно
+    вложение. Задания, не поместившиеся в очередь, оставшиеся от прошлого запуска или
+    брошенные упавшим процессом, подбираются из базы при запуске и периодически.
+    """
+    def __init__(self, workers: int = PREVIEW_WORKERS, queue_size: int = PREVIEW_QUEUE_SIZE):
+        self.workers = workers
+        self.jobs: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._lock = threading.Lock()
+        self._pending: Set[int] = set()
+        self._rescan = True
+        self._rescanned = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"queued": 0, "rendered": 0, "failed": 0, "dropped": 0, "skipped": 0}
+
+    def submit(self, file_id: int) -> bool:
+        """Постановка вложения в очередь; при переполнении оно останется pending до пересканирования."""
+        self.start()
+        return self._enqueue(file_id, None)
+
+    def _enqueue(self, file_id: int, path: Optional[str]) -> bool:
+        """Задание (id, путь): путь задан, если вложение уже захвачено при пересканировании."""
+        with self._lock:
+            if file_id in self._pending:
+                return True
+            try:
+                self.jobs.put_nowait((file_id, path))
+            except queue.Full:
+                self._counters["dropped"] += 1
+                self._rescan = True
+                return False
+            self._pending.add(file_id)
+            self._counters["queued"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "available": PIL is not None,
+                "workers": self.workers,
+                "queued_now": self.jobs.qsize(),
+                "in_progress": len(self._pending) - self.jobs.qsize(),
+                **self._counters
+            }
+
+    def start(self) -> None:
+        """Запуск потока-диспетчера; первым делом он подбирает из базы ожидающие вложения."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="preview-dispatcher", daemon=True)
+                self._thread.start()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Пул процессов; создаётся заново, если рабочий процесс аварийно завершился."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self) -> None:
+        while True:
+            if self._rescan or time.monotonic() - self._rescanned >= PREVIEW_RESCAN_INTERVAL:
+                self._requeue()
+            try:
+                file_id, path = self.jobs.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            self._slots.acquire()
+            try:
+                self._dispatch(file_id, path)
+            except Exception as e:
+                logger.error(f"Preview dispatch error: file_id={file_id}: {str(e)}")
+                self._done(file_id, "failed")
+
+    def _requeue(self) -> None:
+        """Захват в базе вложений, ожидающих превью, в пределах свободного места очереди."""
+        self._rescan = False
+        self._rescanned = time.monotonic()
+        limit = min(self.jobs.maxsize - self.jobs.qsize(), max(1, self.jobs.maxsize // 2))
+        if limit <= 0:
+            self._rescan = True
+            return
+        try:
+            claimed = files_preview_claim(limit)
+        except Exception as e:
+            logger.error(f"Preview rescan error: {str(e)}")
+            self._rescan = True
+            return
+        for file_id, path in claimed:
+            if not self._enqueue(file_id, path):
+                break
+        if len(claimed) == limit:
+            self._rescan = True
+
+    def _dispatch(self, file_id: int, path: Optional[str]) -> None:
+        if path is None:
+            path = file_preview_claim(file_id)
+            if path is None:
+                with self._lock:
+                    self._counters["skipped"] += 1
+                self._done(file_id, None)
+                return
+        if PIL is None:
+            file_preview_set(file_id, "unsupported")
+            self._done(file_id, "failed")
+            return
+        original = path
+        thumbnail, preview = f"{original}.thumb.jpg", f"{original}.preview.jpg"
+        future = self._pool().submit(
+            render, file_location(original), file_location(thumbnail), file_location(preview),
+            PREVIEW_THUMBNAIL_SIZE, PREVIEW_WEB_SIZE, PREVIEW_MAX_PIXELS
+        )
+        future.add_done_callback(lambda future: self._finish(file_id, thumbnail, preview, future))
+
+    def _finish(self, file_id: int, thumbnail: str, preview: str, future: Future) -> None:
+        """Запись результата рендера; вызывается из потока завершения пула."""
+        counter = "rendered"
+        try:
+            try:
+                size = future.result()
+            except Exception as e:
+                logger.warning(f"Preview failed: file_id={file_id}: {str(e)}")
+                counter = "failed"
+                if isinstance(e, BrokenProcessPool):
+                    with self._lock:
+                        self._executor = None
+                remove_file(thumbnail)
+                remove_file(preview)
+                file_preview_set(file_id, "failed")
+                return
+            if file_preview_set(file_id, "ready", size["width"], size["height"], thumbnail, preview) is None:
+                remove_file(thumbnail)
+                remove_file(preview)
+        except Exception as e:
+            counter = "failed"
+            logger.error(f"Preview result error: file_id={file_id}: {str(e)}")
+        finally:
+            self._done(file_id, counter)
+
+    def _done(self, file_id: int, counter: Optional[str]) -> None:
+        with self._lock:
+            self._pending.discard(file_id)
+            if counter is not None:
+                self._counters[counter] += 1
+        self._slots.release()
+
+_previews: Optional[PreviewPipeline] = None
+_previews_pid: Optional[int] = None
+_previews_lock = threading.Lock()
+
+def get_previews() -> PreviewPipeline:
+    """Конвейер превью процесса; после fork создаётся заново."""
+    global _previews, _previews_pid
+    if _previews is None or _previews_pid != os.getpid():
+        with _previews_lock:
+            if _previews is None or _previews_pid != os.getpid():
+                _previews = PreviewPipeline()
+                _previews_pid = os.getpid()
+    return _previews
+
+def previews_stats() -> Dict[str, Any]:
+    """Статистика конвейера превью, если он уже создан в этом процессе."""
+    return _previews.stats() if _previews is not None and _previews_pid == os.getpid() else {}
+
+__all__ = ["render", "PreviewPipeline", "get_previews", "previews_stats"]
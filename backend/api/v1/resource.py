@@ -1,16 +1,26 @@
-from flask import request, make_response
+import queue
+import mimetypes
+from flask import request, make_response, Response, send_file
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, jwt_required,
     get_jwt, get_jwt_identity, verify_jwt_in_request
 )
-from werkzeug.exceptions import BadRequest, NotFound, Forbidden, Conflict
-from werkzeug.security import generate_password_hash
+from werkzeug.exceptions import BadRequest, NotFound, Forbidden, Conflict, ServiceUnavailable, Unauthorized
+from typing import Any
 import logging
 from .classes import *
 from .connect import *
+from .server import BULK_MAX_OPERATIONS, NOTIFICATION_CHANNEL, STREAM_QUEUE_SIZE, CHAT_CHANNEL, CHAT_MESSAGE_MAX, COMMENTS_TOP, PAGE_SIZE_MAX
+from .listener import get_listener, listener_stats
+from .hub import hub_stats
+from .stream import SSE_HEADERS, offer, notification_events, message_events
+from .unit import release_unit
+from .files import file_location, parse_content_range, create_file, write_chunk, remove_file
+from .previews import get_previews, previews_stats
+from .chat import get_batcher, chat_stats
+from .hashing import hash_password, hash_stats
+from .logs import logging_stats
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class Users(NoneResource):
@@ -39,6 +49,9 @@ class Users(NoneResource):
         except BadRequest as e:
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(400, str(e), request.method)
+        except ServiceUnavailable as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(503, str(e), request.method)
         except Exception as e:
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
@@ -53,7 +66,7 @@ class Users(NoneResource):
             updates = {}
 
             if "password" in data:
-                updates["password"] = generate_password_hash(data["password"])
+                updates["password"] = hash_password(data["password"])
             if "nickname" in data:
                 nickname = data["nickname"]
                 if not nickname or len(nickname) > 64:
@@ -78,6 +91,9 @@ class Users(NoneResource):
         except Forbidden as e:
             logger.error(f"PATCH error: {str(e)}")
             return ApiResponse.error(403, str(e), request.method)
+        except ServiceUnavailable as e:
+            logger.error(f"PATCH error: {str(e)}")
+            return ApiResponse.error(503, str(e), request.method)
         except Exception as e:
             logger.error(f"PATCH error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
@@ -102,6 +118,7 @@ class Auth(NoneResource):
         """Вход пользователя."""
         try:
             raw_data = self.validate(["email", "password"])
+            release_unit()
             user_data = user_login(raw_data["email"], raw_data["password"])
             access = create_access_token(
                 identity=str(user_data["id"]),
@@ -122,6 +139,9 @@ class Auth(NoneResource):
         except Forbidden as e:
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(403, str(e), request.method)
+        except ServiceUnavailable as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(503, str(e), request.method)
         except Exception as e:
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
@@ -130,18 +150,27 @@ class Refresh(NoneResource):
     """Ресурс для обновления токена доступа."""
     @jwt_required(refresh=True)
     def post(self):
-        """Обновление токена доступа."""
+        """Обновление токена доступа.
+
+        Версия из токена сверяется с кэшем версий пользователей: после смены данных
+        или удаления пользователя выданные ранее токены обновления отклоняются.
+        """
         try:
             current_user = get_jwt_identity()
-            user_data = user_getinfo(uid=int(current_user), guest=False)
+            claims = user_claims(int(current_user))
+            if claims is None:
+                raise Unauthorized("User not found")
+            version, role, email = claims
+            if get_jwt().get("version") != version:
+                raise Unauthorized("Refresh token has been revoked")
             new_access_token = create_access_token(
                 identity=current_user,
-                additional_claims={"email": user_data["email"], "role": user_data["role"]}
+                additional_claims={"email": email, "role": role}
             )
             return AuthResponse.refresh(new_access_token)
-        except NotFound as e:
+        except Unauthorized as e:
             logger.error(f"POST error: {str(e)}")
-            return ApiResponse.error(404, str(e), request.method)
+            return ApiResponse.error(401, str(e), request.method)
         except Forbidden as e:
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(403, str(e), request.method)
@@ -168,6 +197,11 @@ class Projects(NoneResource):
                 }
                 return ApiResponse.success(response_data, request.method)
             
+            if project_id is not None and title is None and author is None:
+                version = entity_version(project_id=project_id)
+                etag = make_etag("project", project_id, version) if version is not None else None
+                return conditional(etag, lambda: ApiResponse.success(project_info(project_id), request.method))
+
             project = project_info(project_id, title, author)
             return ApiResponse.success(project, request.method)
         except BadRequest as e:
@@ -196,6 +230,61 @@ class Projects(NoneResource):
             logger.error(f"POST error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
 
+class ProjectSnapshot(NoneResource):
+    """Ресурс для получения всех досок проекта с карточками за один запрос."""
+    @jwt_required()
+    def get(self):
+        """Получение снимка досок, карточек, тегов и ответственных проекта."""
+        try:
+            project_id = request.args.get("project_id", type=int)
+            user_id = get_jwt_identity()
+            if not project_id:
+                raise BadRequest("Missing required query parameter: project_id")
+            if not can_edit(user_id, project_id=project_id):
+                raise Forbidden("You are not authorized to view boards")
+            version = entity_version(project_id=project_id)
+            etag = make_etag("snapshot", project_id, version) if version is not None else None
+            return conditional(etag, lambda: ApiResponse.success(project_snapshot(project_id), request.method))
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class ProjectSync(NoneResource):
+    """Ресурс ленты изменений проекта."""
+    @jwt_required()
+    def get(self):
+        """Получение изменений проекта после курсора из снимка или предыдущего ответа."""
+        try:
+            project_id = request.args.get("project_id", type=int)
+            cursor = request.args.get("cursor")
+            user_id = get_jwt_identity()
+            if not project_id:
+                raise BadRequest("Missing required query parameter: project_id")
+            if not cursor:
+                raise BadRequest("Missing required query parameter: cursor")
+            if not can_edit(user_id, project_id=project_id):
+                raise Forbidden("You are not authorized to view boards")
+            changes = project_changes(project_id, cursor, request.args.get("limit", type=int))
+            return ApiResponse.success(changes, request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
 class Collaborators(NoneResource):
     """Ресурс для управления коллабораторами проекта."""
     @jwt_required()
@@ -322,8 +411,13 @@ class Boards(NoneResource):
 
             if not can_edit(user_id, project_id=project_id):
                 raise Forbidden("You are not authorized to view boards")
-            boards_data = boards_info(project_id, board_id)
-            return ApiResponse.success(boards_data, request.method)
+            if board_id is not None:
+                version = entity_version(board_id=board_id)
+                etag = make_etag("board", project_id, board_id, version) if version is not None else None
+            else:
+                version = entity_version(project_id=project_id)
+                etag = make_etag("boards", project_id, version) if version is not None else None
+            return conditional(etag, lambda: ApiResponse.success(boards_info(project_id, board_id), request.method))
         except BadRequest as e:
             logger.error(f"GET error: {str(e)}")
             return ApiResponse.error(400, str(e), request.method)
@@ -393,8 +487,19 @@ class Cards(NoneResource):
             user_id = get_jwt_identity()
             if not can_edit(user_id, board_id=board_id, card_id=card_id):
                 raise Forbidden("Insufficient permissions")
-            cards_data = cards_info(board_id, card_id)
-            return ApiResponse.success(cards_data, request.method)
+            if card_id is not None:
+                version = entity_version(card_id=card_id)
+            else:
+                version = entity_version(board_id=board_id)
+            etag = make_etag("cards", request.query_string.decode(), version) if version is not None else None
+
+            def build():
+                if board_id is not None and card_id is None and ("cursor" in request.args or "limit" in request.args):
+                    cards_data = cards_page(board_id, request.args.get("cursor"), request.args.get("limit", type=int))
+                else:
+                    cards_data = cards_info(board_id, card_id)
+                return ApiResponse.success(cards_data, request.method)
+            return conditional(etag, build)
         except BadRequest as e:
             logger.error(f"GET error: {str(e)}")
             return ApiResponse.error(400, str(e), request.method)
@@ -488,6 +593,93 @@ class Cards(NoneResource):
             logger.error(f"DELETE error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
 
+class CardsBulk(NoneResource):
+    """Ресурс для пакетных операций с карточками."""
+    FIELDS = ["title", "about", "brief_about", "sell_by", "status", "priority", "external_resource", "board_id"]
+    REQUIRED = {
+        "create": ["board_id", "title", "about"],
+        "update": ["card_id"],
+        "move": ["card_id", "board_id"]
+    }
+
+    def parse_operation(self, operation: Any) -> dict:
+        """Проверка одной операции пакета."""
+        if not isinstance(operation, dict) or operation.get("op") not in self.REQUIRED:
+            raise BadRequest("Each operation must be an object with op: create, update or move")
+        op = operation["op"]
+        allowed = {"op", "card_id", *self.FIELDS} if op != "move" else {"op", "card_id", "board_id"}
+        if op == "create":
+            allowed.discard("card_id")
+        unexpected = [field for field in operation if field not in allowed]
+        if unexpected:
+            raise BadRequest(f"Unexpected fields in {op} operation: {', '.join(unexpected)}")
+        missing = [field for field in self.REQUIRED[op] if operation.get(field) is None]
+        if missing:
+            raise BadRequest(f"Missing required fields in {op} operation: {', '.join(missing)}")
+        if op == "update" and not any(operation.get(field) is not None for field in self.FIELDS):
+            raise BadRequest("No fields to update provided")
+        for field in ("card_id", "board_id"):
+            value = operation.get(field)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                raise BadRequest(f"{field} must be an integer")
+        fields = {field: operation[field] for field in operation if field in self.FIELDS and field != "board_id" and operation[field] is not None}
+        if op == "create":
+            validated = cValidate(**fields).model_dump(exclude_unset=True)
+        else:
+            validated = cEditValidate(**fields).model_dump(exclude_unset=True)
+        parsed = {"op": op, **validated}
+        for field in ("card_id", "board_id"):
+            if operation.get(field) is not None:
+                parsed[field] = operation[field]
+        return parsed
+
+    @jwt_required()
+    def post(self):
+        """Применение пакета операций создания, изменения и перемещения карточек."""
+        try:
+            raw_data = self.validate(["operations"])
+            operations = raw_data["operations"]
+            user_id = get_jwt_identity()
+            if not isinstance(operations, list) or not operations:
+                raise BadRequest("Operations must be a non-empty list")
+            if len(operations) > BULK_MAX_OPERATIONS:
+                raise BadRequest(f"Too many operations: at most {BULK_MAX_OPERATIONS} allowed")
+
+            parsed = []
+            errors = {}
+            for index, operation in enumerate(operations):
+                try:
+                    parsed.append(self.parse_operation(operation))
+                except (BadRequest, ValueError) as e:
+                    errors[index] = {
+                        "index": index,
+                        "op": operation.get("op") if isinstance(operation, dict) else None,
+                        "status": 400,
+                        "error": getattr(e, "description", str(e))
+                    }
+
+            applied = cards_bulk(user_id, parsed) if parsed else []
+            applied_iter = iter(applied)
+            results = []
+            for index in range(len(operations)):
+                if index in errors:
+                    results.append(errors[index])
+                else:
+                    result = next(applied_iter)
+                    result["index"] = index
+                    results.append(result)
+            return ApiResponse.success({
+                "results": results,
+                "applied": sum(1 for result in results if result["status"] < 400),
+                "failed": sum(1 for result in results if result["status"] >= 400)
+            }, request.method)
+        except BadRequest as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Exception as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
 class Notification(NoneResource):
     """Ресурс для управления уведомлениями."""
     @jwt_required()
@@ -496,8 +688,14 @@ class Notification(NoneResource):
         try:
             notification_id = request.args.get("notification_id", type=int)
             user_id = get_jwt_identity()
-            notifications = notifications_get(user_id, notification_id)
+            if notification_id is None and ("cursor" in request.args or "limit" in request.args):
+                notifications = notifications_page(user_id, request.args.get("cursor"), request.args.get("limit", type=int))
+            else:
+                notifications = notifications_get(user_id, notification_id)
             return ApiResponse.success(notifications, request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
         except Exception as e:
             logger.error(f"GET error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
@@ -521,6 +719,90 @@ class Notification(NoneResource):
             logger.error(f"DELETE error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
 
+class NotificationUnread(NoneResource):
+    """Ресурс для счётчика непрочитанных уведомлений и массовой пометки прочитанными."""
+    @jwt_required()
+    def get(self):
+        """Получение количества непрочитанных уведомлений."""
+        try:
+            user_id = get_jwt_identity()
+            return ApiResponse.success({"unread": notifications_unread_count(user_id)}, request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def delete(self):
+        """Пометка прочитанными всех уведомлений или уведомлений с id не больше up_to_id."""
+        try:
+            raw_data = self.validate([], ["up_to_id"]) if request.get_json(silent=True) else {}
+            up_to_id = raw_data.get("up_to_id", request.args.get("up_to_id", type=int))
+            if up_to_id is not None and not isinstance(up_to_id, int):
+                raise BadRequest("up_to_id must be an integer")
+            user_id = get_jwt_identity()
+            checked = notifications_check_all(user_id, up_to_id)
+            return ApiResponse.success({"checked": checked}, request.method)
+        except BadRequest as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Exception as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class NotificationStream(NoneResource):
+    """Ресурс потока уведомлений Server-Sent Events."""
+    @jwt_required()
+    def get(self):
+        """Подписка на новые уведомления пользователя.
+
+        Last-Event-ID (или since) — id последнего полученного уведомления, пропущенные досылаются первыми.
+        """
+        try:
+            user_id = get_jwt_identity()
+            last_id = request.headers.get("Last-Event-ID", type=int)
+            if last_id is None:
+                last_id = request.args.get("since", type=int)
+            events = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+            subscription = get_listener().subscribe(NOTIFICATION_CHANNEL, user_id, lambda data: offer(events, data))
+            try:
+                backlog = notifications_since(user_id, last_id) if last_id is not None else []
+            except Exception:
+                subscription.close()
+                raise
+            return Response(
+                notification_events(user_id, subscription, events, backlog, last_id),
+                mimetype="text/event-stream",
+                headers=SSE_HEADERS
+            )
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class ProjectDiscover(NoneResource):
+    """Ресурс для поиска проектов по нескольким тегам."""
+    def get(self):
+        """Поиск проектов по тегам со сводками и счётчиками сопутствующих тегов."""
+        try:
+            tags = request.args.getlist("tag")
+            for value in request.args.getlist("tags"):
+                tags.extend(value.split(","))
+            results = projects_discover(
+                tags,
+                request.args.get("mode", "and"),
+                request.args.get("cursor"),
+                request.args.get("limit", type=int)
+            )
+            return ApiResponse.success(results, request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
 class ProjectTags(NoneResource):
     """Ресурс для управления тегами проектов."""
     @jwt_required()
@@ -584,33 +866,8 @@ class ProjectTags(NoneResource):
             user_id = get_jwt_identity()
             if not can_edit(user_id, project_id=project_id):
                 raise Forbidden("Insufficient permissions")
-            list_tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
-            if not list_tags:
-                raise BadRequest("No valid tags provided")
-            with dbinit() as connect:
-                cursor = connect.cursor()
-                try:
-                    cursor.execute("DELETE FROM projects_tags WHERE project_id = %s", (project_id,))
-                    cursor.executemany(
-                        "INSERT INTO projects_tags (tag, project_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                        [(tag, project_id) for tag in list_tags]
-                    )
-                    connect.commit()
-                    cursor.execute(
-                        "SELECT id, tag, project_id FROM projects_tags WHERE project_id = %s",
-                        (project_id,)
-                    )
-                    tags_data = cursor.fetchall()
-                    column_names = [desc[0] for desc in cursor.description]
-                    tags_list = [dict(zip(column_names, row)) for row in tags_data]
-                    logger.info(f"Replaced tags for project_id={project_id}, new count={len(tags_list)}")
-                    return ApiResponse.success(tags_list, request.method)
-                except Exception as e:
-                    connect.rollback()
-                    logger.error(f"PATCH error during DB operation: {str(e)}")
-                    raise
-                finally:
-                    cursor.close()
+            tags_list = project_tags_replace(tags, project_id)
+            return ApiResponse.success(tags_list, request.method)
         except BadRequest as e:
             logger.error(f"PATCH error: {str(e)}")
             return ApiResponse.error(400, str(e), request.method)
@@ -709,33 +966,8 @@ class CardTags(NoneResource):
             user_id = get_jwt_identity()
             if not can_edit(user_id, card_id=card_id):
                 raise Forbidden("Insufficient permissions")
-            list_tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
-            if not list_tags:
-                raise BadRequest("No valid tags provided")
-            with dbinit() as connect:
-                cursor = connect.cursor()
-                try:
-                    cursor.execute("DELETE FROM cards_tags WHERE card_id = %s", (card_id,))
-                    cursor.executemany(
-                        "INSERT INTO cards_tags (tag, card_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                        [(tag, card_id) for tag in list_tags]
-                    )
-                    connect.commit()
-                    cursor.execute(
-                        "SELECT id, tag, card_id FROM cards_tags WHERE card_id = %s",
-                        (card_id,)
-                    )
-                    tags_data = cursor.fetchall()
-                    column_names = [desc[0] for desc in cursor.description]
-                    tags_list = [dict(zip(column_names, row)) for row in tags_data]
-                    logger.info(f"Replaced tags for card_id={card_id}, new count={len(tags_list)}")
-                    return ApiResponse.success(tags_list, request.method)
-                except Exception as e:
-                    connect.rollback()
-                    logger.error(f"PATCH error during DB operation: {str(e)}")
-                    raise
-                finally:
-                    cursor.close()
+            tags_list = card_tags_replace(tags, card_id)
+            return ApiResponse.success(tags_list, request.method)
         except BadRequest as e:
             logger.error(f"PATCH error: {str(e)}")
             return ApiResponse.error(400, str(e), request.method)
@@ -771,8 +1003,484 @@ class CardTags(NoneResource):
             logger.error(f"DELETE error: {str(e)}")
             return ApiResponse.error(500, str(e), request.method)
 
+class CardComments(NoneResource):
+    """Ресурс для комментариев карточек."""
+    @jwt_required()
+    def get(self):
+        """Комментарии карточки (card_id): лучшие и страница новых; или лучшие для всех карточек доски (board_id)."""
+        try:
+            card_id = request.args.get("card_id", type=int)
+            board_id = request.args.get("board_id", type=int)
+            user_id = get_jwt_identity()
+            if not card_id and not board_id:
+                raise BadRequest("Missing required query parameter: card_id or board_id")
+            if card_id and board_id:
+                raise BadRequest("Specify either card_id or board_id, not both")
+            if not can_view(user_id, board_id=board_id, card_id=card_id):
+                raise Forbidden("Insufficient permissions")
+            top = min(max(request.args.get("top", COMMENTS_TOP, type=int), 0), PAGE_SIZE_MAX)
+            if card_id:
+                comments = comments_info(card_id, request.args.get("cursor"), request.args.get("limit", type=int), top)
+            else:
+                comments = comments_board(board_id, top)
+            return ApiResponse.success(comments, request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def post(self):
+        """Добавление комментария; доступно любому участнику проекта."""
+        try:
+            raw_data = self.validate(["card_id", "text"])
+            user_id = get_jwt_identity()
+            text = str(raw_data["text"]).strip()
+            if not text:
+                raise BadRequest("Comment text must not be empty")
+            if not can_view(user_id, card_id=raw_data["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            comment = comment_create(raw_data["card_id"], user_id, text)
+            return ApiResponse.created(comment, request.method)
+        except BadRequest as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def patch(self):
+        """Продвижение комментария на один голос."""
+        try:
+            raw_data = self.validate(["comment_id"])
+            user_id = get_jwt_identity()
+            comment = comment_author(raw_data["comment_id"])
+            if not can_view(user_id, card_id=comment["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            return ApiResponse.success(comment_promote(raw_data["comment_id"]), request.method)
+        except BadRequest as e:
+            logger.error(f"PATCH error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"PATCH error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"PATCH error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"PATCH error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def delete(self):
+        """Удаление комментария автором или редактором проекта."""
+        try:
+            raw_data = self.validate(["comment_id"])
+            user_id = get_jwt_identity()
+            comment = comment_author(raw_data["comment_id"])
+            if str(comment["user_id"]) != str(user_id) and not can_edit(user_id, card_id=comment["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            comment_delete(raw_data["comment_id"])
+            return ApiResponse.success({"message": "Comment deleted"}, request.method)
+        except BadRequest as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class CardFiles(NoneResource):
+    """Ресурс для вложений карточек с возобновляемой загрузкой."""
+    @jwt_required()
+    def get(self):
+        """Список вложений карточки (card_id) или скачивание файла (file_id) с поддержкой Range.
+
+        rendition=thumbnail или rendition=preview отдаёт миниатюру или веб-версию изображения.
+        """
+        try:
+            card_id = request.args.get("card_id", type=int)
+            file_id = request.args.get("file_id", type=int)
+            user_id = get_jwt_identity()
+            if file_id is None:
+                if not card_id:
+                    raise BadRequest("Missing required query parameter: card_id or file_id")
+                if not can_edit(user_id, card_id=card_id):
+                    raise Forbidden("Insufficient permissions")
+                return ApiResponse.success(files_info(card_id), request.method)
+
+            rendition = request.args.get("rendition")
+            if rendition not in (None, "thumbnail", "preview"):
+                raise BadRequest("rendition must be 'thumbnail' or 'preview'")
+            file = file_get(file_id)
+            if not can_edit(user_id, card_id=file["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            if not file["complete"]:
+                raise Conflict("Upload is not complete")
+            if rendition is not None:
+                if file["preview_status"] != "ready":
+                    raise NotFound("Preview is not available")
+                return send_file(
+                    file_location(file["paths"][rendition]),
+                    mimetype="image/jpeg",
+                    download_name=f"{file['name']}.{rendition}.jpg",
+                    conditional=True,
+                    max_age=3600
+                )
+            return send_file(
+                file_location(file["paths"]["original"]),
+                mimetype=file["content_type"],
+                as_attachment=request.args.get("download", type=int) == 1,
+                download_name=file["name"],
+                conditional=True,
+                max_age=0
+            )
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Conflict as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(409, str(e), request.method)
+        except FileNotFoundError as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(404, "File not found", request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def post(self):
+        """Начало загрузки: создание записи вложения, фрагменты передаются через PUT."""
+        try:
+            raw_data = self.validate(["card_id", "name", "size"], ["content_type"])
+            user_id = get_jwt_identity()
+            if not isinstance(raw_data["size"], int) or isinstance(raw_data["size"], bool):
+                raise BadRequest("size must be an integer")
+            if not can_edit(user_id, card_id=raw_data["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            content_type = raw_data["content_type"] or mimetypes.guess_type(raw_data["name"])[0] or "application/octet-stream"
+            file = file_create(raw_data["card_id"], raw_data["name"], raw_data["size"], content_type)
+            create_file(file.pop("paths")["original"])
+            return ApiResponse.created(file, request.method)
+        except BadRequest as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def put(self):
+        """Загрузка фрагмента: тело запроса — байты из Content-Range, записываются на диск потоком.
+
+        Начало фрагмента должно совпадать с received; иначе ответ 409 с текущим состоянием,
+        по которому клиент продолжает загрузку. "Content-Range: bytes */size" без тела
+        возвращает состояние загрузки без записи.
+        """
+        try:
+            file_id = request.args.get("file_id", type=int)
+            user_id = get_jwt_identity()
+            if not file_id:
+                raise BadRequest("Missing required query parameter: file_id")
+            file = file_get(file_id)
+            paths = file.pop("paths")
+            if not can_edit(user_id, card_id=file["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            chunk = parse_content_range(request.headers.get("Content-Range"), file["size"])
+            if chunk is None:
+                return ApiResponse.success(file, request.method)
+            offset, length = chunk
+            if file["complete"] or offset != file["received"]:
+                return ApiResponse.custom(file, 409, request.method)
+            if request.content_length != length:
+                raise BadRequest("Content-Length must match Content-Range")
+
+            release_unit()
+            written = write_chunk(paths["original"], request.stream, offset, length)
+            if written != length:
+                raise BadRequest(f"Incomplete chunk: received {written} of {length} bytes")
+            advanced = file_advance(file_id, offset, length)
+            if advanced is None:
+                current = file_get(file_id)
+                current.pop("paths")
+                return ApiResponse.custom(current, 409, request.method)
+            if advanced["preview_status"] == "pending":
+                get_previews().submit(file_id)
+            return ApiResponse.success(advanced, request.method)
+        except BadRequest as e:
+            logger.error(f"PUT error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"PUT error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"PUT error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"PUT error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def delete(self):
+        """Удаление вложения вместе с файлом на диске."""
+        try:
+            raw_data = self.validate(["file_id"])
+            user_id = get_jwt_identity()
+            file = file_get(raw_data["file_id"])
+            if not can_edit(user_id, card_id=file["card_id"]):
+                raise Forbidden("Insufficient permissions")
+            paths = file_delete(raw_data["file_id"])["paths"].values()
+            # Файлы удаляются с диска только после фиксации удаления записи
+            if not release_unit():
+                raise RuntimeError("File deletion was rolled back")
+            for path in paths:
+                if path is not None:
+                    remove_file(path)
+            return ApiResponse.success({"message": "File deleted"}, request.method)
+        except BadRequest as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"DELETE error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class Chats(NoneResource):
+    """Ресурс для управления чатами проекта."""
+    @jwt_required()
+    def get(self):
+        """Получение чатов проекта; доступно любому коллаборатору."""
+        try:
+            project_id = request.args.get("project_id", type=int)
+            user_id = get_jwt_identity()
+            if not project_id:
+                raise BadRequest("Missing required query parameter: project_id")
+            role = collaborator_role(project_id, user_id)
+            if role is None or role < 1:
+                raise Forbidden("You are not a collaborator of this project")
+            return ApiResponse.success(chats_info(project_id), request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def post(self):
+        """Создание чата проекта."""
+        try:
+            raw_data = self.validate(["project_id", "title"])
+            user_id = get_jwt_identity()
+            if not can_edit(user_id, project_id=raw_data["project_id"]):
+                raise Forbidden("Insufficient permissions")
+            chat = chat_create(raw_data["project_id"], raw_data["title"])
+            return ApiResponse.created(chat, request.method)
+        except BadRequest as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class ChatMessages(NoneResource):
+    """Ресурс для сообщений чата."""
+    @jwt_required()
+    def get(self):
+        """История чата от новых к старым (cursor, limit) или сообщения после since по возрастанию."""
+        try:
+            chat_id = request.args.get("chat_id", type=int)
+            user_id = get_jwt_identity()
+            if not chat_id:
+                raise BadRequest("Missing required query parameter: chat_id")
+            if not chat_member(user_id, chat_id):
+                raise Forbidden("You are not a member of this chat")
+            since = request.args.get("since", type=int)
+            if since is not None:
+                return ApiResponse.success(messages_since(chat_id, since, request.args.get("limit", type=int)), request.method)
+            return ApiResponse.success(messages_page(chat_id, request.args.get("cursor"), request.args.get("limit", type=int)), request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+    @jwt_required()
+    def post(self):
+        """Отправка сообщения; запись выполняется пакетами вместе с сообщениями других запросов."""
+        try:
+            raw_data = self.validate(["chat_id", "text"])
+            user_id = get_jwt_identity()
+            chat_id = raw_data["chat_id"]
+            if not isinstance(chat_id, int) or isinstance(chat_id, bool):
+                raise BadRequest("chat_id must be an integer")
+            text = str(raw_data["text"]).strip()
+            if not text:
+                raise BadRequest("Message text must not be empty")
+            if len(text) > CHAT_MESSAGE_MAX:
+                raise BadRequest(f"Message exceeds {CHAT_MESSAGE_MAX} characters")
+            if "\x00" in text:
+                raise BadRequest("Message text must not contain NUL characters")
+            if not chat_member(user_id, chat_id):
+                raise Forbidden("You are not a member of this chat")
+            release_unit()
+            message = get_batcher().submit(chat_id, user_id, text)
+            return ApiResponse.created(message, request.method)
+        except BadRequest as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except ServiceUnavailable as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(503, e.description, request.method)
+        except Exception as e:
+            logger.error(f"POST error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class ChatStream(NoneResource):
+    """Ресурс потока сообщений чата Server-Sent Events."""
+    @jwt_required()
+    def get(self):
+        """Подписка на новые сообщения чата.
+
+        Last-Event-ID (или since) — id последнего полученного сообщения, пропущенные досылаются первыми.
+        """
+        try:
+            chat_id = request.args.get("chat_id", type=int)
+            user_id = get_jwt_identity()
+            if not chat_id:
+                raise BadRequest("Missing required query parameter: chat_id")
+            if not chat_member(user_id, chat_id):
+                raise Forbidden("You are not a member of this chat")
+            last_id = request.headers.get("Last-Event-ID", type=int)
+            if last_id is None:
+                last_id = request.args.get("since", type=int)
+            events = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+            subscription = get_listener().subscribe(CHAT_CHANNEL, chat_id, lambda data: offer(events, data))
+            try:
+                backlog = messages_since(chat_id, last_id) if last_id is not None else []
+            except Exception:
+                subscription.close()
+                raise
+            return Response(
+                message_events(chat_id, subscription, events, backlog, last_id),
+                mimetype="text/event-stream",
+                headers=SSE_HEADERS
+            )
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except NotFound as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(404, str(e), request.method)
+        except Forbidden as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(403, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class Search(NoneResource):
+    """Ресурс полнотекстового поиска по проектам и карточкам."""
+    @jwt_required()
+    def get(self):
+        """Поиск по словам в названиях и описаниях с подсветкой совпадений."""
+        try:
+            user_id = get_jwt_identity()
+            query = request.args.get("q")
+            if not query:
+                raise BadRequest("Missing required query parameter: q")
+            results = search(
+                user_id, query,
+                request.args.get("scope", "projects"),
+                request.args.get("cursor"),
+                request.args.get("limit", type=int)
+            )
+            return ApiResponse.success(results, request.method)
+        except BadRequest as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(400, str(e), request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
+class Metrics(NoneResource):
+    """Ресурс для получения внутренних метрик сервера."""
+    @jwt_required()
+    def get(self):
+        """Получение статистики пула соединений, кэшей, слушателя событий и фоновых пулов."""
+        try:
+            return ApiResponse.success({
+                "pool": pool_stats(),
+                "cache": cache_stats(),
+                "listener": listener_stats(),
+                "hub": hub_stats(),
+                "previews": previews_stats(),
+                "chat": chat_stats(),
+                "hashing": hash_stats(),
+                "logging": logging_stats()
+            }, request.method)
+        except Exception as e:
+            logger.error(f"GET error: {str(e)}")
+            return ApiResponse.error(500, str(e), request.method)
+
 __all__ = [
-    "Users", "Auth", "Refresh", "Projects",
-    "Collaborators", "Boards", "Cards", "Notification",
-    "ProjectTags", "CardTags"
+    "Users", "Auth", "Refresh", "Projects", "ProjectSnapshot", "ProjectSync", "ProjectDiscover",
+    "Collaborators", "Boards", "Cards", "CardsBulk", "Notification", "NotificationUnread", "NotificationStream",
+    "ProjectTags", "CardTags", "CardComments", "CardFiles", "Chats", "ChatMessages", "ChatStream", "Search", "Metrics"
 ]
\ No newline at end of file
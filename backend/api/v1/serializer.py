@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+from flask import make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def default(value: Any) -> Any:
+    """Преобразование типов, которые не сериализуются в JSON напрямую."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_orjson(data: Any) -> bytes:
+    """Сериализация через orjson: datetime и date кодируются на стороне C."""
+    return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+def dumps_json(data: Any) -> bytes:
+    """Сериализация стандартным модулем json с теми же правилами преобразования типов."""
+    return (json.dumps(data, default=default, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {"json": dumps_json}
+if orjson is not None:
+    SERIALIZERS["orjson"] = dumps_orjson
+
+_dumps: Callable[[Any], bytes] = SERIALIZERS.get("orjson", dumps_json)
+
+def set_serializer(name: Optional[str] = None) -> str:
+    """Выбор сериализатора по имени; без имени — самый быстрый из доступных."""
+    global _dumps
+    if name is None:
+        name = "orjson" if "orjson" in SERIALIZERS else "json"
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown or unavailable JSON serializer: {name}")
+    _dumps = SERIALIZERS[name]
+    return name
+
+def dumps(data: Any) -> bytes:
+    """Сериализация тела ответа выбранным сериализатором."""
+    return _dumps(data)
+
+def output_json(data: Any, code: int, headers: Optional[dict] = None):
+    """Представление application/json для flask_restful."""
+    response = make_response(dumps(data), code)
+    response.headers["Content-Type"] = "application/json"
+    response.headers.extend(headers or {})
+    return response
+
+def init_serializer(api, name: Optional[str] = None) -> str:
+    """Подключение сериализатора к flask_restful.Api."""
+    name = set_serializer(name)
+    api.representations["application/json"] = output_json
+    return name
+
+__all__ = ["default", "dumps", "output_json", "set_serializer", "init_serializer", "SERIALIZERS"]
@@ -1,2 +1,100 @@
-PASSWORD = "root"
-PORT = "1111"
\ No newline at end of file
+import os
+
+# Подключение к базе данных
+HOST = os.environ.get("DB_HOST", "localhost")
+USER = os.environ.get("DB_USER", "postgres")
+PASSWORD = os.environ.get("DB_PASSWORD", "root")
+PORT = os.environ.get("DB_PORT", "1111")
+DATABASE = os.environ.get("DB_NAME", "nonefolio")
+
+# Пул соединений
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN", 2))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX", 10))
+POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_OVERFLOW", 5))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5.0))
+POOL_RECYCLE = float(os.environ.get("DB_POOL_RECYCLE", 1800.0))
+POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", 30.0))
+
+# Кэши прав доступа и принадлежности карточек/досок
+PERMISSION_CACHE_SIZE = int(os.environ.get("PERMISSION_CACHE_SIZE", 10000))
+PERMISSION_CACHE_TTL = float(os.environ.get("PERMISSION_CACHE_TTL", 30.0))
+RESOLUTION_CACHE_SIZE = int(os.environ.get("RESOLUTION_CACHE_SIZE", 50000))
+RESOLUTION_CACHE_TTL = float(os.environ.get("RESOLUTION_CACHE_TTL", 300.0))
+# Версии пользователей для обновления токенов; TTL ограничивает устаревание в других процессах
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 50000))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60.0))
+
+# Постраничная выдача
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", 50))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 200))
+
+# Пакетные операции с карточками
+BULK_MAX_OPERATIONS = int(os.environ.get("BULK_MAX_OPERATIONS", 500))
+
+# События LISTEN/NOTIFY и потоки Server-Sent Events
+NOTIFICATION_CHANNEL = os.environ.get("NOTIFICATION_CHANNEL", "notifications")
+LISTENER_RECONNECT = float(os.environ.get("LISTENER_RECONNECT", 5.0))
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", 100))
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", 15.0))
+
+# Полнотекстовый поиск; конфигурация должна совпадать со столбцами search в bds.sql
+SEARCH_CONFIG = "russian"
+SEARCH_HEADLINE_OPTIONS = os.environ.get("SEARCH_HEADLINE_OPTIONS", "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5")
+
+# Поиск проектов по тегам
+DISCOVER_MAX_TAGS = int(os.environ.get("DISCOVER_MAX_TAGS", 10))
+DISCOVER_FACETS = int(os.environ.get("DISCOVER_FACETS", 20))
+
+# Лента изменений проекта
+SYNC_PAGE_SIZE = int(os.environ.get("SYNC_PAGE_SIZE", 500))
+
+# Рассылка изменений проектов по WebSocket
+PROJECT_CHANNEL = os.environ.get("PROJECT_CHANNEL", "project_changes")
+SOCKET_QUEUE_SIZE = int(os.environ.get("SOCKET_QUEUE_SIZE", 256))
+
+# Вложения карточек: каталог хранения, предельный размер файла и одного фрагмента загрузки
+UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "uploads"))
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 2 * 1024 ** 3))
+UPLOAD_CHUNK_MAX = int(os.environ.get("UPLOAD_CHUNK_MAX", 64 * 1024 ** 2))
+UPLOAD_BUFFER_SIZE = int(os.environ.get("UPLOAD_BUFFER_SIZE", 1024 ** 2))
+
+# Превью вложений: пул процессов, очередь заданий, размеры миниатюры и веб-версии
+PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS", min(4, os.cpu_count() or 1)))
+PREVIEW_QUEUE_SIZE = int(os.environ.get("PREVIEW_QUEUE_SIZE", 1000))
+PREVIEW_THUMBNAIL_SIZE = int(os.environ.get("PREVIEW_THUMBNAIL_SIZE", 256))
+PREVIEW_WEB_SIZE = int(os.environ.get("PREVIEW_WEB_SIZE", 1280))
+PREVIEW_MAX_PIXELS = int(os.environ.get("PREVIEW_MAX_PIXELS", 50_000_000))
+# Захваченное процессом задание превью считается брошенным через PREVIEW_CLAIM_TIMEOUT секунд;
+# база пересканируется не реже чем раз в PREVIEW_RESCAN_INTERVAL секунд
+PREVIEW_CLAIM_TIMEOUT = float(os.environ.get("PREVIEW_CLAIM_TIMEOUT", 300.0))
+PREVIEW_RESCAN_INTERVAL = float(os.environ.get("PREVIEW_RESCAN_INTERVAL", 60.0))
+PREVIEW_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff")
+
+# Чаты проектов: канал доставки, групповая запись сообщений пакетами
+CHAT_CHANNEL = os.environ.get("CHAT_CHANNEL", "chat_messages")
+CHAT_MESSAGE_MAX = int(os.environ.get("CHAT_MESSAGE_MAX", 4000))
+CHAT_BATCH_SIZE = int(os.environ.get("CHAT_BATCH_SIZE", 200))
+CHAT_BATCH_INTERVAL = float(os.environ.get("CHAT_BATCH_INTERVAL", 0.002))
+CHAT_QUEUE_SIZE = int(os.environ.get("CHAT_QUEUE_SIZE", 10000))
+CHAT_SUBMIT_TIMEOUT = float(os.environ.get("CHAT_SUBMIT_TIMEOUT", 5.0))
+
+# Комментарии карточек: сколько лучших по продвижению отдавать вместе со страницей
+COMMENTS_TOP = int(os.environ.get("COMMENTS_TOP", 3))
+
+# Хеширование паролей в пуле процессов: метод с параметрами стоимости в формате werkzeug
+# ("scrypt:n:r:p" или "pbkdf2:sha256:итерации"); хеши другого метода пересчитываются при входе
+HASH_METHOD = os.environ.get("HASH_METHOD", "scrypt:32768:8:1")
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", 64))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10.0))
+
+# Журналирование: очередь с отдельным потоком вывода, формат "json" или "text",
+# уровни логгеров в виде "api.v1.connect=DEBUG,werkzeug=WARNING"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Выборка частых событий: не больше LOG_SAMPLE_RATE записей в секунду с одной строки кода
+# для уровней не выше LOG_SAMPLE_LEVEL; 0 отключает выборку
+LOG_SAMPLE_LEVEL = os.environ.get("LOG_SAMPLE_LEVEL", "DEBUG")
+LOG_SAMPLE_RATE = int(os.environ.get("LOG_SAMPLE_RATE", 20))
@@ -0,0 +1,110 @@
+import logging
+from typing import Any, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Столбцы, отдаваемые API. Служебные столбцы (например, поисковые tsvector) в выборки не попадают.
+CARD_COLUMNS = ("id", "title", "about", "brief_about", "sell_by", "status", "priority", "external_resource", "board_id", "version")
+PROJECT_COLUMNS = ("id", "title", "description", "created_at", "updated_at", "version")
+BOARD_COLUMNS = ("id", "title", "project_id", "version")
+NOTIFICATION_COLUMNS = ("id", "text", "to_whom", "priority", "checked")
+COMMENT_COLUMNS = ("id", "card_id", "user_id", "text", "promotion", "created_at")
+FILE_COLUMNS = ("id", "card_id", "name", "size", "content_type", "received", "complete", "created_at", "preview_status", "width", "height")
+# Относительные пути вложения в UPLOAD_FOLDER: оригинал, миниатюра и веб-версия
+FILE_PATHS = "path, thumbnail, preview"
+
+def columns(names: Sequence[str], alias: str = "") -> str:
+    """Список столбцов для SELECT/RETURNING с необязательным префиксом таблицы."""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(f"{prefix}{name}" for name in names)
+
+CARDS = columns(CARD_COLUMNS)
+COMMENTS = columns(COMMENT_COLUMNS)
+BOARDS = columns(BOARD_COLUMNS)
+NOTIFICATIONS = columns(NOTIFICATION_COLUMNS)
+
+# Каталог канонических запросов горячих путей connect.py.
+# Каждый запрос готовится (PREPARE) один раз на соединение пула и далее
+# выполняется через EXECUTE без повторного разбора и планирования.
+STATEMENTS: Dict[str, str] = {
+    "collaborator_role": "SELECT role FROM collaborators WHERE project_id = $1 AND user_id = $2",
+    "user_claims": "SELECT version, role, email FROM users WHERE id = $1 AND deleted = FALSE",
+    "card_resolve": "SELECT c.board_id, b.project_id FROM cards c JOIN boards b ON c.board_id = b.id WHERE c.id = $1",
+    "board_resolve": "SELECT project_id FROM boards WHERE id = $1",
+    "boards_by_project": f"SELECT {BOARDS} FROM boards WHERE project_id = $1",
+    "board_by_id": f"SELECT {BOARDS} FROM boards WHERE project_id = $1 AND id = $2",
+    "cards_by_board": f"SELECT {CARDS} FROM cards WHERE board_id = $1",
+    "card_by_id": f"SELECT {CARDS} FROM cards WHERE id = $1",
+    "card_in_board": f"SELECT {CARDS} FROM cards WHERE board_id = $1 AND id = $2",
+    "cards_page": f"SELECT {CARDS} FROM cards WHERE board_id = $1 ORDER BY id LIMIT $2",
+    "cards_page_after": f"SELECT {CARDS} FROM cards WHERE board_id = $1 AND id > $2 ORDER BY id LIMIT $3",
+    "card_update": """
+        UPDATE cards SET
+            title = COALESCE($1, cards.title),
+            about = COALESCE($2, cards.about),
+            brief_about = COALESCE($3, cards.brief_about),
+            sell_by = COALESCE($4, cards.sell_by),
+            status = COALESCE($5, cards.status),
+            priority = COALESCE($6, cards.priority),
+            external_resource = COALESCE($7, cards.external_resource),
+            board_id = COALESCE($8, cards.board_id),
+            version = cards.version + 1
+        FROM (SELECT id, board_id FROM cards WHERE id = $9 FOR UPDATE) AS old
+        WHERE cards.id = old.id
+        RETURNING cards.board_id, old.board_id AS old_board_id
+    """,
+    "files_by_cards": """
+        SELECT id, card_id, name, size, content_type, preview_status, width, height
+        FROM files WHERE card_id = ANY($1) AND complete ORDER BY id
+    """,
+    "chat_resolve": "SELECT project_id FROM chats WHERE id = $1",
+    "messages_page": "SELECT id, chat_id, user_id, text, created_at FROM messages WHERE chat_id = $1 ORDER BY id DESC LIMIT $2",
+    "messages_before": "SELECT id, chat_id, user_id, text, created_at FROM messages WHERE chat_id = $1 AND id < $2 ORDER BY id DESC LIMIT $3",
+    "messages_after": "SELECT id, chat_id, user_id, text, created_at FROM messages WHERE chat_id = $1 AND id > $2 ORDER BY id LIMIT $3",
+    "comments_top": f"SELECT {COMMENTS} FROM comments WHERE card_id = $1 ORDER BY promotion DESC, id DESC LIMIT $2",
+    "comments_page": f"SELECT {COMMENTS} FROM comments WHERE card_id = $1 ORDER BY id DESC LIMIT $2",
+    "comments_before": f"SELECT {COMMENTS} FROM comments WHERE card_id = $1 AND id < $2 ORDER BY id DESC LIMIT $3",
+    "comment_promote": "UPDATE comments SET promotion = promotion + 1 WHERE id = $1 RETURNING id, card_id, promotion",
+    "card_with_titles": f"""
+        SELECT {columns(CARD_COLUMNS, "cards")}, b.title as board_title, p.title as project_title
+        FROM cards
+        JOIN boards b ON cards.board_id = b.id
+        JOIN projects p ON b.project_id = p.id
+        WHERE cards.id = $1
+    """,
+    "project_version": "SELECT version FROM projects WHERE id = $1",
+    "board_version": "SELECT version FROM boards WHERE id = $1",
+    "card_version": "SELECT version FROM cards WHERE id = $1",
+    "notifications": f"SELECT {NOTIFICATIONS} FROM notifications WHERE to_whom = $1 ORDER BY priority DESC, id DESC LIMIT $2",
+    "notifications_after": f"""
+        SELECT {NOTIFICATIONS} FROM notifications
+        WHERE to_whom = $1 AND (priority, id) < ($2, $3)
+        ORDER BY priority DESC, id DESC
+        LIMIT $4
+    """,
+    "notification_by_id": f"SELECT {NOTIFICATIONS} FROM notifications WHERE to_whom = $1 AND id = $2 ORDER BY priority DESC, id DESC LIMIT $3",
+    "notifications_unread": "SELECT count(*) FROM notifications WHERE to_whom = $1 AND checked = false",
+    "notifications_check_all": "UPDATE notifications SET checked = TRUE WHERE to_whom = $1 AND checked = false",
+    "notifications_check_up_to": "UPDATE notifications SET checked = TRUE WHERE to_whom = $1 AND checked = false AND id <= $2",
+}
+
+def execute_prepared(cursor, name: str, params: Sequence[Any] = ()) -> None:
+    """Выполнение запроса из каталога, подготавливая его на соединении при первом использовании.
+
+    Подготовленные запросы живут в сессии Postgres, поэтому набор уже подготовленных
+    имён хранится на самом соединении пула (PooledConnection.prepared).
+    """
+    connect = cursor.connection
+    prepared = getattr(connect, "prepared", None)
+    if prepared is None:
+        raise TypeError("Prepared statements require a pooled connection")
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {STATEMENTS[name]}")
+        prepared.add(name)
+        logger.debug("Prepared statement %s", name)
+    if params:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+__all__ = ["CARD_COLUMNS", "PROJECT_COLUMNS", "BOARD_COLUMNS", "NOTIFICATION_COLUMNS", "COMMENT_COLUMNS", "FILE_COLUMNS", "FILE_PATHS", "columns", "STATEMENTS", "execute_prepared"]
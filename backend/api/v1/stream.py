@@ -0,0 +1,119 @@
+import queue
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from .server import *
+from .serializer import dumps
+from .listener import Subscription
+from .connect import notifications_get, messages_since
+
+# Форматирование Server-Sent Events и поток уведомлений для WSGI-режима.
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(data: Any, event_id: Optional[int] = None, event: Optional[str] = None) -> str:
+    """Одно событие в формате text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {dumps(data).decode().strip()}")
+    return "\n".join(lines) + "\n\n"
+
+def sse_comment(text: str = "ping") -> str:
+    """Комментарий-heartbeat, не доставляемый обработчикам EventSource."""
+    return f": {text}\n\n"
+
+def offer(events: queue.Queue, item: Any) -> None:
+    """Неблокирующая постановка события; при переполнении отбрасывается самое старое."""
+    while True:
+        try:
+            events.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                events.get_nowait()
+            except queue.Empty:
+                pass
+
+class RecentIds:
+    """Ограниченное множество id уже отправленных событий для отсева повторов."""
+    def __init__(self, size: int = STREAM_QUEUE_SIZE * 4):
+        self.size = size
+        self._ids: OrderedDict = OrderedDict()
+
+    def add(self, event_id: int) -> bool:
+        """Запоминание id; False, если событие с этим id уже отправлялось."""
+        if event_id in self._ids:
+            return False
+        self._ids[event_id] = None
+        if len(self._ids) > self.size:
+            self._ids.popitem(last=False)
+        return True
+
+def id_events(
+    event: str,
+    subscription: Subscription,
+    events: queue.Queue,
+    backlog: List[Dict[str, Any]],
+    last_id: Optional[int],
+    fetch: Callable[[int], Optional[Dict[str, Any]]]
+) -> Iterator[str]:
+    """Поток событий: сначала пропущенные после last_id, затем новые в порядке фиксации.
+
+    Транзакции разных процессов фиксируются не в порядке id, поэтому события отдаются
+    по мере поступления, а отсеиваются только уже отправленные id; клиент упорядочивает
+    и дедуплицирует по id. fetch(id) загружает полное событие, если уведомление пришло усечённым (partial).
+    """
+    sent = RecentIds()
+    try:
+        yield "retry: 3000\n\n"
+        for item in backlog:
+            sent.add(item["id"])
+            yield sse_event(item, item["id"], event)
+        while True:
+            try:
+                item = events.get(timeout=STREAM_HEARTBEAT)
+            except queue.Empty:
+                yield sse_comment()
+                continue
+            if not sent.add(item["id"]):
+                continue
+            if item.get("partial"):
+                item = fetch(item["id"])
+                if item is None:
+                    continue
+            yield sse_event(item, item["id"], event)
+    finally:
+        subscription.close()
+        logger.debug("Stream closed: event=%s, key=%s", event, subscription.key)
+
+def notification_events(
+    user_id: str,
+    subscription: Subscription,
+    events: queue.Queue,
+    backlog: List[Dict[str, Any]],
+    last_id: Optional[int] = None
+) -> Iterator[str]:
+    """Поток уведомлений пользователя."""
+    def fetch(notification_id: int) -> Optional[Dict[str, Any]]:
+        found = notifications_get(user_id, notification_id, limit=1)
+        return found[0] if found else None
+    return id_events("notification", subscription, events, backlog, last_id, fetch)
+
+def message_events(
+    chat_id: int,
+    subscription: Subscription,
+    events: queue.Queue,
+    backlog: List[Dict[str, Any]],
+    last_id: Optional[int] = None
+) -> Iterator[str]:
+    """Поток сообщений чата."""
+    def fetch(message_id: int) -> Optional[Dict[str, Any]]:
+        found = messages_since(chat_id, message_id - 1, limit=1)
+        return found[0] if found and found[0]["id"] == message_id else None
+    return id_events("message", subscription, events, backlog, last_id, fetch)
+
+__all__ = ["SSE_HEADERS", "RecentIds", "sse_event", "sse_comment", "offer", "id_events", "notification_events", "message_events"]
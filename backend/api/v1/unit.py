@@ -0,0 +1,120 @@
+import logging
+from typing import Optional, List, Callable
+import psycopg2
+from flask import Flask, g, has_request_context, make_response, request, current_app
+from .pool import get_pool, ConnectionPool, PooledConnection
+from .classes import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+class SharedConnection:
+    """Соединение единицы работы: commit откладывается до конца запроса, rollback откатывает весь запрос."""
+    def __init__(self, unit: "UnitOfWork"):
+        self._unit = unit
+
+    def cursor(self, *args, **kwargs):
+        return self._unit.connect.cursor(*args, **kwargs)
+
+    def commit(self) -> None:
+        """Фиксация выполняется один раз в конце запроса."""
+
+    def rollback(self) -> None:
+        self._unit.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._unit.connect, name)
+
+class UnitOfWork:
+    """Одно соединение и одна транзакция на весь HTTP-запрос."""
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.connect: Optional[PooledConnection] = None
+        self.failed = False
+        self.callbacks: List[Callable[[], None]] = []
+
+    def acquire(self) -> SharedConnection:
+        """Получение соединения запроса; из пула берётся только при первом обращении."""
+        if self.connect is None:
+            self.connect = self.pool.getconn()
+        return SharedConnection(self)
+
+    def rollback(self) -> None:
+        """Откат транзакции запроса; последующие изменения тоже не будут зафиксированы."""
+        self.failed = True
+        if self.connect is not None:
+            self.connect.rollback()
+
+    def after_finish(self, callback: Callable[[], None]) -> None:
+        """Регистрация действия, выполняемого после завершения транзакции."""
+        self.callbacks.append(callback)
+
+    def finish(self, commit: bool) -> bool:
+        """Фиксация или откат транзакции и возврат соединения в пул; True, если изменения зафиксированы."""
+        committed = commit and not self.failed
+        try:
+            if self.connect is not None:
+                try:
+                    if committed:
+                        self.connect.commit()
+                    else:
+                        self.connect.rollback()
+                finally:
+                    self.pool.putconn(self.connect)
+                    self.connect = None
+        finally:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+        return committed
+
+def current_unit() -> Optional[UnitOfWork]:
+    """Единица работы текущего запроса, создаётся лениво при первом обращении к базе."""
+    if not has_request_context() or not current_app.extensions.get("unit_of_work"):
+        return None
+    if g.get("unit_of_work_done"):
+        return None
+    unit = g.get("unit_of_work")
+    if unit is None:
+        unit = UnitOfWork(get_pool())
+        g.unit_of_work = unit
+    return unit
+
+def release_unit() -> bool:
+    """Досрочное завершение единицы работы запроса с фиксацией.
+
+    Для долгих запросов (например, потоковой загрузки файла), которые не должны держать
+    соединение пула: последующие обращения к базе в этом запросе берут соединение на время вызова.
+    Возвращает False, если транзакция запроса была откачена из-за ошибки.
+    """
+    if not has_request_context():
+        return True
+    g.unit_of_work_done = True
+    unit = g.pop("unit_of_work", None)
+    if unit is not None:
+        return unit.finish(commit=True)
+    return True
+
+def init_unit_of_work(app: Flask) -> None:
+    """Подключение единицы работы к жизненному циклу запроса приложения."""
+    app.extensions["unit_of_work"] = True
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        g.unit_of_work_done = True
+        unit = g.pop("unit_of_work", None)
+        if unit is None:
+            return response
+        try:
+            unit.finish(commit=response.status_code < 400)
+        except psycopg2.Error as e:
+            logger.error(f"Commit failed: {str(e)}")
+            return make_response(ApiResponse.error(500, "Transaction commit failed", request.method))
+        return response
+
+    @app.teardown_request
+    def release_unit_of_work(exc):
+        unit = g.pop("unit_of_work", None)
+        if unit is not None:
+            unit.finish(commit=False)
+
+__all__ = ["UnitOfWork", "SharedConnection", "current_unit", "release_unit", "init_unit_of_work"]
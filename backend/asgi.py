@@ -0,0 +1,73 @@
+from a2wsgi import WSGIMiddleware
+from run import app
+from config import CORS_ORIGIN
+from api.v1 import aconnect
+from api.v1.aresource import AsyncRequest, ROUTES, STREAMS, SOCKETS, dispatch, send_json
+
+# ASGI-точка входа: uvicorn asgi:application --workers 4
+# Маршруты из ROUTES, потоки из STREAMS и веб-сокеты из SOCKETS обслуживаются нативно в цикле событий,
+# остальные передаются WSGI-приложению Flask в пул из WSGI_THREADS потоков.
+WSGI_THREADS = 32
+
+class Application:
+    """ASGI-приложение, объединяющее асинхронные маршруты и WSGI-приложение Flask."""
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] == "websocket":
+            handler = SOCKETS.get(scope["path"])
+            if handler is None:
+                await send({"type": "websocket.close", "code": 4404})
+                return
+            await handler(AsyncRequest(scope, self.flask_app), receive, send)
+            return
+        if scope["type"] == "http":
+            stream = STREAMS.get((scope["method"], scope["path"]))
+            if stream is not None:
+                request = AsyncRequest(scope, self.flask_app)
+                await stream(request, receive, send, self.cors_headers(request))
+                return
+            handler = ROUTES.get((scope["method"], scope["path"]))
+            if handler is not None:
+                request = AsyncRequest(scope, self.flask_app)
+                body, status, *extra = await dispatch(handler, request)
+                headers = self.cors_headers(request)
+                if extra:
+                    headers.update(extra[0])
+                await send_json(send, body, status, headers)
+                return
+        await self.wsgi(scope, receive, send)
+
+    def cors_headers(self, request: AsyncRequest) -> dict:
+        """CORS-заголовки нативных маршрутов, совпадающие с настройкой flask_cors в run.py."""
+        if request.headers.get("origin") != CORS_ORIGIN:
+            return {}
+        return {
+            "Access-Control-Allow-Origin": CORS_ORIGIN,
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Expose-Headers": "Authorization",
+            "Vary": "Origin"
+        }
+
+    async def lifespan(self, receive, send):
+        """Открытие и закрытие асинхронного пула вместе с процессом."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await aconnect.get_pool()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await aconnect.close_pool()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+application = Application(app)
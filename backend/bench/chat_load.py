@@ -0,0 +1,115 @@
+"""Нагрузочный бенчмарк чатов: устойчивый поток сообщений через POST /api/v1/chats/messages.
+
+Запуск из каталога backend:
+
+    python -m bench.chat_load
+    python -m bench.chat_load --senders 64 --duration 20 --batch-sizes 1 50 200
+
+Поднимает временный Postgres, запускает приложение из run.py и в течение --duration
+секунд отправляет сообщения из --senders потоков в --chats чатов. Для каждого размера
+пакета групповой записи (1 — фиксация на каждое сообщение) печатает сообщения в секунду,
+задержку отправки, задержку доставки подписчику канала и средний размер пакета.
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .database import TemporaryPostgres
+from .endpoints import PASSWORD, Client, percentile, seed
+
+def run_level(client: Client, token: str, chat_ids: List[int], senders: int, duration: float) -> Dict[str, Any]:
+    """Прогон одного режима: отправка до истечения duration и сбор задержек доставки."""
+    from api.v1.listener import get_listener
+    from api.v1.server import CHAT_CHANNEL
+
+    lock = threading.Lock()
+    sent: Dict[str, float] = {}
+    delivered: List[float] = []
+
+    def receive(message: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        with lock:
+            started = sent.get(message.get("text"))
+            if started is not None:
+                delivered.append((now - started) * 1000)
+
+    subscriptions = [get_listener().subscribe(CHAT_CHANNEL, chat_id, receive) for chat_id in chat_ids]
+    time.sleep(1.0)
+    deadline = time.perf_counter() + duration
+
+    def send(number: int) -> List[float]:
+        latencies = []
+        chat_id = chat_ids[number % len(chat_ids)]
+        sequence = 0
+        while time.perf_counter() < deadline:
+            sequence += 1
+            text = f"message {number}:{sequence}"
+            started = time.perf_counter()
+            with lock:
+                sent[text] = started
+            status, _, _ = client.request("POST", "/api/v1/chats/messages", {"chat_id": chat_id, "text": text}, token)
+            if status == 201:
+                latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=senders) as executor:
+        latencies = [latency for result in executor.map(send, range(senders)) for latency in result]
+    elapsed = time.perf_counter() - started
+    time.sleep(1.0)
+    for subscription in subscriptions:
+        subscription.close()
+
+    return {
+        "rate": round(len(latencies) / elapsed, 1),
+        "p50": round(percentile(latencies, 0.50), 2) if latencies else 0.0,
+        "p95": round(percentile(latencies, 0.95), 2) if latencies else 0.0,
+        "p99": round(percentile(latencies, 0.99), 2) if latencies else 0.0,
+        "delivery_p95": round(percentile(delivered, 0.95), 2) if delivered else 0.0,
+        "delivered": round(len(delivered) / len(latencies), 4) if latencies else 0.0
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Chat message throughput benchmark")
+    parser.add_argument("--senders", type=int, default=32, help="concurrent sending threads")
+    parser.add_argument("--chats", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per batch size")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 200])
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    with TemporaryPostgres():
+        from werkzeug.serving import make_server
+        from api.v1 import connect
+        from api.v1.chat import chat_stats, configure_batcher
+        from api.v1.pool import configure_pool
+        configure_pool(max_size=args.senders + 4, max_overflow=0)
+        from run import app
+
+        data = seed(1, 1)
+        chat_ids = [connect.chat_create(data["project_ids"][0], f"Chat {number}")["id"] for number in range(args.chats)]
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = Client(server.server_port)
+        try:
+            _, body, _ = client.request("POST", "/api/v1/users/auth", {"email": "owner@bench.local", "password": PASSWORD})
+            token = body["data"]["access_token"]
+            for batch_size in args.batch_sizes:
+                configure_batcher(batch_size=batch_size)
+                row = run_level(client, token, chat_ids, args.senders, args.duration)
+                stats = chat_stats()
+                print(f"batch<={batch_size:<5} {row['rate']:>9.1f} msg/s p50={row['p50']:>7.2f}ms p95={row['p95']:>7.2f}ms "
+                      f"p99={row['p99']:>7.2f}ms delivery p95={row['delivery_p95']:>7.2f}ms "
+                      f"delivered={row['delivered']:.2%} avg batch={stats.get('avg_batch', 0)}")
+        finally:
+            server.shutdown()
+            configure_batcher()
+            configure_pool()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
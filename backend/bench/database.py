@@ -0,0 +1,75 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+# Временный локальный Postgres для бенчмарков: отдельный кластер во временном каталоге.
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "bds.sql")
+
+def free_port() -> int:
+    """Свободный TCP-порт на localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def pg_binary(name: str) -> str:
+    """Путь к утилите Postgres из PATH или каталога pg_config --bindir."""
+    path = shutil.which(name)
+    if path:
+        return path
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.check_output([pg_config, "--bindir"], text=True).strip()
+        candidate = os.path.join(bindir, name)
+        if os.path.exists(candidate):
+            return candidate
+    raise RuntimeError(f"Postgres utility {name} not found; install PostgreSQL server binaries")
+
+class TemporaryPostgres:
+    """Кластер Postgres, создаваемый на время бенчмарка и удаляемый после него."""
+    def __init__(self, password: str = "bench", database: str = "nonefolio"):
+        self.password = password
+        self.database = database
+        self.port = free_port()
+        self.directory = tempfile.mkdtemp(prefix="nonefolio-bench-")
+        self.data = os.path.join(self.directory, "data")
+
+    def __enter__(self) -> "TemporaryPostgres":
+        password_file = os.path.join(self.directory, "password")
+        with open(password_file, "w") as file:
+            file.write(self.password)
+        subprocess.run(
+            [pg_binary("initdb"), "-D", self.data, "-U", "postgres", "-A", "md5", f"--pwfile={password_file}"],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        subprocess.run(
+            [pg_binary("pg_ctl"), "-D", self.data, "-l", os.path.join(self.directory, "log"), "-w",
+             "-o", f"-p {self.port} -k {self.directory} -c max_connections=200 -c fsync=off", "start"],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        env = {**os.environ, "PGPASSWORD": self.password}
+        psql = [pg_binary("psql"), "-h", "localhost", "-p", str(self.port), "-U", "postgres", "-v", "ON_ERROR_STOP=1", "-q"]
+        subprocess.run(psql + ["-c", f"CREATE DATABASE {self.database}"], check=True, env=env)
+        subprocess.run(psql + ["-d", self.database, "-f", SCHEMA], check=True, env=env, stdout=subprocess.DEVNULL)
+        self.export()
+        return self
+
+    def export(self) -> None:
+        """Передача параметров подключения в api.v1.server через переменные окружения."""
+        os.environ.update({
+            "DB_HOST": "localhost",
+            "DB_USER": "postgres",
+            "DB_PASSWORD": self.password,
+            "DB_PORT": str(self.port),
+            "DB_NAME": self.database
+        })
+
+    def __exit__(self, *exc_info) -> None:
+        subprocess.run(
+            [pg_binary("pg_ctl"), "-D", self.data, "-m", "immediate", "-w", "stop"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        time.sleep(0.1)
+        shutil.rmtree(self.directory, ignore_errors=True)
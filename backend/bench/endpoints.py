@@ -0,0 +1,251 @@
+"""Нагрузочный бенчмарк эндпоинтов API с контролем регрессий.
+
+Запуск из каталога backend:
+
+    python -m bench.endpoints                      # сравнить с bench/baseline.json
+    python -m bench.endpoints --save-baseline      # записать новый базовый уровень
+
+Поднимает временный Postgres со схемой bds.sql, заполняет его данными, запускает
+приложение из run.py и нагружает каждый ресурс с фиксированной конкурентностью.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .database import TemporaryPostgres
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PASSWORD = "bench-password"
+
+class QueryCounter:
+    """Счётчик SQL-запросов, выполненных всеми соединениями пула."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, amount: int = 1) -> None:
+        with self._lock:
+            self.count += amount
+
+    def reset(self) -> int:
+        with self._lock:
+            count, self.count = self.count, 0
+            return count
+
+COUNTER = QueryCounter()
+
+def counting_connection_factory():
+    """Класс соединения пула, курсоры которого считают выполненные запросы."""
+    import psycopg2.extensions
+    from api.v1.pool import PooledConnection
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def execute(self, query, vars=None):
+            COUNTER.add()
+            return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            COUNTER.add()
+            return super().executemany(query, vars_list)
+
+    class CountingConnection(PooledConnection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.cursor_factory = CountingCursor
+
+    return CountingConnection
+
+class Client:
+    """Минимальный HTTP-клиент к запущенному серверу."""
+    def __init__(self, port: int):
+        self.port = port
+
+    def request(self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None) -> Tuple[int, Any, Dict[str, str]]:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        headers = {}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        try:
+            connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = connection.getresponse()
+            raw = response.read()
+            return response.status, json.loads(raw) if raw else None, dict(response.getheaders())
+        finally:
+            connection.close()
+
+def seed(projects: int, cards_per_board: int) -> Dict[str, Any]:
+    """Заполнение базы: владелец, участник, проекты с досками, карточками, тегами и уведомлениями."""
+    from werkzeug.security import generate_password_hash
+    from api.v1 import connect
+
+    owner_id = connect.user_registration("owner@bench.local", generate_password_hash(PASSWORD))
+    member_id = connect.user_registration("member@bench.local", generate_password_hash(PASSWORD))
+    project_ids, board_ids, card_ids = [], [], []
+    for number in range(projects):
+        project = connect.project_create(f"Bench {number}", "Benchmark project " * 8, owner_id)
+        project_ids.append(project["id"])
+        board_ids.extend(board["id"] for board in project["boards"])
+        connect.collaborators_add(project["id"], member_id, 1)
+        connect.project_tags_insert(["python", "flask", f"tag{number % 5}"], project["id"])
+        for board in project["boards"]:
+            for card in range(cards_per_board):
+                created = connect.cards_create(board["id"], f"Card {card}", "Benchmark card text " * 10, priority=card % 3)
+                card_ids.append(created["id"])
+                if number == 0:
+                    for comment in range(5):
+                        comment_id = connect.comment_create(created["id"], member_id, f"Comment {comment}")["id"]
+                        for _ in range(comment):
+                            connect.comment_promote(comment_id)
+    for number in range(50):
+        connect.notification_create(owner_id, f"Notification {number}", number % 3)
+    return {"owner_id": owner_id, "member_id": member_id, "project_ids": project_ids, "board_ids": board_ids, "card_ids": card_ids}
+
+def scenarios(data: Dict[str, Any]) -> List[Tuple[str, Callable[[int], Tuple[str, str, Optional[dict], Optional[str]]]]]:
+    """Сценарии по одному на зарегистрированный ресурс: (имя, построитель запроса)."""
+    project_id = data["project_ids"][0]
+    board_id = data["board_ids"][0]
+    return [
+        ("Users.get", lambda n: ("GET", "/api/v1/users", None, "access")),
+        ("Users.post", lambda n: ("POST", "/api/v1/users", {"email": f"user{n}-{time.time_ns()}@bench.local", "password": PASSWORD}, None)),
+        ("Auth.post", lambda n: ("POST", "/api/v1/users/auth", {"email": "owner@bench.local", "password": PASSWORD}, None)),
+        ("Refresh.post", lambda n: ("POST", "/api/v1/refresh", None, "refresh")),
+        ("Projects.get", lambda n: ("GET", "/api/v1/projects", None, "access")),
+        ("Projects.get:id", lambda n: ("GET", f"/api/v1/projects?project_id={project_id}", None, None)),
+        ("ProjectSnapshot.get", lambda n: ("GET", f"/api/v1/projects/snapshot?project_id={project_id}", None, "access")),
+        ("Collaborators.patch", lambda n: ("PATCH", "/api/v1/projects/collaborators", {"project_id": project_id, "user_id": data["member_id"], "role": 1}, "access")),
+        ("Boards.get", lambda n: ("GET", f"/api/v1/projects/boards?project_id={project_id}", None, "access")),
+        ("Cards.get", lambda n: ("GET", f"/api/v1/projects/cards?board_id={board_id}", None, "access")),
+        ("Cards.get:page", lambda n: ("GET", f"/api/v1/projects/cards?board_id={board_id}&limit=20", None, "access")),
+        ("Search.get:projects", lambda n: ("GET", "/api/v1/search?q=benchmark&scope=projects&limit=20", None, "access")),
+        ("Search.get:cards", lambda n: ("GET", "/api/v1/search?q=benchmark%20card&scope=cards&limit=20", None, "access")),
+        ("ProjectDiscover.get", lambda n: ("GET", "/api/v1/projects/discover?tags=python,flask&mode=and&limit=20", None, None)),
+        ("CardComments.get", lambda n: ("GET", f"/api/v1/projects/cards/comments?card_id={data['card_ids'][0]}&limit=20", None, "access")),
+        ("CardComments.get:board", lambda n: ("GET", f"/api/v1/projects/cards/comments?board_id={board_id}", None, "access")),
+        ("ProjectTags.get", lambda n: ("GET", f"/api/v1/projects/tags?project_id={project_id}", None, "access")),
+        ("Notification.get", lambda n: ("GET", "/api/v1/notification", None, "access")),
+        ("NotificationUnread.get", lambda n: ("GET", "/api/v1/notification/unread", None, "access")),
+    ]
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Перцентиль по отсортированной выборке."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+def run_scenario(client: Client, tokens: Dict[str, str], build: Callable, requests: int, concurrency: int, warmup: int) -> Dict[str, float]:
+    """Прогон одного сценария: задержки, пропускная способность и запросы к БД на HTTP-запрос."""
+    def call(number: int) -> Tuple[float, int]:
+        method, path, body, token = build(number)
+        started = time.perf_counter()
+        status, _, _ = client.request(method, path, body, tokens.get(token) if token else None)
+        return time.perf_counter() - started, status
+
+    for number in range(warmup):
+        call(-number - 1)
+    COUNTER.reset()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    queries = COUNTER.reset()
+
+    latencies = [latency * 1000 for latency, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        "p50": round(percentile(latencies, 0.50), 3),
+        "p95": round(percentile(latencies, 0.95), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "rps": round(requests / elapsed, 1),
+        "queries_per_request": round(queries / requests, 2),
+        "errors": errors
+    }
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Поиск регрессий относительно базового уровня."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["p95"] > base["p95"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95']}ms > baseline {base['p95']}ms (+{threshold:.0%})")
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['rps']} rps < baseline {base['rps']} rps (-{threshold:.0%})")
+        if current["queries_per_request"] > base["queries_per_request"] + 0.01:
+            regressions.append(f"{name}: {current['queries_per_request']} queries/request > baseline {base['queries_per_request']}")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} error responses > baseline {base.get('errors', 0)}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API endpoint benchmark")
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=25, help="cards per board")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative latency/throughput regression")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.disable(getattr(logging, args.log_level.upper()))
+    with TemporaryPostgres():
+        from werkzeug.serving import make_server
+        from api.v1.pool import configure_pool
+        configure_pool(connection_factory=counting_connection_factory(), max_size=args.concurrency + 2, max_overflow=0)
+        from run import app
+
+        data = seed(args.projects, args.cards)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = Client(server.server_port)
+        try:
+            _, body, headers = client.request("POST", "/api/v1/users/auth", {"email": "owner@bench.local", "password": PASSWORD})
+            cookie = headers.get("Set-Cookie", "")
+            tokens = {
+                "access": body["data"]["access_token"],
+                "refresh": cookie.split("refresh_token=", 1)[1].split(";", 1)[0]
+            }
+
+            results = {}
+            for name, build in scenarios(data):
+                if args.only and name not in args.only:
+                    continue
+                results[name] = run_scenario(client, tokens, build, args.requests, args.concurrency, args.warmup)
+                row = results[name]
+                print(f"{name:<22} p50={row['p50']:>8.2f}ms p95={row['p95']:>8.2f}ms p99={row['p99']:>8.2f}ms "
+                      f"rps={row['rps']:>8.1f} queries/req={row['queries_per_request']:>5.2f} errors={row['errors']}")
+        finally:
+            server.shutdown()
+            configure_pool()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Бенчмарк влияния журналирования на задержку запросов.
+
+Запуск из каталога backend:
+
+    python -m bench.logging_bench
+    python -m bench.logging_bench --requests 2000 --concurrency 16 --only Cards.get ProjectSnapshot.get
+
+Поднимает временный Postgres и прогоняет горячие сценарии из bench.endpoints в режимах:
+off — журнал отключён; sync — прежняя синхронная запись в поток обработчиком basicConfig;
+queue — очередь api.v1.logs с JSON-записями на уровне INFO; queue-debug — то же на уровне
+DEBUG с выборкой частых событий. Вывод журнала направляется в --sink (по умолчанию /dev/null).
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from .database import TemporaryPostgres
+from .endpoints import PASSWORD, Client, run_scenario, scenarios, seed
+
+MODES = ("off", "sync", "queue", "queue-debug")
+DEFAULT_SCENARIOS = ["Projects.get", "Projects.get:id", "ProjectSnapshot.get", "Boards.get", "Cards.get"]
+
+def configure(mode: str, sink) -> None:
+    """Настройка журнала процесса под режим прогона."""
+    from api.v1.logs import init_logging, stop_logging
+
+    stop_logging()
+    logging.disable(logging.NOTSET)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if mode == "off":
+        logging.disable(logging.CRITICAL)
+    elif mode == "sync":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        init_logging(level="DEBUG" if mode == "queue-debug" else "INFO", levels="", stream=sink)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario and mode")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=25, help="cards per board")
+    parser.add_argument("--only", nargs="*", default=DEFAULT_SCENARIOS, help="scenarios from bench.endpoints")
+    parser.add_argument("--modes", nargs="*", default=list(MODES), choices=MODES)
+    parser.add_argument("--sink", default=os.devnull, help="file that receives log output")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    with open(args.sink, "a") as sink, TemporaryPostgres():
+        from werkzeug.serving import make_server, WSGIRequestHandler
+        from api.v1.logs import logging_stats
+        from api.v1.pool import configure_pool
+        configure_pool(max_size=args.concurrency + 2, max_overflow=0)
+        from run import app
+
+        # Строки доступа werkzeug одинаковы во всех режимах и к измерению не относятся
+        WSGIRequestHandler.log_request = lambda *args, **kwargs: None
+        data = seed(args.projects, args.cards)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = Client(server.server_port)
+        try:
+            _, body, headers = client.request("POST", "/api/v1/users/auth", {"email": "owner@bench.local", "password": PASSWORD})
+            cookie = headers.get("Set-Cookie", "")
+            tokens = {
+                "access": body["data"]["access_token"],
+                "refresh": cookie.split("refresh_token=", 1)[1].split(";", 1)[0]
+            }
+            builders = dict(scenarios(data))
+            for name in args.only:
+                results: Dict[str, Dict[str, float]] = {}
+                for mode in args.modes:
+                    configure(mode, sink)
+                    results[mode] = run_scenario(client, tokens, builders[name], args.requests, args.concurrency, args.warmup)
+                    row = results[mode]
+                    stats = logging_stats() if mode.startswith("queue") else {}
+                    extra = f" log dropped={stats.get('dropped', 0)} sampled={stats.get('sampled', 0)}" if stats else ""
+                    print(f"{name:<22} {mode:<12} p50={row['p50']:>8.2f}ms p95={row['p95']:>8.2f}ms "
+                          f"p99={row['p99']:>8.2f}ms rps={row['rps']:>8.1f} errors={row['errors']}{extra}")
+                if "off" in results:
+                    base = results["off"]["p95"]
+                    overhead = ", ".join(f"{mode} {results[mode]['p95'] - base:+.2f}ms" for mode in args.modes if mode != "off")
+                    print(f"{'':<22} p95 overhead vs off: {overhead}")
+        finally:
+            server.shutdown()
+            configure("off", sink)
+            configure_pool()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
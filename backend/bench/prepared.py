@@ -0,0 +1,109 @@
+"""Бенчмарк реестра подготовленных запросов api.v1.statements.
+
+Запуск из каталога backend:
+
+    python -m bench.prepared
+
+Поднимает временный Postgres со схемой bds.sql, заполняет его данными и для каждого
+запроса каталога сравнивает обычный cursor.execute с execute_prepared: время вызова
+и время планирования по EXPLAIN (ANALYZE, SUMMARY).
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .database import TemporaryPostgres
+from .endpoints import seed
+
+def plain_sql(name: str) -> str:
+    """Текст запроса каталога с параметрами psycopg2 вместо $n."""
+    from api.v1.statements import STATEMENTS
+    query = STATEMENTS[name]
+    for number in range(9, 0, -1):
+        query = query.replace(f"${number}", "%s")
+    return query
+
+def cases(data: Dict[str, Any]) -> List[Tuple[str, Sequence[Any]]]:
+    """Запросы каталога с параметрами из заполненной базы (изменяющие данные не входят)."""
+    project_id = data["project_ids"][0]
+    board_id = data["board_ids"][0]
+    card_id = data["card_id"]
+    owner_id = data["owner_id"]
+    return [
+        ("collaborator_role", (project_id, owner_id)),
+        ("card_resolve", (card_id,)),
+        ("board_resolve", (board_id,)),
+        ("boards_by_project", (project_id,)),
+        ("board_by_id", (project_id, board_id)),
+        ("cards_by_board", (board_id,)),
+        ("card_by_id", (card_id,)),
+        ("card_in_board", (board_id, card_id)),
+        ("cards_page", (board_id, 20)),
+        ("cards_page_after", (board_id, card_id, 20)),
+        ("card_with_titles", (card_id,)),
+        ("notifications", (owner_id, 10)),
+        ("notifications_after", (owner_id, 2, 1_000_000, 10)),
+    ]
+
+def measure(call: Callable[[], None], number: int) -> float:
+    """Среднее время вызова в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(number):
+        call()
+    return (time.perf_counter() - started) / number * 1_000_000
+
+def planning_time(cursor, query: str, params: Sequence[Any]) -> float:
+    """Время планирования запроса в миллисекундах по EXPLAIN ANALYZE."""
+    cursor.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {query}", tuple(params))
+    return float(cursor.fetchone()[0][0]["Planning Time"])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prepared statement benchmark")
+    parser.add_argument("--number", type=int, default=2000, help="calls per statement")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=25, help="cards per board")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    with TemporaryPostgres():
+        from api.v1.pool import get_pool
+        from api.v1.statements import execute_prepared
+
+        data = seed(args.projects, args.cards)
+        pool = get_pool()
+        connect = pool.getconn()
+        try:
+            cursor = connect.cursor()
+            cursor.execute("SELECT id FROM cards WHERE board_id = %s ORDER BY id LIMIT 1", (data["board_ids"][0],))
+            data["card_id"] = cursor.fetchone()[0]
+
+            total_plain = total_prepared = 0.0
+            print(f"{'statement':<22} {'execute':>10} {'prepared':>10} {'speedup':>8} {'planning':>10}")
+            for name, params in cases(data):
+                query = plain_sql(name)
+
+                def plain() -> None:
+                    cursor.execute(query, tuple(params))
+                    cursor.fetchall()
+
+                def prepared() -> None:
+                    execute_prepared(cursor, name, params)
+                    cursor.fetchall()
+
+                plain_time = measure(plain, args.number)
+                prepared_time = measure(prepared, args.number)
+                planning = planning_time(cursor, query, params)
+                total_plain += plain_time
+                total_prepared += prepared_time
+                print(f"{name:<22} {plain_time:>8.1f}us {prepared_time:>8.1f}us {plain_time / prepared_time:>7.2f}x {planning:>8.3f}ms")
+            connect.rollback()
+            print(f"{'total':<22} {total_plain:>8.1f}us {total_prepared:>8.1f}us {total_plain / total_prepared:>7.2f}x")
+        finally:
+            pool.putconn(connect)
+            pool.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Микробенчмарк сериализации конверта ApiResponse.
+
+Запуск из каталога backend:
+
+    python -m bench.serialization
+
+Сравнивает прежний путь (обход строк с .isoformat() в connect.py и json.dumps
+внутри flask_restful) с api.v1.serializer на полезной нагрузке снимка проекта
+и списка проектов.
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from api.v1.serializer import SERIALIZERS
+
+def card(card_id: int, board_id: int, now: datetime) -> Dict[str, Any]:
+    """Строка карточки в том виде, в каком её возвращает psycopg2."""
+    return {
+        "id": card_id,
+        "title": f"Card {card_id}",
+        "about": "Описание карточки для проверки сериализации " * 6,
+        "brief_about": "Краткое описание",
+        "sell_by": now + timedelta(days=card_id % 30),
+        "status": "todo",
+        "priority": card_id % 3,
+        "external_resource": "https://example.com/resource",
+        "board_id": board_id,
+        "tags": ["backend", "api"],
+        "responsible": [{"id": card_id, "user_id": 1, "email": "user@example.com", "appointed_at": now}]
+    }
+
+def snapshot_payload(boards: int, cards_per_board: int) -> Dict[str, Any]:
+    """Снимок проекта: доски с карточками."""
+    now = datetime(2025, 5, 5, 12, 30, 15, 123456)
+    return {"project_id": 1, "boards": [
+        {"id": board, "title": f"Board {board}", "project_id": 1,
+         "cards": [card(board * cards_per_board + number, board, now) for number in range(cards_per_board)]}
+        for board in range(boards)
+    ]}
+
+def projects_payload(projects: int) -> Dict[str, Any]:
+    """Список проектов пользователя с участниками и досками."""
+    now = datetime(2025, 5, 5, 12, 30, 15, 123456)
+    items = [{
+        "id": number, "title": f"Project {number}", "description": "Описание проекта " * 20,
+        "created_at": now, "updated_at": now, "budget": Decimal("1250.50"),
+        "users": [{"user_id": user, "role": 1, "added_at": now, "email": f"u{user}@example.com", "nickname": None} for user in range(8)],
+        "boards": [{"id": board, "title": f"Board {board}"} for board in range(4)]
+    } for number in range(projects)]
+    return {"owner_projects": items[: projects // 2], "member_projects": items[projects // 2:]}
+
+def isoformat_walk(value: Any) -> Any:
+    """Прежний путь: перевод дат в строки до сериализации, как делает connect.py."""
+    if isinstance(value, dict):
+        return {key: isoformat_walk(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [isoformat_walk(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def envelope(data: Any) -> Dict[str, Any]:
+    """Конверт ApiResponse.success."""
+    return {"meta": {"status": "OK", "http_code": 200, "method": "GET"}, "data": {"body": data}}
+
+def legacy(payload: Any, indent: Optional[int]) -> bytes:
+    """Прежний путь flask_restful.representations.json.output_json."""
+    return (json.dumps(envelope(isoformat_walk(payload)), indent=indent) + "\n").encode()
+
+def measure(function: Callable[[], bytes], repeat: int, number: int) -> float:
+    """Лучшее время одного вызова в миллисекундах."""
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number * 1000
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ApiResponse serialization micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    payloads = {
+        "snapshot 4x250 cards": snapshot_payload(4, 250),
+        "snapshot 4x25 cards": snapshot_payload(4, 25),
+        "projects x50": projects_payload(50),
+    }
+    for name, payload in payloads.items():
+        print(name)
+        baseline = measure(lambda: legacy(payload, None), args.repeat, args.number)
+        print(f"  {'legacy json':<22} {baseline:8.3f} ms")
+        debug = measure(lambda: legacy(payload, 4), args.repeat, args.number)
+        print(f"  {'legacy json (debug)':<22} {debug:8.3f} ms  x{baseline / debug:.2f}")
+        for serializer, dumps in SERIALIZERS.items():
+            elapsed = measure(lambda: dumps(envelope(payload)), args.repeat, args.number)
+            print(f"  {serializer:<22} {elapsed:8.3f} ms  x{baseline / elapsed:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Нагрузочный бенчмарк веб-сокетов проекта /api/v1/projects/ws.
+
+Запуск из каталога backend (нужны uvicorn и websockets):
+
+    python -m bench.ws_load
+    python -m bench.ws_load --viewers 100 500 1000 2000 --max-p95 250
+
+Поднимает временный Postgres, запускает ASGI-приложение в uvicorn и для каждого числа
+зрителей открывает столько сокетов одного проекта, после чего редактирует карточки.
+Время отправки записывается в заголовок карточки, поэтому задержка доставки считается
+каждым зрителем по полученному событию. Итог — наибольшее число зрителей, при котором
+p95 задержки укладывается в --max-p95 и все события доставлены.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .database import TemporaryPostgres, free_port
+from .endpoints import PASSWORD, Client, percentile, seed
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_server(port: int) -> subprocess.Popen:
+    """ASGI-приложение в отдельном процессе uvicorn; ожидание готовности по HTTP."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "asgi:application", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=dict(os.environ)
+    )
+    client = Client(port)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            client.request("GET", "/api/v1/projects/discover?tags=python")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+async def viewer(url: str, ready: asyncio.Event, latencies: List[float], received: Dict[str, int], stop: asyncio.Event) -> None:
+    """Один зритель: задержки событий с отметкой времени в заголовке карточки."""
+    import websockets
+
+    async with websockets.connect(url, max_queue=None, open_timeout=60) as socket:
+        json.loads(await socket.recv())
+        received["connected"] += 1
+        if received["connected"] == received["expected"]:
+            ready.set()
+        while not stop.is_set():
+            try:
+                message = json.loads(await asyncio.wait_for(socket.recv(), timeout=0.5))
+            except asyncio.TimeoutError:
+                continue
+            now = time.time()
+            for change in message.get("changes", ()):
+                title = (change.get("data") or {}).get("title", "")
+                if title.startswith("ws-bench "):
+                    latencies.append((now - float(title.split()[1])) * 1000)
+                    received["events"] += 1
+
+async def run_level(url: str, viewers: int, card_id: int, edits: int, interval: float) -> Dict[str, float]:
+    """Прогон одного уровня: открытие зрителей, серия правок, сбор задержек."""
+    from api.v1 import connect
+
+    latencies: List[float] = []
+    received = {"connected": 0, "expected": viewers, "events": 0}
+    ready, stop = asyncio.Event(), asyncio.Event()
+    tasks = [asyncio.create_task(viewer(url, ready, latencies, received, stop)) for _ in range(viewers)]
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=120)
+        loop = asyncio.get_running_loop()
+        for _ in range(edits):
+            await loop.run_in_executor(None, lambda: connect.cards_edit(card_id, title=f"ws-bench {time.time()}"))
+            await asyncio.sleep(interval)
+        deadline = time.monotonic() + 10
+        while received["events"] < viewers * edits and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    expected = viewers * edits
+    return {
+        "p50": round(percentile(latencies, 0.50), 2) if latencies else float("inf"),
+        "p95": round(percentile(latencies, 0.95), 2) if latencies else float("inf"),
+        "p99": round(percentile(latencies, 0.99), 2) if latencies else float("inf"),
+        "delivered": round(len(latencies) / expected, 4)
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="WebSocket fan-out benchmark")
+    parser.add_argument("--viewers", type=int, nargs="*", default=[100, 250, 500, 1000, 2000])
+    parser.add_argument("--edits", type=int, default=20, help="card edits per level")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between edits")
+    parser.add_argument("--max-p95", type=float, default=250.0, help="delivery latency SLO, ms")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    with TemporaryPostgres():
+        from api.v1 import connect
+        from api.v1.pool import get_pool
+
+        data = seed(1, 5)
+        project_id = data["project_ids"][0]
+        port = free_port()
+        server = start_server(port)
+        try:
+            _, body, _ = Client(port).request("POST", "/api/v1/users/auth", {"email": "owner@bench.local", "password": PASSWORD})
+            token = body["data"]["access_token"]
+            card_id = connect.cards_info(board_id=data["board_ids"][0])[0]["id"]
+            url = f"ws://127.0.0.1:{port}/api/v1/projects/ws?project_id={project_id}&token={token}"
+
+            best = 0
+            for viewers in args.viewers:
+                row = asyncio.run(run_level(url, viewers, card_id, args.edits, args.interval))
+                passed = row["p95"] <= args.max_p95 and row["delivered"] >= 1.0
+                print(f"viewers={viewers:<6} p50={row['p50']:>8.2f}ms p95={row['p95']:>8.2f}ms p99={row['p99']:>8.2f}ms "
+                      f"delivered={row['delivered']:.2%} {'ok' if passed else 'SLO MISSED'}")
+                if not passed:
+                    break
+                best = viewers
+            print(f"max viewers within p95 <= {args.max_p95}ms: {best}")
+        finally:
+            server.terminate()
+            server.wait()
+            get_pool().close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,4 +4,6 @@ DEBUG = True
 SECRET_KEY = ")o6_u=^x%166_9s0m-7!1y3ev-w3rqv#r%g(obd25k=b^v12r#"
 JWT_KEY = "$niht79s$m8#x)5=4wm-8ntw_5vjtp#y_9*0zfi!79-hh6#!kv"
 ACCESS_TIME = timedelta(hours=1) 
-REFRESH_TIME = timedelta(days=30)
\ No newline at end of file
+REFRESH_TIME = timedelta(days=30)
+CORS_ORIGIN = "http://localhost:3000"
+JSON_SERIALIZER = None  # "orjson", "json" или None для самого быстрого доступного
@@ -1,34 +1,59 @@
 from api.v1 import *
 from api.v1.resource import *
+from api.v1.unit import init_unit_of_work
+from api.v1.serializer import init_serializer
+from api.v1.logs import init_logging
+from api.v1.previews import get_previews
 from flask_restful import Api
 from flask_jwt_extended import JWTManager
 from config import *
 from flask_cors import CORS
 
+init_logging()
 apiclient = Api(app)
+init_serializer(apiclient, JSON_SERIALIZER)
 jwt = JWTManager(app)
 CORS(app, 
      resources={
          r"/api/*": {
-             "origins": "http://localhost:3000",
+             "origins": CORS_ORIGIN,
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Authorization", "Content-Type"],
+             "allow_headers": ["Authorization", "Content-Type", "Content-Range", "Range"],
              "supports_credentials": True,  # Ключевая настройка
-             "expose_headers": ["Authorization"]
+             "expose_headers": ["Authorization", "Content-Range", "Accept-Ranges"]
          }
      })
+init_unit_of_work(app)
+# Превью, не готовые к прошлому останову, подбираются из базы сразу после запуска
+get_previews().start()
 
 apiclient.add_resource(Users, "/api/v1/users")
 apiclient.add_resource(Auth, "/api/v1/users/auth")
 apiclient.add_resource(Refresh, "/api/v1/refresh")
 
 apiclient.add_resource(Projects, "/api/v1/projects")
+apiclient.add_resource(ProjectSnapshot, "/api/v1/projects/snapshot")
+apiclient.add_resource(ProjectSync, "/api/v1/projects/sync")
+apiclient.add_resource(ProjectDiscover, "/api/v1/projects/discover")
 apiclient.add_resource(Collaborators, "/api/v1/projects/collaborators")
 apiclient.add_resource(Boards, "/api/v1/projects/boards")
 apiclient.add_resource(Cards, "/api/v1/projects/cards")
+apiclient.add_resource(CardsBulk, "/api/v1/projects/cards/bulk")
 apiclient.add_resource(ProjectTags, "/api/v1/projects/tags")
+apiclient.add_resource(CardComments, "/api/v1/projects/cards/comments")
+apiclient.add_resource(CardFiles, "/api/v1/projects/cards/files")
 
 apiclient.add_resource(Notification, "/api/v1/notification")
+apiclient.add_resource(NotificationUnread, "/api/v1/notification/unread")
+apiclient.add_resource(NotificationStream, "/api/v1/notification/stream")
+
+apiclient.add_resource(Chats, "/api/v1/chats")
+apiclient.add_resource(ChatMessages, "/api/v1/chats/messages")
+apiclient.add_resource(ChatStream, "/api/v1/chats/stream")
+
+apiclient.add_resource(Search, "/api/v1/search")
+
+apiclient.add_resource(Metrics, "/api/v1/metrics")
 
 app.secret_key = SECRET_KEY
 app.config['JWT_SECRET_KEY'] = 'your-secure-secret-key' 
@@ -0,0 +1,71 @@
+import atexit
+import importlib.util
+import logging
+import subprocess
+import unittest
+from typing import Any, Optional
+
+# Общая подготовка тестов с базой: временный кластер Postgres из bench.database.
+REQUIRED_MODULES = ("flask", "flask_restful", "flask_jwt_extended", "psycopg2")
+REQUIRED_BINARIES = ("initdb", "pg_ctl", "psql")
+
+def missing_requirements() -> str:
+    """Причина пропуска тестов с базой или пустая строка, если окружение подходит."""
+    from bench.database import pg_binary
+
+    missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    if missing:
+        return f"missing modules: {', '.join(missing)}"
+    for name in REQUIRED_BINARIES:
+        try:
+            pg_binary(name)
+        except (RuntimeError, OSError, subprocess.SubprocessError) as e:
+            return str(e)
+    return ""
+
+SKIP_REASON = missing_requirements()
+
+_database: Optional[Any] = None
+
+def start_database() -> Any:
+    """Один кластер на процесс тестов: api.v1.server читает параметры подключения при первом импорте."""
+    global _database
+    if _database is None:
+        from bench.database import TemporaryPostgres
+
+        database = TemporaryPostgres()
+        database.__enter__()
+        atexit.register(database.__exit__, None, None, None)
+        _database = database
+    return _database
+
+@unittest.skipIf(SKIP_REASON, SKIP_REASON)
+class DatabaseTestCase(unittest.TestCase):
+    """Тесты на временной базе со схемой bds.sql; пул считает выполненные запросы.
+
+    Классы разделяют одну базу, поэтому данные каждого теста создаются с уникальными email.
+    """
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.database = start_database()
+        from bench.endpoints import counting_connection_factory
+        from api.v1.pool import configure_pool
+        configure_pool(connection_factory=counting_connection_factory())
+
+    @classmethod
+    def tearDownClass(cls):
+        from api.v1.pool import configure_pool
+        from api.v1.cache import permission_cache, resolution_cache, user_cache
+        configure_pool()
+        for cache in (permission_cache, resolution_cache, user_cache):
+            cache.clear()
+        logging.disable(logging.NOTSET)
+
+    def count_queries(self, function, *args, **kwargs) -> tuple:
+        """Число SQL-запросов и результат вызова."""
+        from bench.endpoints import COUNTER
+
+        COUNTER.reset()
+        result = function(*args, **kwargs)
+        return COUNTER.reset(), result
@@ -0,0 +1,123 @@
+"""Кэш прав и принадлежности: изменения видны при следующей проверке.
+
+Запуск из каталога backend (нужны зависимости req.txt и серверные утилиты PostgreSQL):
+
+    python -m unittest tests.test_permission_cache
+"""
+import importlib.util
+import time
+import unittest
+
+from tests.support import DatabaseTestCase
+
+@unittest.skipIf(importlib.util.find_spec("flask") is None, "missing modules: flask")
+class TTLCacheTest(unittest.TestCase):
+    """Поведение TTLCache без базы."""
+    def cache(self, maxsize: int = 2, ttl: float = 60.0):
+        from api.v1.cache import TTLCache
+        return TTLCache(maxsize, ttl)
+
+    def test_negative_value_is_cached(self):
+        from api.v1.cache import MISSING
+        cache = self.cache()
+        self.assertIs(cache.get("key"), MISSING)
+        cache.set("key", None)
+        self.assertIsNone(cache.get("key"))
+
+    def test_expired_entry_is_a_miss(self):
+        from api.v1.cache import MISSING
+        cache = self.cache(ttl=0.05)
+        cache.set("key", 1)
+        time.sleep(0.1)
+        self.assertIs(cache.get("key"), MISSING)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        from api.v1.cache import MISSING
+        cache = self.cache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_invalidate_where(self):
+        from api.v1.cache import MISSING
+        cache = self.cache(maxsize=10)
+        cache.set((1, 1), 3)
+        cache.set((1, 2), 1)
+        cache.set((2, 1), 2)
+        cache.invalidate_where(lambda key: key[0] == 1)
+        self.assertIs(cache.get((1, 1)), MISSING)
+        self.assertIs(cache.get((1, 2)), MISSING)
+        self.assertEqual(cache.get((2, 1)), 2)
+
+class PermissionInvalidationTest(DatabaseTestCase):
+    """Смена, снятие и выдача роли и перенос карточки видны сразу, без ожидания TTL."""
+    def setUp(self):
+        from api.v1 import connect
+
+        suffix = self.id().rsplit(".", 1)[-1]
+        self.owner_id = connect.user_registration(f"owner-{suffix}@cache.test", "hash")
+        self.member_id = connect.user_registration(f"member-{suffix}@cache.test", "hash")
+        self.project = connect.project_create("Cached", "Permission cache test", self.owner_id)
+        self.project_id = self.project["id"]
+
+    def test_role_change_is_visible_immediately(self):
+        from api.v1 import connect
+
+        connect.collaborators_add(self.project_id, self.member_id, 1)
+        self.assertEqual(connect.collaborator_role(self.project_id, self.member_id), 1)
+        self.assertFalse(connect.can_edit(self.member_id, project_id=self.project_id))
+
+        connect.collaborators_change(self.project_id, self.member_id, 2)
+        self.assertEqual(connect.collaborator_role(self.project_id, self.member_id), 2)
+        self.assertTrue(connect.can_edit(self.member_id, project_id=self.project_id))
+
+        connect.collaborators_change(self.project_id, self.member_id, 0)
+        self.assertFalse(connect.can_edit(self.member_id, project_id=self.project_id))
+        self.assertFalse(connect.can_view(self.member_id, project_id=self.project_id))
+
+    def test_removal_is_visible_immediately(self):
+        from api.v1 import connect
+
+        connect.collaborators_add(self.project_id, self.member_id, 2)
+        self.assertTrue(connect.can_edit(self.member_id, project_id=self.project_id))
+
+        connect.collaborators_delete(self.project_id, self.member_id)
+        self.assertIsNone(connect.collaborator_role(self.project_id, self.member_id))
+        self.assertFalse(connect.can_edit(self.member_id, project_id=self.project_id))
+
+    def test_cached_absence_is_replaced_on_add(self):
+        from api.v1 import connect
+
+        self.assertIsNone(connect.collaborator_role(self.project_id, self.member_id))
+        connect.collaborators_add(self.project_id, self.member_id, 2)
+        self.assertEqual(connect.collaborator_role(self.project_id, self.member_id), 2)
+
+    def test_card_move_updates_resolution(self):
+        from api.v1 import connect
+
+        other = connect.project_create("Other", "Move target", self.member_id)
+        connect.collaborators_add(other["id"], self.owner_id, 3)
+        card = connect.cards_create(self.project["boards"][0]["id"], "Moved card", "Card text")
+        self.assertEqual(connect.resolve_project(card_id=card["id"]), self.project_id)
+        self.assertFalse(connect.can_edit(self.member_id, card_id=card["id"]))
+
+        connect.cards_edit(card["id"], board_id=other["boards"][0]["id"])
+        self.assertEqual(connect.resolve_project(card_id=card["id"]), other["id"])
+        self.assertTrue(connect.can_edit(self.member_id, card_id=card["id"]))
+
+    def test_bulk_move_updates_resolution(self):
+        from api.v1 import connect
+
+        other = connect.project_create("Other", "Bulk move target", self.owner_id)
+        card = connect.cards_create(self.project["boards"][0]["id"], "Bulk card", "Card text")
+        self.assertEqual(connect.resolve_project(card_id=card["id"]), self.project_id)
+
+        results = connect.cards_bulk(self.owner_id, [{"op": "move", "card_id": card["id"], "board_id": other["boards"][0]["id"]}])
+        self.assertEqual(results[0]["status"], 200)
+        self.assertEqual(connect.resolve_project(card_id=card["id"]), other["id"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Число SQL-запросов списка проектов не зависит от числа проектов пользователя.
+
+Запуск из каталога backend (нужны зависимости req.txt и серверные утилиты PostgreSQL):
+
+    python -m unittest tests.test_project_list
+"""
+import unittest
+
+from tests.support import DatabaseTestCase
+
+class ProjectListQueriesTest(DatabaseTestCase):
+    """project_list выполняет постоянное число запросов для 1 и для N проектов."""
+    PROJECTS = 20
+
+    def test_query_count_is_flat(self):
+        from api.v1 import connect
+
+        owner_id = connect.user_registration("owner@list.test", "hash")
+        member_id = connect.user_registration("member@list.test", "hash")
+
+        project = connect.project_create("Project 0", "Test project", owner_id)
+        connect.collaborators_add(project["id"], member_id, 1)
+        owner_single, owner_result = self.count_queries(connect.project_list, owner_id)
+        member_single, member_result = self.count_queries(connect.project_list, member_id)
+        self.assertEqual(len(owner_result["owner_projects"]), 1)
+        self.assertEqual(len(member_result["member_projects"]), 1)
+
+        for number in range(1, self.PROJECTS):
+            project = connect.project_create(f"Project {number}", "Test project", owner_id)
+            connect.collaborators_add(project["id"], member_id, 1)
+        owner_many, owner_result = self.count_queries(connect.project_list, owner_id)
+        member_many, member_result = self.count_queries(connect.project_list, member_id)
+
+        self.assertEqual(len(owner_result["owner_projects"]), self.PROJECTS)
+        self.assertEqual(owner_result["member_projects"], [])
+        self.assertEqual(len(member_result["member_projects"]), self.PROJECTS)
+        for listed in owner_result["owner_projects"]:
+            self.assertEqual(len(listed["users"]), 2)
+            self.assertTrue(listed["boards"])
+        self.assertLessEqual(owner_single, 3)
+        self.assertEqual(owner_many, owner_single)
+        self.assertEqual(member_many, member_single)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Отзыв токенов обновления по версии пользователя.
+
+Запуск из каталога backend (нужны зависимости req.txt и серверные утилиты PostgreSQL):
+
+    python -m unittest tests.test_refresh_revocation
+"""
+import unittest
+from datetime import timedelta
+
+from tests.support import DatabaseTestCase
+
+class RefreshRevocationTest(DatabaseTestCase):
+    """Смена пароля или роли и удаление отзывают токен обновления, смена никнейма — нет."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from flask import Flask
+        from flask_jwt_extended import JWTManager
+        from flask_restful import Api
+        from api.v1.resource import Refresh
+        from api.v1.unit import init_unit_of_work
+
+        # То же подключение ресурса, что в run.py, без фоновых служб приложения
+        app = Flask(__name__)
+        app.config["JWT_SECRET_KEY"] = "test-secret-key"
+        app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(minutes=5)
+        app.config["JWT_TOKEN_LOCATION"] = ["headers"]
+        JWTManager(app)
+        init_unit_of_work(app)
+        Api(app).add_resource(Refresh, "/api/v1/refresh")
+        cls.app = app
+
+    def setUp(self):
+        from api.v1 import connect
+
+        suffix = self.id().rsplit(".", 1)[-1]
+        self.email = f"{suffix}@refresh.test"
+        self.user_id = connect.user_registration(self.email, "hash")
+        self.client = self.app.test_client()
+
+    def refresh_token(self) -> str:
+        """Токен обновления с текущей версией пользователя, как при входе."""
+        from flask_jwt_extended import create_refresh_token
+        from api.v1 import connect
+
+        version = connect.user_claims(self.user_id)[0]
+        with self.app.app_context():
+            return create_refresh_token(
+                identity=str(self.user_id),
+                additional_claims={"email": self.email, "version": version}
+            )
+
+    def refresh(self, token: str) -> int:
+        response = self.client.post("/api/v1/refresh", headers={"Authorization": f"Bearer {token}"})
+        return response.status_code
+
+    def test_password_change_revokes_token(self):
+        from api.v1 import connect
+
+        token = self.refresh_token()
+        self.assertEqual(self.refresh(token), 200)
+        connect.user_edit(self.user_id, password="new-hash")
+        self.assertEqual(self.refresh(token), 401)
+        self.assertEqual(self.refresh(self.refresh_token()), 200)
+
+    def test_role_change_revokes_token(self):
+        from api.v1 import connect
+
+        token = self.refresh_token()
+        self.assertEqual(self.refresh(token), 200)
+        connect.user_edit(self.user_id, role=2)
+        self.assertEqual(self.refresh(token), 401)
+
+    def test_nickname_change_keeps_token(self):
+        from api.v1 import connect
+
+        token = self.refresh_token()
+        connect.user_edit(self.user_id, nickname="renamed")
+        self.assertEqual(self.refresh(token), 200)
+
+    def test_deleted_user_is_rejected(self):
+        from api.v1 import connect
+
+        token = self.refresh_token()
+        self.assertEqual(self.refresh(token), 200)
+        connect.user_delete(self.user_id)
+        self.assertEqual(self.refresh(token), 401)
+
+if __name__ == "__main__":
+    unittest.main()
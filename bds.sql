@@ -19,8 +19,14 @@ CREATE TABLE projects(
     description text,
     created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    version integer NOT NULL DEFAULT 0,
+    search tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED,
     PRIMARY KEY(id)
 );
+CREATE INDEX idx_projects_search ON public.projects USING gin (search);
 CREATE INDEX idx_projects_title ON public.projects USING btree (title);
 CREATE INDEX idx_projects_created_at ON public.projects USING btree (created_at);
 CREATE INDEX idx_projects_updated_at ON public.projects USING btree (updated_at);
@@ -29,6 +35,7 @@ CREATE TABLE boards(
     id SERIAL NOT NULL,
     title varchar(16) NOT NULL,
     project_id integer NOT NULL,
+    version integer NOT NULL DEFAULT 0,
     PRIMARY KEY(id),
     CONSTRAINT board_project_id_fkey FOREIGN key(project_id) REFERENCES projects(id)
 );
@@ -44,10 +51,17 @@ CREATE TABLE cards(
     priority integer DEFAULT 0,
     external_resource varchar(256),
     board_id integer NOT NULL,
+    version integer NOT NULL DEFAULT 0,
+    search tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(brief_about, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(about, '')), 'C')
+    ) STORED,
     PRIMARY KEY(id),
     CONSTRAINT cards_board_id_fkey FOREIGN key(board_id) REFERENCES boards(id)
 );
-CREATE INDEX idx_cards_board_id ON public.cards USING btree (board_id);
+CREATE INDEX idx_cards_search ON public.cards USING gin (search);
+CREATE INDEX idx_cards_board_id ON public.cards USING btree (board_id, id);
 CREATE INDEX idx_cards_status ON public.cards USING btree (status);
 CREATE INDEX idx_cards_priority ON public.cards USING btree (priority);
 CREATE INDEX idx_cards_sell_by ON public.cards USING btree (sell_by);
@@ -71,21 +85,38 @@ CREATE TABLE files(
     id SERIAL NOT NULL,
     path text NOT NULL,
     card_id integer NOT NULL,
+    name text NOT NULL,
+    size bigint NOT NULL,
+    content_type varchar(255) NOT NULL DEFAULT 'application/octet-stream',
+    received bigint NOT NULL DEFAULT 0,
+    complete boolean NOT NULL DEFAULT false,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    preview_status varchar(16) NOT NULL DEFAULT 'none',
+    width integer,
+    height integer,
+    thumbnail text,
+    preview text,
+    preview_claimed_at timestamp without time zone,
     PRIMARY KEY(id),
     CONSTRAINT files_card_id_fkey FOREIGN key(card_id) REFERENCES cards(id)
 );
 CREATE INDEX idx_files_card_id ON public.files USING btree (card_id);
+CREATE INDEX idx_files_preview_pending ON public.files USING btree (id) WHERE preview_status IN ('pending', 'rendering');
 
 CREATE TABLE comments(
     id SERIAL NOT NULL,
     text text NOT NULL,
-    promotion integer DEFAULT 0,
+    promotion integer NOT NULL DEFAULT 0,
     card_id integer NOT NULL,
+    user_id integer NOT NULL,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY(id),
-    CONSTRAINT comments_card_id_fkey FOREIGN key(card_id) REFERENCES cards(id)
+    CONSTRAINT comments_card_id_fkey FOREIGN key(card_id) REFERENCES cards(id),
+    CONSTRAINT comments_user_id_fkey FOREIGN key(user_id) REFERENCES users(id)
 );
-CREATE INDEX idx_comments_card_id ON public.comments USING btree (card_id);
-CREATE INDEX idx_comments_promotion ON public.comments USING btree (promotion);
+-- Лучшие комментарии карточки (ORDER BY promotion DESC, id DESC) и новые сверху (ORDER BY id DESC) читаются из индексов
+CREATE INDEX idx_comments_card_promotion ON public.comments USING btree (card_id, promotion, id);
+CREATE INDEX idx_comments_card_id ON public.comments USING btree (card_id, id);
 
 CREATE TABLE projects_tags(
     id SERIAL NOT NULL,
@@ -94,6 +125,8 @@ CREATE TABLE projects_tags(
     PRIMARY KEY(id),
     CONSTRAINT tags_project_id_fkey FOREIGN key(project_id) REFERENCES projects(id)
 );
+CREATE UNIQUE INDEX idx_projects_tags_tag_project ON public.projects_tags USING btree (tag, project_id);
+CREATE INDEX idx_projects_tags_project_id ON public.projects_tags USING btree (project_id, tag);
 
 CREATE TABLE responsible(
     id SERIAL NOT NULL,
@@ -114,13 +147,14 @@ CREATE TABLE notifications(
     id SERIAL NOT NULL,
     text text NOT NULL,
     to_whom integer NOT NULL,
-    priority integer DEFAULT 0,
+    priority integer NOT NULL DEFAULT 0,
     checked boolean NOT NULL DEFAULT false,
     PRIMARY KEY(id),
     CONSTRAINT notifications_to_whom_fkey FOREIGN key(to_whom) REFERENCES users(id)
 );
-CREATE INDEX idx_notifications_to_whom ON public.notifications USING btree (to_whom);
+CREATE INDEX idx_notifications_to_whom ON public.notifications USING btree (to_whom, priority, id);
 CREATE INDEX idx_notifications_priority ON public.notifications USING btree (priority);
+CREATE INDEX idx_notifications_unread ON public.notifications USING btree (to_whom, id) WHERE checked = false;
 
 CREATE TABLE cards_tags(
     id SERIAL NOT NULL,
@@ -130,4 +164,41 @@ CREATE TABLE cards_tags(
     CONSTRAINT tags_card_id_fkey FOREIGN key(card_id) REFERENCES cards(id)
 );
 CREATE INDEX idx_tags_card_id ON public.cards_tags USING btree (card_id);
-CREATE INDEX idx_tags_tag ON public.cards_tags USING btree (tag);
\ No newline at end of file
+CREATE INDEX idx_tags_tag ON public.cards_tags USING btree (tag);
+
+CREATE TABLE project_changes(
+    id BIGSERIAL NOT NULL,
+    project_id integer NOT NULL,
+    version integer NOT NULL,
+    entity varchar(16) NOT NULL,
+    entity_id integer NOT NULL,
+    action varchar(8) NOT NULL,
+    data jsonb,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(id),
+    CONSTRAINT project_changes_project_id_fkey FOREIGN key(project_id) REFERENCES projects(id)
+);
+CREATE INDEX idx_project_changes_project_version ON public.project_changes USING btree (project_id, version, id);
+
+CREATE TABLE chats(
+    id SERIAL NOT NULL,
+    project_id integer NOT NULL,
+    title varchar(255) NOT NULL,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(id),
+    CONSTRAINT chats_project_id_fkey FOREIGN key(project_id) REFERENCES projects(id)
+);
+CREATE INDEX idx_chats_project_id ON public.chats USING btree (project_id);
+
+-- Сообщения только добавляются; история читается по ключу (chat_id, id)
+CREATE TABLE messages(
+    id BIGSERIAL NOT NULL,
+    chat_id integer NOT NULL,
+    user_id integer NOT NULL,
+    text text NOT NULL,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(id),
+    CONSTRAINT messages_chat_id_fkey FOREIGN key(chat_id) REFERENCES chats(id),
+    CONSTRAINT messages_user_id_fkey FOREIGN key(user_id) REFERENCES users(id)
+);
+CREATE INDEX idx_messages_chat_id ON public.messages USING btree (chat_id, id);